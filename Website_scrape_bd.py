@@ -1,68 +1,1047 @@
-import urllib.request
 import urllib.parse
 import urllib.error
 import http.client
 import json
+import socket
+import logging
+import bisect
+import collections
+import itertools
+import functools
+import html
+import io
+import asyncio
+import hashlib
+import zlib
+import threading
+import gzip
+import argparse
+import concurrent.futures
+import codecs
 import ssl
-import webbrowser
 import time
 import sys
 import os
 import re
 from html.parser import HTMLParser
-from urllib.parse import urljoin, urlparse
+from urllib.parse import urljoin, urlparse, urlunparse
 from datetime import datetime
 
+# Reference point for the CLI's startup timing
+IMPORTED_AT = time.perf_counter()
+
+log = logging.getLogger('darkboss')
+fetch_log = logging.getLogger('darkboss.fetch')
+extract_log = logging.getLogger('darkboss.extract')
+report_log = logging.getLogger('darkboss.report')
+corpus_log = logging.getLogger('darkboss.corpus')
+
+class _PrefixFormatter(logging.Formatter):
+    """Render log records in the tool's familiar [*] / [!] style"""
+    PREFIXES = {logging.DEBUG: '[-]', logging.INFO: '[*]', logging.WARNING: '[!]', logging.ERROR: '[!]'}
+
+    def format(self, record):
+        return f"{self.PREFIXES.get(record.levelno, '[!]')} {super().format(record)}"
+
+def setup_logging(level=logging.INFO, stream=None):
+    """Send the darkboss logger hierarchy to stream (default stdout)"""
+    handler = logging.StreamHandler(stream or sys.stdout)
+    handler.setFormatter(_PrefixFormatter('%(message)s'))
+    log.handlers[:] = [handler]
+    log.setLevel(level)
+    log.propagate = False
+    return handler
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+class NullMetrics:
+    """Metrics sink that records nothing; the default, so instrumentation is free when off"""
+    enabled = False
+    _timer = _NullTimer()
+
+    def timer(self, name):
+        return self._timer
+
+    def incr(self, name, value=1):
+        pass
+
+    def observe(self, name, value):
+        pass
+
+class _Timer:
+    __slots__ = ('metrics', 'name', 'start')
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.name, time.perf_counter() - self.start)
+        return False
+
+# Upper bounds (seconds) of the histogram buckets
+METRIC_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+class Metrics(NullMetrics):
+    """Counters and timing histograms for one run
+
+    Timers are histograms of seconds; counters are plain totals such as
+    bytes downloaded or records kept. summary() is JSON-ready and
+    to_prometheus() renders the text exposition format.
+    """
+    enabled = True
+
+    def __init__(self, buckets=METRIC_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counters = {}
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def timer(self, name):
+        return _Timer(self, name)
+
+    def incr(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name, value):
+        with self._lock:
+            hist = self.histograms.get(name)
+            if hist is None:
+                hist = self.histograms[name] = {'count': 0, 'sum': 0.0, 'min': value, 'max': value,
+                                                'buckets': [0] * (len(self.buckets) + 1)}
+            hist['count'] += 1
+            hist['sum'] += value
+            hist['min'] = min(hist['min'], value)
+            hist['max'] = max(hist['max'], value)
+            hist['buckets'][bisect.bisect_left(self.buckets, value)] += 1
+
+    def drain(self):
+        """Return the raw counters/histograms and reset them"""
+        with self._lock:
+            snapshot = {'counters': self.counters, 'histograms': self.histograms}
+            self.counters, self.histograms = {}, {}
+        return snapshot
+
+    def merge(self, snapshot):
+        """Add a snapshot taken with drain(), e.g. from a worker process"""
+        for name, value in snapshot['counters'].items():
+            self.incr(name, value)
+        with self._lock:
+            for name, other in snapshot['histograms'].items():
+                hist = self.histograms.get(name)
+                if hist is None:
+                    self.histograms[name] = {**other, 'buckets': list(other['buckets'])}
+                    continue
+                hist['count'] += other['count']
+                hist['sum'] += other['sum']
+                hist['min'] = min(hist['min'], other['min'])
+                hist['max'] = max(hist['max'], other['max'])
+                hist['buckets'] = [a + b for a, b in zip(hist['buckets'], other['buckets'])]
+
+    def summary(self):
+        with self._lock:
+            return {
+                'counters': dict(sorted(self.counters.items())),
+                'timers': {
+                    name: {
+                        'count': h['count'],
+                        'total_seconds': round(h['sum'], 6),
+                        'mean_seconds': round(h['sum'] / h['count'], 6),
+                        'min_seconds': round(h['min'], 6),
+                        'max_seconds': round(h['max'], 6),
+                    }
+                    for name, h in sorted(self.histograms.items())
+                },
+                # name.hits / name.misses counter pairs, e.g. the parser's URL cache
+                'hit_rates': {
+                    name[:-5]: round(hits / (hits + self.counters.get(name[:-5] + '.misses', 0)), 4)
+                    for name, hits in sorted(self.counters.items())
+                    if name.endswith('.hits') and hits + self.counters.get(name[:-5] + '.misses', 0)
+                },
+            }
+
+    def to_prometheus(self, prefix='darkboss'):
+        def metric(name):
+            return prefix + '_' + re.sub(r'[^a-zA-Z0-9_]', '_', name)
+        lines = []
+        with self._lock:
+            for name, value in sorted(self.counters.items()):
+                lines.append(f"# TYPE {metric(name)}_total counter")
+                lines.append(f"{metric(name)}_total {value}")
+            for name, h in sorted(self.histograms.items()):
+                base = metric(name) + '_seconds'
+                lines.append(f"# TYPE {base} histogram")
+                cumulative = 0
+                for bound, count in zip(self.buckets + ('+Inf',), h['buckets']):
+                    cumulative += count
+                    lines.append(f'{base}_bucket{{le="{bound}"}} {cumulative}')
+                lines.append(f"{base}_sum {h['sum']}")
+                lines.append(f"{base}_count {h['count']}")
+        return '\n'.join(lines) + '\n'
+
+    def write_json(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.summary(), f, indent=2)
+
+    def write_prometheus(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self.to_prometheus())
+
+METRICS = NullMetrics()
+
+def enable_metrics():
+    """Start collecting metrics for this process"""
+    global METRICS
+    if not METRICS.enabled:
+        METRICS = Metrics()
+    return METRICS
+
+class UserRecord:
+    """Compact record for one extracted user
+
+    Known fields live in slots; any other keys (e.g. from JSON API items)
+    are kept in `extra` so to_dict(from_dict(d)) gives back the same data.
+    `offset` is where the card or match starts in the page source, when
+    known; it is bookkeeping and not part of the record's data.
+    """
+    FIELDS = ('name', 'username', 'email', 'bio', 'avatar', 'profile_url',
+              'social', 'source_url', 'method')
+    __slots__ = FIELDS + ('extra', 'offset')
+
+    def __init__(self, name=None, username=None, email=None, bio=None, avatar=None,
+                 profile_url=None, social=None, source_url=None, method=None, extra=None):
+        self.name = name
+        self.username = username
+        self.email = email
+        self.bio = bio
+        self.avatar = avatar
+        self.profile_url = profile_url
+        self.social = social
+        self.source_url = source_url
+        self.method = method
+        self.extra = extra
+        self.offset = None
+
+    @classmethod
+    def from_dict(cls, data, method=None):
+        """Build a record from a user dict, keeping unknown keys in extra"""
+        record = cls(method=method)
+        extra = None
+        for key, value in data.items():
+            if key in cls.FIELDS:
+                setattr(record, key, value)
+            else:
+                if extra is None:
+                    extra = {}
+                extra[key] = value
+        record.extra = extra
+        return record
+
+    @classmethod
+    def from_json(cls, text):
+        return cls.from_dict(json.loads(text))
+
+    def items(self):
+        """Yield (key, value) for every field that is set"""
+        for key in self.FIELDS:
+            value = getattr(self, key)
+            if value is not None:
+                yield key, value
+        if self.extra:
+            yield from self.extra.items()
+
+    def to_dict(self):
+        return dict(self.items())
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), ensure_ascii=False)
+
+    def __eq__(self, other):
+        if not isinstance(other, UserRecord):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return f"UserRecord({self.to_dict()!r})"
+
+def _normalize_profile_url(url):
+    parsed = urlparse(url.strip())
+    path = parsed.path.rstrip('/') or '/'
+    query = f"?{parsed.query}" if parsed.query else ''
+    return f"{parsed.scheme.lower()}://{parsed.netloc.lower()}{path}{query}"
+
+def user_identity_keys(user):
+    """Normalized keys under which two records count as the same user
+
+    Email, profile URL and username identify a user; records with none of
+    them fall back to their social link, then their name.
+    """
+    keys = []
+    if user.email:
+        keys.append('e:' + str(user.email).strip().lower())
+    if user.profile_url:
+        keys.append('p:' + _normalize_profile_url(str(user.profile_url)))
+    if user.username:
+        keys.append('u:' + str(user.username).strip().lower())
+    if not keys:
+        if user.social:
+            keys.append('s:' + str(user.social).strip().lower())
+        elif user.name:
+            keys.append('n:' + ' '.join(str(user.name).lower().split()))
+    return keys
+
+# Identity keys the bounded de-duplication table holds by default
+DEDUPE_CAPACITY = 3000000
+
+class FingerprintTable:
+    """Fixed-size set of 64-bit fingerprints of strings
+
+    An open-addressing table in one array of 8-byte slots, sized when it
+    is created: the next power of two above capacity * 4/3 (32 MB for
+    the default 3 million keys). add() is O(1) on average. Two different
+    strings share a fingerprint with probability 2^-64, so a new string is
+    wrongly reported as present about count / 2^64 of the time (below
+    1e-12 at the default capacity). Once capacity strings are stored, new
+    ones are no longer remembered and add() reports them as absent.
+    """
+    def __init__(self, capacity=DEDUPE_CAPACITY):
+        import array
+        if capacity < 1:
+            raise ValueError("capacity must be positive")
+        slots = 8
+        while slots * 3 < capacity * 4:
+            slots <<= 1
+        self.capacity = capacity
+        self.count = 0
+        self._mask = slots - 1
+        # One allocation: building from bytes() would hold a second zeroed copy
+        self._slots = array.array('Q', [0]) * slots
+
+    @staticmethod
+    def _fingerprint(item):
+        # 0 marks an empty slot
+        return int.from_bytes(hashlib.blake2b(item.encode('utf-8'), digest_size=8).digest(), 'little') or 1
+
+    def __contains__(self, item):
+        fingerprint = self._fingerprint(item)
+        slots = self._slots
+        mask = self._mask
+        i = fingerprint & mask
+        while slots[i]:
+            if slots[i] == fingerprint:
+                return True
+            i = (i + 1) & mask
+        return False
+
+    def add(self, item):
+        """Add item; return True if it was present already"""
+        fingerprint = self._fingerprint(item)
+        slots = self._slots
+        mask = self._mask
+        i = fingerprint & mask
+        while True:
+            value = slots[i]
+            if value == fingerprint:
+                return True
+            if not value:
+                if self.count < self.capacity:
+                    slots[i] = fingerprint
+                    self.count += 1
+                return False
+            i = (i + 1) & mask
+
+    def full(self):
+        return self.count >= self.capacity
+
+class UserDeduplicator:
+    """Streaming de-duplication of extracted users
+
+    add() is O(1) per record. In the default mode partial records are
+    merged: a later record that shares any identity key with an earlier one
+    fills in the fields the earlier one is missing and is dropped. Merged
+    fields only reach output that has not been written yet.
+
+    With bounded=True the identity keys go into a FingerprintTable of the
+    given capacity instead (no records), so memory is fixed up front
+    whatever the corpus size; duplicates are dropped but not merged. Once
+    the table is full, users with only new keys are no longer remembered,
+    so their later duplicates are kept rather than distinct users dropped.
+    """
+    def __init__(self, bounded=False, capacity=DEDUPE_CAPACITY):
+        self.bounded = bounded
+        self.seen = 0
+        self.duplicates = 0
+        self.merged_fields = 0
+        self._index = FingerprintTable(capacity) if bounded else {}
+        self._full = False
+
+    def add(self, user):
+        """Return user if it is new, or None if it duplicates an earlier one"""
+        self.seen += 1
+        keys = user_identity_keys(user)
+        if not keys:
+            return user
+        
+        if self.bounded:
+            index = self._index
+            # Every key is added, even after one is found
+            known = any([index.add(key) for key in keys])
+            if not self._full and index.full():
+                self._full = True
+                log.warning("De-duplication table is full (%d keys); new users are no longer remembered",
+                            index.capacity)
+            if known:
+                self.duplicates += 1
+                return None
+            return user
+        
+        index = self._index
+        existing = None
+        for key in keys:
+            existing = index.get(key)
+            if existing is not None:
+                break
+        if existing is None:
+            for key in keys:
+                index[key] = user
+            return user
+        
+        self.duplicates += 1
+        self._merge(existing, user)
+        # The merged record may now carry keys it did not have before
+        for key in user_identity_keys(existing) + keys:
+            index.setdefault(key, existing)
+        return None
+
+    def _merge(self, target, other):
+        for field in UserRecord.FIELDS:
+            if getattr(target, field) is None:
+                value = getattr(other, field)
+                if value is not None:
+                    setattr(target, field, value)
+                    self.merged_fields += 1
+        if other.extra:
+            if target.extra is None:
+                target.extra = {}
+            for key, value in other.extra.items():
+                if key not in target.extra:
+                    target.extra[key] = value
+                    self.merged_fields += 1
+
+    def filter(self, users):
+        """Yield the users that are not duplicates"""
+        for user in users:
+            if self.add(user) is not None:
+                yield user
+
+    def stats(self):
+        stats = {'seen': self.seen, 'unique': self.seen - self.duplicates,
+                 'duplicates': self.duplicates, 'merged_fields': self.merged_fields}
+        if self.bounded:
+            stats['keys'] = self._index.count
+        return stats
+
+class DetectionRules:
+    """Configurable rules used to recognise user profile elements"""
+    def __init__(self, card_classes=None, id_keywords=None, data_prefix='data-user',
+                 profile_paths=None, avatar_keywords=None, avatar_alt_keywords=None):
+        self.card_classes = card_classes or [
+            'user', 'profile', 'member', 'user-card', 'user_info',
+            'profile-card', 'user-profile', 'user-item', 'user-block',
+            'user-details', 'author', 'user-name', 'user-avatar',
+        ]
+        self.id_keywords = id_keywords or ['user', 'profile', 'member']
+        self.data_prefix = data_prefix
+        self.profile_paths = profile_paths or ['/user/', '/profile/', '/member/', '/users/', '/author/']
+        self.avatar_keywords = avatar_keywords or ['avatar', 'profile', 'user', 'gravatar']
+        self.avatar_alt_keywords = avatar_alt_keywords or ['user', 'profile', 'avatar']
+
+DEFAULT_DETECTION_RULES = DetectionRules()
+
+def _keyword_regex(keywords, flags=0):
+    """Compile a list of substrings into a single alternation"""
+    return re.compile('|'.join(re.escape(k) for k in keywords), flags)
+
+class TagClassifier:
+    """Precompiled start-tag classifier built once per parser"""
+    def __init__(self, rules=None):
+        rules = rules or DEFAULT_DETECTION_RULES
+        self.card_classes = frozenset(rules.card_classes)
+        self.data_prefix = rules.data_prefix
+        self.id_re = _keyword_regex(rules.id_keywords)
+        self.profile_path_re = _keyword_regex(rules.profile_paths)
+        self.avatar_re = _keyword_regex(rules.avatar_keywords)
+        self.avatar_alt_re = _keyword_regex(rules.avatar_alt_keywords)
+
+    def is_user_element(self, attrs):
+        """Return True if the tag attributes mark a user profile element"""
+        # Fast reject: tags without attributes can never start a card
+        if not attrs:
+            return False
+        card_classes = self.card_classes
+        data_prefix = self.data_prefix
+        for name, value in attrs:
+            if name == 'class':
+                if value and not card_classes.isdisjoint(value.split()):
+                    return True
+            elif name == 'id':
+                if value and self.id_re.search(value):
+                    return True
+            elif name.startswith(data_prefix):
+                return True
+        return False
+
+    def card_selector(self, tag, attrs):
+        """CSS-style description of what made a tag a card, e.g. div.user-card"""
+        for name, value in attrs:
+            if name == 'class' and value:
+                matched = sorted(self.card_classes.intersection(value.split()))
+                if matched:
+                    return f"{tag}.{matched[0]}"
+            elif name == 'id' and value:
+                match = self.id_re.search(value)
+                if match:
+                    return f"{tag}[id*={match.group(0)}]"
+            elif name.startswith(self.data_prefix):
+                return f"{tag}[{name}]"
+        return tag
+
+    def is_profile_link(self, href):
+        return self.profile_path_re.search(href) is not None
+
+    def is_avatar(self, src, alt):
+        if self.avatar_re.search(src):
+            return True
+        return bool(alt) and self.avatar_alt_re.search(alt.lower()) is not None
+
+# Query parameters that only track the visitor; dropped from extracted URLs
+TRACKING_PARAMS = ('fbclid', 'gclid', 'dclid', 'msclkid', 'igshid', 'mc_cid', 'mc_eid', 'ref_src', '_ga', '_gl')
+TRACKING_PREFIXES = ('utm_',)
+URL_CACHE_SIZE = 4096
+# Longer URLs (inline data: images and the like) are resolved but not cached
+URL_CACHE_MAX_LENGTH = 2048
+# javascript:, mailto: and data: hrefs have no path to take a name from
+_OPAQUE_URL_RE = re.compile(r'[a-zA-Z][a-zA-Z0-9+.-]*:(?!//)')
+
+def normalize_url(url):
+    """Lowercase the scheme and host, drop the fragment and tracking parameters"""
+    if '#' not in url and '?' not in url:
+        # Common case: only the scheme and host may need lowercasing
+        start = url.find('://')
+        if start < 0:
+            return url
+        end = url.find('/', start + 3)
+        origin = url[:end] if end > 0 else url
+        lowered = origin.lower()
+        return url if lowered == origin else lowered + url[len(origin):]
+    parsed = urlparse(url)
+    query = parsed.query
+    if query:
+        kept = []
+        for param in query.split('&'):
+            key = param.split('=', 1)[0].lower()
+            if key not in TRACKING_PARAMS and not key.startswith(TRACKING_PREFIXES):
+                kept.append(param)
+        query = '&'.join(kept)
+    return urlunparse((parsed.scheme.lower(), parsed.netloc.lower(), parsed.path, parsed.params, query, ''))
+
+class URLResolver:
+    """Bounded LRU cache of absolute, normalized URLs for one base URL
+
+    resolve(href) returns (url, name), name being the title-cased last path
+    segment of href that the parser falls back to for a link's user name;
+    hrefs with a scheme but no path, like javascript:, are passed through
+    with no name.
+    Cards on one page tend to repeat the same avatar placeholder and URL
+    prefixes, so most lookups are hits.
+    """
+    def __init__(self, base_url, maxsize=URL_CACHE_SIZE):
+        self.base_url = base_url
+        parsed = urlparse(base_url)
+        # Root-relative hrefs without dot segments are joined by concatenation
+        self._origin = f"{parsed.scheme.lower()}://{parsed.netloc.lower()}" if parsed.scheme else None
+        self._cached = functools.lru_cache(maxsize)(self._resolve)
+
+    def _resolve(self, href):
+        if _OPAQUE_URL_RE.match(href):
+            return href, None
+        slug = href.split('#', 1)[0].split('?', 1)[0].split('/')[-1].replace('-', ' ').replace('_', ' ')
+        if self._origin and href[:1] == '/' and href[1:2] != '/' and '/.' not in href:
+            url = self._origin + href
+            if '#' in href or '?' in href:
+                url = normalize_url(url)
+        else:
+            url = normalize_url(urljoin(self.base_url, href))
+        return url, slug.title() if slug.strip() else None
+
+    def resolve(self, href):
+        if len(href) > URL_CACHE_MAX_LENGTH:
+            return self._resolve(href)
+        return self._cached(href)
+
+    def cache_info(self):
+        return self._cached.cache_info()
+
+# Elements whose content never holds user cards. Scripts typed as JSON are
+# kept: single-page apps ship their user lists in them
+PRUNED_ELEMENTS = ('script', 'style', 'svg')
+# data: URIs with a shorter base64 payload are not worth cutting out
+DATA_URI_MIN_PAYLOAD = 512
+# Characters kept back at a chunk end, enough for a split '</script'
+PRUNE_CLOSE_TAIL = 8
+
+# Every region starts with '<', which lets the regex engine skip ahead to
+# candidates; data: URIs are found by their literal ';base64,' instead
+_PRUNE_START = r'<(?:(?P<comment>!--)|(?P<element>(?P<tag>(?i:script|style|svg))(?=[\s/>])(?P<attrs>[^>]*)>)'
+_PRUNE_START_RE = re.compile(_PRUNE_START + ')')
+_PRUNE_HEAD_RE = re.compile(_PRUNE_START + r'|(?P<body>(?i:body)(?=[\s/>])[^>]*>))')
+_PRUNE_BODY_RE = re.compile(_PRUNE_START + r'|(?P<body_end>/(?i:body)\s*>))')
+_DATA_URI_RE = re.compile(r'data:[a-z0-9.+/-]*(?:;[a-z0-9.=_+-]*)*;base64,(?=[a-z0-9+/=]{%d})'
+                          % DATA_URI_MIN_PAYLOAD, re.IGNORECASE)
+# Longest media type and parameters looked back over from ';base64,'
+DATA_URI_MAX_PREFIX = 256
+_PRUNE_CLOSE_RES = {tag: re.compile(f'</{tag}', re.IGNORECASE) for tag in PRUNED_ELEMENTS}
+_COMMENT_END_RE = re.compile('-->')
+_DATA_END_RE = re.compile(r'[^A-Za-z0-9+/=]')
+_NEVER_RE = re.compile(r'(?!)')
+_JSON_TYPE_RE = re.compile(r'''\btype\s*=\s*["']?[^"'\s>]*json''', re.IGNORECASE)
+# An image's own data: URI is its avatar, so its payload is kept
+_IMAGE_SRC_RE = re.compile(r'''\bsrc(?:set)?\s*=\s*["']?$''', re.IGNORECASE)
+
+class MarkupPruner:
+    """Cut the regions of a page that never hold user data before parsing
+
+    Removes the content of executable <script>, <style> and <svg> elements
+    (their tags stay, so the parser sees the same element structure) and
+    long base64 data: URI payloads outside image sources. Comments and
+    JSON scripts are passed through unscanned, so markup quoted inside
+    them is not mistaken for a region. With body_only, everything before
+    <body> and after </body> goes too; a page without a <body> tag is kept
+    whole, which means holding it back until close().
+
+    feed() returns the pruned text ready so far and close() the rest; a
+    region start split across two chunks is simply left in. source_offset()
+    maps an offset in the pruned text back to the original page.
+    """
+    def __init__(self, body_only=False):
+        self.body_only = body_only
+        self.regions = 0
+        self.removed = 0
+        self._reset()
+
+    def _reset(self):
+        self._buf = ''
+        self._base = 0
+        self._emitted = 0
+        self._state = None
+        self._in_head = self.body_only
+        self._head = []
+        self._marks = [0]
+        self._sources = [0]
+
+    def feed(self, data):
+        if self._in_head:
+            self._head.append(data)
+        self._buf += data
+        return self._process(False)
+
+    def close(self):
+        text = self._process(True)
+        if self._in_head:
+            # No <body> tag after all: prune the page as a whole
+            head = ''.join(self._head)
+            self.body_only = False
+            self.regions = self.removed = 0
+            self._reset()
+            self._buf = head
+            text = self._process(True)
+        if METRICS.enabled:
+            METRICS.incr('prune.regions', self.regions)
+            METRICS.incr('prune.removed_chars', self.removed)
+        return text
+
+    def iter_chunks(self, chunks):
+        """Prune an iterable of text chunks, yielding the text as it is ready"""
+        for chunk in chunks:
+            text = self.feed(chunk)
+            if text:
+                yield text
+        text = self.close()
+        if text:
+            yield text
+
+    def source_offset(self, offset):
+        """Offset in the original page of the character at offset in the pruned text"""
+        index = bisect.bisect_right(self._marks, offset) - 1
+        return self._sources[index] + offset - self._marks[index]
+
+    def _take(self, buf, start, end, out, keep=True):
+        if start >= end:
+            return
+        if keep and not self._in_head:
+            out.append(buf[start:end])
+            self._emitted += end - start
+            return
+        self.removed += end - start
+        if self._marks[-1] == self._emitted:
+            self._sources[-1] = self._base + end
+        else:
+            self._marks.append(self._emitted)
+            self._sources.append(self._base + end)
+
+    def _next_data_uri(self, buf, pos, b64, end):
+        """Return (data: URI prefix match or None, next ';base64,' to look at)
+
+        Only the ';base64,' occurrences from b64 up to end are considered.
+        """
+        while 0 <= b64 < end:
+            start = buf.rfind('data:', max(pos, b64 - DATA_URI_MAX_PREFIX), b64)
+            if start >= 0:
+                m = _DATA_URI_RE.match(buf, start)
+                if m is not None and m.end() == b64 + 8:
+                    return m, b64
+            b64 = buf.find(';base64,', b64 + 8)
+        return None, b64
+
+    def _process(self, final):
+        buf = self._buf
+        n = len(buf)
+        pos = 0
+        out = []
+        b64 = buf.find(';base64,')
+        while pos < n:
+            if self._state is not None:
+                kind, close = self._state
+                m = close.search(buf, pos)
+                if m is None:
+                    end = n if final or kind == 'data' else max(pos, n - PRUNE_CLOSE_TAIL)
+                    self._take(buf, pos, end, out, kind == 'keep')
+                    pos = end
+                    break
+                end = m.end() if close is _COMMENT_END_RE else m.start()
+                self._take(buf, pos, end, out, kind == 'keep')
+                pos = end
+                self._state = None
+                continue
+            
+            limit = n
+            if not final:
+                # Leave a tag cut by the chunk end for the next feed
+                lt = buf.rfind('<', pos)
+                if lt >= 0 and buf.find('>', lt) < 0:
+                    limit = lt
+            start_re = _PRUNE_HEAD_RE if self._in_head else _PRUNE_BODY_RE if self.body_only else _PRUNE_START_RE
+            m = start_re.search(buf, pos, limit)
+            if 0 <= b64 < pos:
+                b64 = buf.find(';base64,', pos)
+            if 0 <= b64 < (limit if m is None else m.start()):
+                data, b64 = self._next_data_uri(buf, pos, b64, limit if m is None else m.start())
+                if data is not None:
+                    m = data
+            if m is None:
+                self._take(buf, pos, limit, out)
+                pos = limit
+                break
+            group = 'data' if m.re is _DATA_URI_RE else m.lastgroup
+            if group == 'body':
+                # Everything before <body> goes, the tag itself stays
+                self._take(buf, pos, m.start(), out)
+                pos = m.start()
+                self._in_head = False
+                self._head = []
+            self._take(buf, pos, m.end(), out)
+            pos = m.end()
+            if group == 'element':
+                tag = m.group('tag').lower()
+                attrs = m.group('attrs')
+                if attrs.endswith('/'):
+                    continue
+                if tag == 'script' and _JSON_TYPE_RE.search(attrs):
+                    self._state = ('keep', _PRUNE_CLOSE_RES[tag])
+                else:
+                    self._state = ('skip', _PRUNE_CLOSE_RES[tag])
+                    self.regions += 1
+            elif group == 'comment':
+                self._state = ('keep', _COMMENT_END_RE)
+            elif group == 'data':
+                if not _IMAGE_SRC_RE.search(buf, max(0, m.start() - 16), m.start()):
+                    self._state = ('data', _DATA_END_RE)
+                    self.regions += 1
+            elif group == 'body_end':
+                self._state = ('skip', _NEVER_RE)
+                self.regions += 1
+        self._buf = buf[pos:]
+        self._base += pos
+        return ''.join(out)
+
+def prune_markup(text, body_only=False):
+    """Return (pruned text, MarkupPruner) for a whole page"""
+    pruner = MarkupPruner(body_only)
+    return pruner.feed(text) + pruner.close(), pruner
+
+# Elements that have no content and so never get an end tag
+VOID_ELEMENTS = frozenset(('area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta',
+                           'param', 'source', 'track', 'wbr'))
+# Elements whose end tag may be left out before a sibling: start tag ->
+# (open elements it ends, elements that bound the search). <li><p>Ann<li>
+# ends the first li, but a list nested inside it keeps its own items.
+_TABLE_SCOPE = frozenset(('table', 'thead', 'tbody', 'tfoot'))
+IMPLIED_END_SCOPES = {
+    'li': (frozenset(('li',)), frozenset(('ul', 'ol', 'menu'))),
+    'dt': (frozenset(('dt', 'dd')), frozenset(('dl',))),
+    'dd': (frozenset(('dt', 'dd')), frozenset(('dl',))),
+    'tr': (frozenset(('tr',)), _TABLE_SCOPE),
+    'td': (frozenset(('td', 'th')), _TABLE_SCOPE | {'tr'}),
+    'th': (frozenset(('td', 'th')), _TABLE_SCOPE | {'tr'}),
+    'option': (frozenset(('option',)), frozenset(('select', 'datalist', 'optgroup'))),
+    'p': (frozenset(('p',)), frozenset(('button', 'table', 'td', 'th', 'caption', 'object', 'template'))),
+}
+IMPLIED_END_ELEMENTS = frozenset(IMPLIED_END_SCOPES)
+# Elements that may start a card nested inside another card
+CARD_CONTAINERS = frozenset(('div', 'section', 'article', 'li', 'tr', 'ul', 'ol', 'table', 'tbody'))
+
+class HTMLParserBackend:
+    """Tokenize with the standard library's html.parser; always available
+
+    Backends drive a scraper's handle_starttag / handle_data /
+    handle_endtag callbacks from feed() and close(), so the extraction
+    logic is shared whichever tokenizer runs underneath.
+    """
+    name = 'html.parser'
+
+    def __init__(self, handler):
+        self.handler = handler
+        self._fed = 0
+        # For position(): offset of handler.rawdata[0], and the number and
+        # start offset of a line at or after it; only the unparsed text is kept
+        self._raw_base = 0
+        self._line = 1
+        self._line_start = 0
+
+    def _sync(self):
+        # Between feeds getpos() is the position of the first unparsed character
+        line, column = self.handler.getpos()
+        self._raw_base = self._fed - len(self.handler.rawdata)
+        self._line = line
+        self._line_start = self._raw_base - column
+
+    def feed(self, data):
+        self._sync()
+        self._fed += len(data)
+        HTMLParser.feed(self.handler, data)
+
+    def close(self):
+        self._sync()
+        HTMLParser.close(self.handler)
+
+    def position(self):
+        """Offset in the fed text of the tag being handled, or None if unknown"""
+        line, column = self.handler.getpos()
+        if line > self._line:
+            # Tags come in order, so the newlines are walked once per feed
+            raw = self.handler.rawdata
+            i = max(self._line_start - self._raw_base, 0)
+            for _ in range(line - self._line):
+                i = raw.index('\n', i) + 1
+            self._line = line
+            self._line_start = self._raw_base + i
+        return self._line_start + column
+
+class _LxmlTarget:
+    """lxml parser target forwarding events to the scraper callbacks
+
+    libxml2 splits a text node at entities and buffer boundaries while
+    html.parser hands it over whole, so text is joined until the next tag.
+    """
+    def __init__(self, handler):
+        self._starttag = handler.handle_starttag
+        self._endtag = handler.handle_endtag
+        self._data = handler.handle_data
+        self._text = []
+
+    def _flush(self):
+        text = self._text
+        self._data(text[0] if len(text) == 1 else ''.join(text))
+        text.clear()
+
+    def start(self, tag, attrib):
+        if self._text:
+            self._flush()
+        self._starttag(tag, attrib.items())
+
+    def end(self, tag):
+        if self._text:
+            self._flush()
+        self._endtag(tag)
+
+    def data(self, data):
+        self._text.append(data)
+
+    def close(self):
+        if self._text:
+            self._flush()
+
+class LxmlBackend(HTMLParserBackend):
+    """Tokenize with libxml2 through lxml's parser target interface
+
+    Several times faster than html.parser on large pages. libxml2 also
+    reports the html/head/body elements and end tags it implies; the
+    scraper's tag stack treats those like any other element. On broken
+    markup it builds a different tree from html.parser's, so records can
+    differ: a block element ends an open <p> (<p class=author>Name<div>
+    leaves the card empty), text either side of a stray end tag is one
+    string, and badly misnested markup can give cards in another order.
+    It is only used when asked for.
+    """
+    name = 'lxml'
+
+    def __init__(self, handler):
+        # Imported on first use so startup does not pay for it
+        from lxml import etree
+        super().__init__(handler)
+        self._parser = etree.HTMLParser(target=_LxmlTarget(handler), huge_tree=True)
+        self._fed = False
+
+    def feed(self, data):
+        if data:
+            self._parser.feed(data)
+            self._fed = True
+
+    def close(self):
+        # libxml2 refuses to close a parser that was never given any input
+        if self._fed:
+            self._parser.close()
+
+    def position(self):
+        # Parser targets are not told where an element starts
+        return None
+
+# name -> (backend class, module it needs); the first is the default
+PARSER_BACKENDS = {
+    'html.parser': (HTMLParserBackend, None),
+    'lxml': (LxmlBackend, 'lxml'),
+}
+
+def available_parser_backends():
+    """Names of the parser backends whose dependencies are installed"""
+    import importlib.util
+    return [name for name, (_, module) in PARSER_BACKENDS.items()
+            if module is None or importlib.util.find_spec(module) is not None]
+
+def get_parser_backend(name=None):
+    """Return the backend class for name, or the default one"""
+    if name is None:
+        name = available_parser_backends()[0]
+    elif name not in PARSER_BACKENDS:
+        raise ValueError(f"unknown parser backend {name!r}; expected one of {', '.join(PARSER_BACKENDS)}")
+    elif name not in available_parser_backends():
+        raise ValueError(f"parser backend {name!r} needs the {PARSER_BACKENDS[name][1]} package")
+    return PARSER_BACKENDS[name][0]
+
+def _default_parser_backend():
+    try:
+        return get_parser_backend(os.environ.get('DARKBOSS_PARSER') or None)
+    except ValueError as e:
+        log.warning("DARKBOSS_PARSER: %s", e)
+        return get_parser_backend()
+
+# Only looked up here; the module itself is imported by the first parse
+PARSER_BACKEND = _default_parser_backend()
+
+def enable_parser_backend(name=None):
+    """Parse with the named backend (default: html.parser)"""
+    global PARSER_BACKEND
+    PARSER_BACKEND = get_parser_backend(name)
+    return PARSER_BACKEND
+
 class AdvancedDarkBossScraper(HTMLParser):
-    def __init__(self, base_url):
+    """Collect user records from the cards of an HTML page
+
+    Open elements are kept on a stack, so a card ends at its own end tag
+    however deeply its content is nested. Stray end tags are ignored and
+    an end tag closes any elements left open inside it, which keeps the
+    work per tag amortized O(1). A start tag that implies the end of an
+    open sibling (li, tr, td, dd, ...) closes it, looking no further out
+    than the enclosing list or table. Inside a card only container elements
+    start a nested card; text and avatars go to the innermost open card.
+    Cards still open at the end of the document are closed by close().
+    The markup is tokenized by `backend` (default PARSER_BACKEND).
+    """
+    def __init__(self, base_url, rules=None, backend=None):
         super().__init__()
+        self.backend = (backend or PARSER_BACKEND)(self)
         self.base_url = base_url
         self.users = []
         self.current_data = {}
         self.in_user_card = False
         self.current_tag = None
-        self.current_classes = []
+        self._open = []
+        self._open_counts = {}
+        # (stack depth of the card element, its data, its offset) for each open card
+        self._cards = []
+        # selector -> number of cards it marked
+        self.card_selectors = {}
+        self.classifier = TagClassifier(rules)
+        self.urls = URLResolver(base_url)
+        self.tags_seen = 0
+        self.cards_detected = 0
+        self.records_kept = 0
+        self.records_dropped = 0
         
     def handle_starttag(self, tag, attrs):
         self.current_tag = tag
-        attrs_dict = dict(attrs)
-        self.current_classes = attrs_dict.get('class', '').split() if 'class' in attrs_dict else []
+        self.tags_seen += 1
+        classifier = self.classifier
         
-        # Multiple methods to detect user profile elements
-        user_indicators = [
-            # Class-based detection
-            any(cls in ['user', 'profile', 'member', 'user-card', 'user_info', 
-                       'profile-card', 'user-profile', 'user-item', 'user-block',
-                       'user-details', 'author', 'user-name', 'user-avatar'] for cls in self.current_classes),
+        if tag not in VOID_ELEMENTS:
+            open_tags = self._open
+            if tag in IMPLIED_END_ELEMENTS and open_tags:
+                self._implied_end(tag)
+            depth = len(open_tags)
+            open_tags.append(tag)
+            self._open_counts[tag] = self._open_counts.get(tag, 0) + 1
             
-            # ID-based detection
-            'id' in attrs_dict and any(x in attrs_dict['id'] for x in ['user', 'profile', 'member']),
-            
-            # Data attribute detection
-            any(attr[0].startswith('data-user') for attr in attrs if isinstance(attr, tuple)),
-        ]
+            # Multiple methods to detect user profile elements (class, id, data-user)
+            if (not self._cards or tag in CARD_CONTAINERS) and classifier.is_user_element(attrs):
+                self.current_data = {}
+                self._cards.append((depth, self.current_data, self.backend.position()))
+                self.in_user_card = True
+                self.cards_detected += 1
+                selector = classifier.card_selector(tag, attrs)
+                self.card_selectors[selector] = self.card_selectors.get(selector, 0) + 1
         
-        if any(user_indicators):
-            self.in_user_card = True
-            self.current_data = {}
+        # Only links and images carry extractable attributes
+        if tag != 'a' and tag != 'img':
+            return
+        attrs_dict = dict(attrs)
         
         # Extract user information from links
-        if tag == 'a' and 'href' in attrs_dict:
+        if tag == 'a' and attrs_dict.get('href') is not None:
             href = attrs_dict['href']
-            if any(x in href for x in ['/user/', '/profile/', '/member/', '/users/', '/author/']):
-                self.current_data['profile_url'] = urljoin(self.base_url, href)
-                if 'name' not in self.current_data:
-                    # Try to extract name from link text or URL
-                    if href.split('/')[-1].replace('-', ' ').replace('_', ' ').strip():
-                        self.current_data['name'] = href.split('/')[-1].replace('-', ' ').replace('_', ' ').title()
+            if classifier.is_profile_link(href):
+                url, name = self.urls.resolve(href)
+                self.current_data['profile_url'] = url
+                if 'name' not in self.current_data and name:
+                    # Fall back to a name taken from the URL
+                    self.current_data['name'] = name
         
         # Extract avatar from images
-        if tag == 'img' and 'src' in attrs_dict and self.in_user_card:
+        elif tag == 'img' and attrs_dict.get('src') is not None and self.in_user_card:
             src = attrs_dict['src']
-            if any(x in src for x in ['avatar', 'profile', 'user', 'gravatar']):
-                self.current_data['avatar'] = urljoin(self.base_url, src)
-            elif 'alt' in attrs_dict and any(x in attrs_dict['alt'].lower() for x in ['user', 'profile', 'avatar']):
-                self.current_data['avatar'] = urljoin(self.base_url, src)
+            if classifier.is_avatar(src, attrs_dict.get('alt')):
+                self.current_data['avatar'] = self.urls.resolve(src)[0]
     
     def handle_data(self, data):
         if self.in_user_card and data.strip():
@@ -87,163 +1066,2376 @@ class AdvancedDarkBossScraper(HTMLParser):
                     self.current_data['bio'] = data
     
     def handle_endtag(self, tag):
-        if tag in ['div', 'section', 'article', 'li', 'tr', 'ul', 'ol'] and self.in_user_card:
-            if self.current_data and len(self.current_data) > 1:  # At least 2 pieces of info
-                # Add some default values if missing
-                if 'name' not in self.current_data and 'username' in self.current_data:
-                    self.current_data['name'] = self.current_data['username']
+        open_tags = self._open
+        if open_tags and open_tags[-1] == tag:
+            # Well-formed markup: the end tag matches the innermost element
+            open_tags.pop()
+            self._open_counts[tag] -= 1
+            cards = self._cards
+            if cards and cards[-1][0] == len(open_tags):
+                self._end_card(*cards.pop()[1:])
+                self.current_data = cards[-1][1] if cards else {}
+                self.in_user_card = bool(cards)
+            return
+        if not self._open_counts.get(tag):
+            return
+        depth = len(open_tags) - 1
+        while open_tags[depth] != tag:
+            depth -= 1
+        self._pop_to(depth)
+
+    def _implied_end(self, tag):
+        """Close the sibling that a start tag of tag implicitly ends, if it is in scope"""
+        ends, scope = IMPLIED_END_SCOPES[tag]
+        counts = self._open_counts
+        if not any(counts.get(name) for name in ends):
+            return
+        open_tags = self._open
+        for depth in range(len(open_tags) - 1, -1, -1):
+            name = open_tags[depth]
+            if name in ends:
+                self._pop_to(depth)
+                return
+            if name in scope:
+                return
+
+    def _pop_to(self, depth):
+        """Close the open elements from depth up, ending any cards among them"""
+        open_tags = self._open
+        counts = self._open_counts
+        while len(open_tags) > depth:
+            counts[open_tags.pop()] -= 1
+        cards = self._cards
+        if not cards or cards[-1][0] < depth:
+            return
+        while cards and cards[-1][0] >= depth:
+            self._end_card(*cards.pop()[1:])
+        self.current_data = cards[-1][1] if cards else {}
+        self.in_user_card = bool(cards)
+
+    def _end_card(self, data, offset=None):
+        if len(data) > 1:  # At least 2 pieces of info
+            # Add some default values if missing
+            if 'name' not in data and 'username' in data:
+                data['name'] = data['username']
+            
+            user = UserRecord.from_dict(data, method='html')
+            user.offset = offset
+            self.users.append(user)
+            self.records_kept += 1
+        else:
+            self.records_dropped += 1
+
+    def feed(self, data):
+        self.backend.feed(data)
+
+    def close(self):
+        self.backend.close()
+        self._pop_to(0)
+        if METRICS.enabled:
+            METRICS.incr('parse.documents')
+            METRICS.incr(f'parse.backend.{self.backend.name}')
+            METRICS.incr('parse.tags_seen', self.tags_seen)
+            METRICS.incr('parse.cards_detected', self.cards_detected)
+            METRICS.incr('parse.records_kept', self.records_kept)
+            METRICS.incr('parse.records_dropped', self.records_dropped)
+            info = self.urls.cache_info()
+            METRICS.incr('parse.url_cache.hits', info.hits)
+            METRICS.incr('parse.url_cache.misses', info.misses)
+
+    def drain_users(self):
+        """Return the users collected so far and reset the list"""
+        users, self.users = self.users, []
+        return users
+
+    def feed_chunks(self, chunks):
+        """Feed an iterable of text chunks, yielding users as their card closes"""
+        carry = ''
+        for chunk in chunks:
+            chunk = carry + chunk
+            # Cut at the last '<' so a text node is never split across two feeds
+            cut = chunk.rfind('<')
+            if cut <= 0:
+                carry = chunk
+                continue
+            carry = chunk[cut:]
+            self.feed(chunk[:cut])
+            yield from self.drain_users()
+        self.feed(carry)
+        self.close()
+        yield from self.drain_users()
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1',
+}
+
+STREAM_CHUNK_SIZE = 64 * 1024
+REDIRECT_CODES = (301, 302, 303, 307, 308)
+MAX_REDIRECTS = 10
+
+def _proxy_for(scheme, host, proxies=None):
+    """Return (host, port, Proxy-Authorization value or None) of the proxy for a request
+
+    proxies maps schemes to proxy URLs as urllib.request.getproxies() does,
+    which is used when it is None (the *_proxy environment variables); hosts
+    matched by its 'no' entry go direct and None is returned. Only plain
+    http:// proxies are supported; others raise urllib.error.URLError.
+    """
+    import urllib.request
+    if proxies is None:
+        proxies = urllib.request.getproxies()
+    url = proxies.get(scheme)
+    if not url or urllib.request.proxy_bypass_environment(host, proxies):
+        return None
+    parsed = urlparse(url if '://' in url else 'http://' + url)
+    if parsed.scheme.lower() != 'http' or not parsed.hostname:
+        raise urllib.error.URLError(f"unsupported proxy {url!r} for {scheme}:// (only http:// proxies are supported)")
+    auth = None
+    if parsed.username is not None:
+        import base64
+        credentials = f"{urllib.parse.unquote(parsed.username)}:{urllib.parse.unquote(parsed.password or '')}"
+        auth = 'Basic ' + base64.b64encode(credentials.encode('utf-8')).decode('ascii')
+    return parsed.hostname, parsed.port or 80, auth
+
+# Headers that describe the wire encoding rather than the stored body
+CACHE_SKIP_HEADERS = ('content-encoding', 'content-length', 'transfer-encoding', 'connection', 'keep-alive')
+
+class CachedResponse:
+    """Response served from the disk cache"""
+    def __init__(self, url, body_path, headers):
+        self.url = url
+        self.status = 200
+        self.reason = 'OK'
+        self.headers = headers
+        self._file = open(body_path, 'rb')
+
+    def read(self, amt=None):
+        return self._file.read(-1 if amt is None else amt)
+
+    def getheader(self, name, default=None):
+        return self.headers.get(name, default)
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class _CachingResponse:
+    """Copies a live response into the cache as it is read"""
+    def __init__(self, cache, key, response, meta):
+        self._cache = cache
+        self._key = key
+        self._response = response
+        self._meta = meta
+        self._tmp_path = cache._path(key, '.tmp%d' % threading.get_ident())
+        self._tmp = open(self._tmp_path, 'wb')
+        self._complete = False
+        self.url = response.url
+        self.status = response.status
+        self.reason = response.reason
+        self.headers = response.headers
+
+    def read(self, amt=None):
+        data = self._response.read(amt)
+        if self._tmp is not None:
+            self._tmp.write(data)
+            if not data or amt is None or amt < 0:
+                self._complete = True
+        return data
+
+    def getheader(self, name, default=None):
+        return self.headers.get(name, default)
+
+    def close(self):
+        self._response.close()
+        if self._tmp is None:
+            return
+        self._tmp.close()
+        self._tmp = None
+        if self._complete:
+            self._cache._commit(self._key, self._tmp_path, self._meta)
+        else:
+            os.remove(self._tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class ResponseCache:
+    """Content-addressed on-disk HTTP cache with conditional revalidation
+
+    Entries are keyed by the SHA-256 of the URL. A fresh entry (younger than
+    ttl seconds) is served without touching the network. Older entries are
+    revalidated with If-None-Match / If-Modified-Since, so unchanged pages
+    come back as 304s. The least recently used entries are evicted once the
+    bodies exceed max_bytes.
+    """
+    def __init__(self, directory, ttl=3600, max_bytes=512 * 1024 * 1024):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.stats = {'hits': 0, 'revalidated': 0, 'misses': 0, 'stored': 0, 'evicted': 0}
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._index, self._total = self._load_index()
+
+    def _path(self, key, suffix):
+        return os.path.join(self.directory, key[:2], key + suffix)
+
+    def _load_index(self):
+        entries = []
+        for dirpath, _, names in os.walk(self.directory):
+            for name in names:
+                if name.endswith('.body'):
+                    st = os.stat(os.path.join(dirpath, name))
+                    entries.append((st.st_mtime, name[:-5], st.st_size))
+        entries.sort()
+        index = {key: size for _, key, size in entries}
+        return index, sum(index.values())
+
+    def _read_meta(self, key):
+        try:
+            with open(self._path(key, '.json'), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _touch(self, key):
+        # Body mtime is the LRU clock; dict order mirrors it in memory
+        with self._lock:
+            if key in self._index:
+                self._index[key] = self._index.pop(key)
+        try:
+            os.utime(self._path(key, '.body'))
+        except OSError:
+            pass
+
+    def _commit(self, key, tmp_path, meta):
+        body_path = self._path(key, '.body')
+        size = os.path.getsize(tmp_path)
+        with open(self._path(key, '.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, body_path)
+        with self._lock:
+            self._total += size - self._index.pop(key, 0)
+            self._index[key] = size
+            self.stats['stored'] += 1
+        self._evict()
+
+    def _evict(self):
+        while True:
+            with self._lock:
+                if self._total <= self.max_bytes or len(self._index) <= 1:
+                    return
+                key = next(iter(self._index))
+                self._total -= self._index.pop(key)
+                self.stats['evicted'] += 1
+            for suffix in ('.body', '.json'):
+                try:
+                    os.remove(self._path(key, suffix))
+                except OSError:
+                    pass
+
+    @staticmethod
+    def _headers(items):
+        headers = http.client.HTTPMessage()
+        for name, value in items:
+            headers[name] = value
+        return headers
+
+    def lookup(self, url):
+        """Return (key, meta) for url; meta is None when nothing is cached"""
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return key, (self._read_meta(key) if key in self._index else None)
+
+    def is_fresh(self, meta):
+        return time.time() - meta['stored_at'] < self.ttl
+
+    @staticmethod
+    def conditional_headers(meta, headers):
+        """Request headers that let the server answer 304 for meta"""
+        headers = dict(headers or {})
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+        return headers
+
+    def hit(self, key, meta):
+        """Serve a fresh entry"""
+        self.stats['hits'] += 1
+        return self._serve(key, meta)
+
+    def revalidated(self, key, meta):
+        """Serve an entry the server confirmed with a 304"""
+        self.stats['revalidated'] += 1
+        meta['stored_at'] = time.time()
+        with open(self._path(key, '.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        return self._serve(key, meta)
+
+    def new_meta(self, url, headers):
+        """Metadata for a fresh 200 response about to be stored"""
+        self.stats['misses'] += 1
+        return {
+            'url': url,
+            'stored_at': time.time(),
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+            'headers': [(k, v) for k, v in headers.items() if k.lower() not in CACHE_SKIP_HEADERS],
+        }
+
+    def store(self, key, meta, body):
+        """Store a complete body"""
+        os.makedirs(os.path.dirname(self._path(key, '')), exist_ok=True)
+        tmp_path = self._path(key, '.tmp%d' % threading.get_ident())
+        with open(tmp_path, 'wb') as f:
+            f.write(body)
+        self._commit(key, tmp_path, meta)
+
+    def read_body(self, key):
+        with open(self._path(key, '.body'), 'rb') as f:
+            return f.read()
+
+    def _serve(self, key, meta):
+        self._touch(key)
+        return CachedResponse(meta['url'], self._path(key, '.body'), self._headers(meta['headers']))
+
+    def open(self, url, opener, headers=None):
+        """Return a response for url, from the cache or from opener.open(url, headers)"""
+        key, meta = self.lookup(url)
+        if meta is not None:
+            if self.is_fresh(meta):
+                return self.hit(key, meta)
+            headers = self.conditional_headers(meta, headers)
+        
+        response = opener.open(url, headers)
+        if response.status == 304 and meta is not None:
+            response.read()
+            response.close()
+            return self.revalidated(key, meta)
+        if response.status != 200:
+            self.stats['misses'] += 1
+            return response
+        meta = self.new_meta(url, response.headers)
+        os.makedirs(os.path.dirname(self._path(key, '')), exist_ok=True)
+        return _CachingResponse(self, key, response, meta)
+
+    def summary(self):
+        s = self.stats
+        return (f"{s['hits']} hits, {s['revalidated']} revalidated (304), {s['misses']} misses, "
+                f"{s['stored']} stored, {s['evicted']} evicted, {self._total / 1048576:.1f} MB on disk")
+
+class FetchResult:
+    """Complete response returned by AsyncFetcher"""
+    __slots__ = ('url', 'status', 'headers', 'body', 'truncated')
+
+    def __init__(self, url, status, headers, body, truncated=False):
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.truncated = truncated
+
+    def text(self):
+        return decode_body(self.body, self.headers.get_content_charset())
+
+    def json(self):
+        """Parse a JSON body straight from bytes; json.loads detects UTF-8/16/32 itself"""
+        charset = known_charset(self.headers.get_content_charset())
+        if charset and not charset.startswith('utf'):
+            return json.loads(self.text())
+        return json.loads(self.body)
+
+class StreamedResponse:
+    """Response from AsyncFetcher.open whose body is read as it arrives
+
+    The host's connection slot stays taken until aclose(); a fully read
+    body hands the connection back for keep-alive. Bodies sent with gzip
+    or deflate Content-Encoding are decoded on the fly.
+    """
+    def __init__(self, fetcher, state, url, reader, writer, version, status, reason, headers):
+        self._fetcher = fetcher
+        self._state = state
+        self._reader = reader
+        self._writer = writer
+        self.url = url
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        length = headers.get('Content-Length')
+        self._chunked = 'chunked' in (headers.get('Transfer-Encoding') or '').lower()
+        self._chunk_left = 0
+        self._remaining = int(length) if length and length.strip().isdigit() and not self._chunked else None
+        self._done = status in (204, 304) or 100 <= status < 200
+        # Without a length the body runs to the end of the connection
+        self._reusable = ((self._done or self._chunked or self._remaining is not None) and version != 'HTTP/1.0'
+                          and (headers.get('Connection') or '').lower() != 'close')
+        encoding = (headers.get('Content-Encoding') or '').strip().lower()
+        if encoding in ('gzip', 'x-gzip'):
+            self._decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        elif encoding == 'deflate':
+            self._decoder = zlib.decompressobj()
+        else:
+            self._decoder = None
+
+    async def _read_raw(self, amt):
+        """Up to amt bytes of the body as sent, without transfer framing"""
+        if self._done:
+            return b''
+        reader = self._reader
+        if self._chunked:
+            if self._chunk_left == 0:
+                size = int((await reader.readline()).split(b';')[0].strip() or b'0', 16)
+                if size == 0:
+                    # Skip trailers up to the blank line
+                    while (await reader.readline()).strip():
+                        pass
+                    self._done = True
+                    return b''
+                self._chunk_left = size
+            data = await reader.read(min(amt, self._chunk_left))
+            if not data:
+                raise ConnectionResetError('connection closed inside a chunk')
+            self._chunk_left -= len(data)
+            if self._chunk_left == 0:
+                await reader.readline()
+            return data
+        if self._remaining is not None:
+            if self._remaining == 0:
+                self._done = True
+                return b''
+            data = await reader.read(min(amt, self._remaining))
+            if not data:
+                raise ConnectionResetError('connection closed before the end of the body')
+            self._remaining -= len(data)
+            return data
+        data = await reader.read(amt)
+        if not data:
+            self._done = True
+        return data
+
+    async def read(self, amt=None):
+        """Return up to amt decoded body bytes, or all that is left; b'' at the end"""
+        if amt is None or amt < 0:
+            parts = []
+            while True:
+                data = await self.read(STREAM_CHUNK_SIZE)
+                if not data:
+                    return b''.join(parts)
+                parts.append(data)
+        while True:
+            try:
+                raw = await asyncio.wait_for(self._read_raw(amt), self._fetcher.timeout)
+            except (ConnectionError, asyncio.IncompleteReadError, asyncio.TimeoutError) as e:
+                self._reusable = False
+                raise urllib.error.URLError(e if str(e) else f"timed out reading {self.url}")
+            except BaseException:
+                self._reusable = False
+                raise
+            METRICS.incr('fetch.bytes_downloaded', len(raw))
+            if self._decoder is None:
+                return raw
+            if not raw:
+                return self._decoder.flush()
+            data = self._decoder.decompress(raw)
+            if data:
+                return data
+
+    def getheader(self, name, default=None):
+        return self.headers.get(name, default)
+
+    async def aclose(self):
+        if self._writer is None:
+            return
+        writer, self._writer = self._writer, None
+        if self._done and self._reusable:
+            self._state.idle.append((self._reader, writer, time.monotonic()))
+        else:
+            writer.close()
+        self._state.semaphore.release()
+
+class _BlockingResponse:
+    """Synchronous view of a StreamedResponse, driven on the shared event loop"""
+    def __init__(self, opener, response):
+        self._opener = opener
+        self._response = response
+        self.url = response.url
+        self.status = response.status
+        self.reason = response.reason
+        self.headers = response.headers
+
+    def read(self, amt=None):
+        return self._opener._run(self._response.read(amt))
+
+    def getheader(self, name, default=None):
+        return self.headers.get(name, default)
+
+    def close(self):
+        run_async(self._response.aclose())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class BlockingOpener:
+    """open(url, headers) for synchronous callers, through an AsyncFetcher
+
+    Responses are read as they arrive, so a page can be parsed while it
+    downloads with the fetcher's robots.txt, delay, connection and proxy
+    rules. Also serves as the network side of ResponseCache.open. Past the
+    time.monotonic() deadline, opening and reading raise TimeoutError.
+    """
+    def __init__(self, fetcher, deadline=None):
+        self.fetcher = fetcher
+        self.deadline = deadline
+
+    def _run(self, coro):
+        if self.deadline is not None:
+            coro = asyncio.wait_for(coro, max(0.0, self.deadline - time.monotonic()))
+        return run_async(coro)
+
+    def open(self, url, headers=None):
+        return _BlockingResponse(self, self._run(self.fetcher.open(url, headers)))
+
+class _HostState:
+    """Politeness bookkeeping for one host"""
+    def __init__(self, max_connections):
+        self.semaphore = asyncio.Semaphore(max_connections)
+        self.lock = asyncio.Lock()
+        self.crawl_delay = 0.0
+        self.next_request = 0.0
+        self.robots = None
+        self.robots_ready = None
+        self.proxy = None
+        self.idle = []
+
+class AsyncFetcher:
+    """Asyncio HTTP fetch engine with per-host politeness limits
+
+    At most max_per_host requests run against one host at a time, requests
+    to a host start at least min_delay seconds apart (or the robots.txt
+    Crawl-delay, if larger) and URLs disallowed by robots.txt are refused.
+    Keep-alive connections are reused per host until they have been idle
+    for idle_timeout seconds; a request whose reused connection turns out
+    to be dead is retried once on a new one. Requests go through the
+    proxy given for their scheme in proxies (by default the *_proxy
+    environment variables): https through a CONNECT tunnel, http by sending
+    the absolute URL to the proxy.
+    """
+    def __init__(self, max_per_host=2, min_delay=0.25, respect_robots=True, timeout=15,
+                 headers=None, context=None, cache=None, proxies=None, idle_timeout=30):
+        self.max_per_host = max_per_host
+        self.min_delay = min_delay
+        self.idle_timeout = idle_timeout
+        self.respect_robots = respect_robots
+        self.timeout = timeout
+        self.headers = dict(headers or DEFAULT_HEADERS)
+        self.headers.setdefault('Accept-Encoding', 'gzip, deflate')
+        # Bypass SSL verification (for educational purposes)
+        self.context = context or ssl._create_unverified_context()
+        self.cache = cache
+        self.proxies = proxies
+        self.requests_sent = 0
+        self._hosts = {}
+
+    def _host(self, key):
+        state = self._hosts.get(key)
+        if state is None:
+            proxy = _proxy_for(key[0], key[1], self.proxies)
+            state = self._hosts[key] = _HostState(self.max_per_host)
+            state.proxy = proxy
+        return state
+
+    async def _wait_turn(self, state):
+        async with state.lock:
+            now = time.monotonic()
+            if state.next_request > now:
+                await asyncio.sleep(state.next_request - now)
+                now = time.monotonic()
+            state.next_request = now + max(self.min_delay, state.crawl_delay)
+
+    async def _connect(self, key, state, fresh=False):
+        now = time.monotonic()
+        while state.idle and not fresh:
+            reader, writer, released = state.idle.pop()
+            if now - released < self.idle_timeout and not writer.is_closing() and not reader.at_eof():
+                return reader, writer, True
+            writer.close()
+        scheme, host, port = key
+        address_host, address_port = (state.proxy[0], state.proxy[1]) if state.proxy else (host, port)
+        with METRICS.timer('fetch.dns'):
+            addresses = await asyncio.get_running_loop().getaddrinfo(address_host, address_port,
+                                                                     type=socket.SOCK_STREAM)
+        error = None
+        for *_, address in addresses:
+            try:
+                with METRICS.timer('fetch.connect'):
+                    reader, writer = await asyncio.open_connection(address[0], address[1])
+                break
+            except OSError as e:
+                error = e
+        else:
+            raise error or OSError(f"could not resolve {address_host}")
+        if scheme == 'https' and state.proxy:
+            try:
+                await self._tunnel(reader, writer, host, port, state.proxy[2])
+            except BaseException:
+                writer.close()
+                raise
+        if scheme == 'https':
+            try:
+                with METRICS.timer('fetch.tls'):
+                    await writer.start_tls(self.context, server_hostname=host)
+            except BaseException:
+                writer.close()
+                raise
+        METRICS.incr('fetch.connections_opened')
+        return reader, writer, False
+
+    async def _tunnel(self, reader, writer, host, port, auth):
+        """Ask the proxy on the other end of writer for a tunnel to host:port"""
+        lines = [f"CONNECT {host}:{port} HTTP/1.1", f"Host: {host}:{port}"]
+        if auth:
+            lines.append(f"Proxy-Authorization: {auth}")
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+        await writer.drain()
+        status_line = (await reader.readline()).decode('latin-1').rstrip('\r\n')
+        while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+            pass
+        parts = status_line.split(' ', 2)
+        if len(parts) < 2 or parts[1] != '200':
+            raise OSError(f"proxy refused tunnel to {host}:{port}: {status_line or 'no response'}")
+
+    async def _read_body(self, reader, headers, status, max_bytes=None):
+        """Return (body, reusable); a body cut at max_bytes is never reusable"""
+        if status in (204, 304) or 100 <= status < 200:
+            return b'', True
+        if 'chunked' in (headers.get('Transfer-Encoding') or '').lower():
+            parts = []
+            total = 0
+            while True:
+                size = int((await reader.readline()).split(b';')[0].strip() or b'0', 16)
+                if size == 0:
+                    # Skip trailers up to the blank line
+                    while (await reader.readline()).strip():
+                        pass
+                    return b''.join(parts), True
+                if max_bytes is not None and total + size > max_bytes:
+                    parts.append(await reader.readexactly(max_bytes - total))
+                    return b''.join(parts), False
+                parts.append(await reader.readexactly(size))
+                total += size
+                await reader.readline()
+        length = headers.get('Content-Length')
+        if length is not None:
+            length = int(length)
+            if max_bytes is not None and length > max_bytes:
+                return await reader.readexactly(max_bytes), False
+            return await reader.readexactly(length), True
+        if max_bytes is None:
+            return await reader.read(), False
+        parts = []
+        total = 0
+        while total < max_bytes:
+            data = await reader.read(max_bytes - total)
+            if not data:
+                break
+            parts.append(data)
+            total += len(data)
+        return b''.join(parts), False
+
+    async def _start(self, key, state, path, headers, fresh=False):
+        """Send a GET and read the response head
+
+        Returns (reader, writer, HTTP version, status, reason, headers).
+        """
+        reader, writer, reused = await self._connect(key, state, fresh)
+        host = key[1] if key[2] in (80, 443) else f"{key[1]}:{key[2]}"
+        if state.proxy and key[0] == 'http':
+            # A plain proxy is sent the whole URL
+            lines = [f"GET http://{host}{path} HTTP/1.1", f"Host: {host}"]
+            if state.proxy[2]:
+                lines.append(f"Proxy-Authorization: {state.proxy[2]}")
+        else:
+            lines = [f"GET {path} HTTP/1.1", f"Host: {host}"]
+        lines.extend(f"{name}: {value}" for name, value in headers.items())
+        try:
+            started = time.perf_counter()
+            writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+            await writer.drain()
+            status_line = await reader.readline()
+            METRICS.observe('fetch.first_byte', time.perf_counter() - started)
+            if not status_line:
+                raise ConnectionResetError('connection closed before response')
+            version, status, reason = (status_line.decode('latin-1').rstrip('\r\n').split(' ', 2) + [''])[:3]
+            head = bytearray()
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                head += line
+            response_headers = http.client.parse_headers(io.BytesIO(bytes(head) + b'\r\n'))
+        except (ConnectionError, asyncio.IncompleteReadError) as e:
+            writer.close()
+            if reused:
+                # The server dropped an idle keep-alive socket; retry once on a new one
+                METRICS.incr('fetch.stale_connections')
+                return await self._start(key, state, path, headers, fresh=True)
+            raise urllib.error.URLError(e)
+        except BaseException:
+            writer.close()
+            raise
+        return reader, writer, version, int(status), reason, response_headers
+
+    async def _exchange(self, key, state, path, headers, max_bytes=None):
+        reader, writer, version, status, reason, response_headers = await self._start(key, state, path, headers)
+        try:
+            with METRICS.timer('fetch.download'):
+                body, reusable = await self._read_body(reader, response_headers, status, max_bytes)
+            METRICS.incr('fetch.bytes_downloaded', len(body))
+        except (ConnectionError, asyncio.IncompleteReadError) as e:
+            writer.close()
+            raise urllib.error.URLError(e)
+        except BaseException:
+            writer.close()
+            raise
+        
+        if reusable and (response_headers.get('Connection') or '').lower() != 'close' and version != 'HTTP/1.0':
+            state.idle.append((reader, writer, time.monotonic()))
+        else:
+            writer.close()
+        
+        truncated = not reusable and max_bytes is not None and len(body) >= max_bytes
+        encoding = (response_headers.get('Content-Encoding') or '').strip().lower()
+        if encoding in ('gzip', 'x-gzip', 'deflate'):
+            # decompressobj copes with a body cut short by max_bytes
+            decoder = zlib.decompressobj(16 + zlib.MAX_WBITS if encoding != 'deflate' else zlib.MAX_WBITS)
+            body = decoder.decompress(body)
+        return status, reason, response_headers, body, truncated
+
+    async def _request(self, url, headers, max_bytes=None, stream=False):
+        """One GET; a StreamedResponse with stream=True, else (status, reason, headers, body, truncated)"""
+        parsed = urlparse(url)
+        scheme = parsed.scheme.lower()
+        if scheme not in ('http', 'https'):
+            raise urllib.error.URLError(f"unsupported scheme {parsed.scheme!r}")
+        key = (scheme, parsed.hostname, parsed.port or (443 if scheme == 'https' else 80))
+        state = self._host(key)
+        path = parsed.path or '/'
+        if parsed.query:
+            path += '?' + parsed.query
+        
+        if self.respect_robots and path != '/robots.txt':
+            robots = await self._robots(key, state)
+            if robots is not None and not robots.can_fetch(self.headers.get('User-Agent', '*'), url):
+                raise urllib.error.URLError("disallowed by robots.txt")
+        
+        await state.semaphore.acquire()
+        response = None
+        try:
+            await self._wait_turn(state)
+            self.requests_sent += 1
+            METRICS.incr('fetch.requests')
+            if stream:
+                head = await asyncio.wait_for(self._start(key, state, path, headers), self.timeout)
+                # The response gives the connection slot back when closed
+                response = StreamedResponse(self, state, url, *head)
+                return response
+            return await asyncio.wait_for(self._exchange(key, state, path, headers, max_bytes), self.timeout)
+        except (OSError, asyncio.TimeoutError, ValueError, http.client.HTTPException) as e:
+            METRICS.incr('fetch.errors')
+            if isinstance(e, urllib.error.URLError):
+                raise
+            raise urllib.error.URLError(e)
+        finally:
+            if response is None:
+                state.semaphore.release()
+
+    async def _robots(self, key, state):
+        if state.robots_ready is None:
+            # Loaded in a task of its own: the request that started it may be
+            # cancelled, and every other request to the host waits on it
+            state.robots_ready = asyncio.ensure_future(self._load_robots(key, state))
+        await asyncio.shield(state.robots_ready)
+        return state.robots
+
+    async def _load_robots(self, key, state):
+        robots = None
+        scheme, host, port = key
+        try:
+            status, _, _, body, _ = await self._request(f"{scheme}://{host}:{port}/robots.txt", self.headers)
+            if status == 200:
+                import urllib.robotparser
+                robots = urllib.robotparser.RobotFileParser()
+                robots.parse(body.decode('utf-8', errors='ignore').splitlines())
+                delay = robots.crawl_delay(self.headers.get('User-Agent', '*'))
+                if delay:
+                    state.crawl_delay = float(delay)
+        except Exception:
+            # No usable robots.txt: everything is allowed
+            pass
+        state.robots = robots
+
+    async def open(self, url, headers=None):
+        """GET url following redirects and return a StreamedResponse once its head is in
+
+        Raises urllib.error.HTTPError on 4xx/5xx; a 304 is returned. The
+        caller must aclose() the response.
+        """
+        headers = headers or self.headers
+        location = url
+        for _ in range(MAX_REDIRECTS + 1):
+            response = await self._request(location, headers, stream=True)
+            if response.status in REDIRECT_CODES and response.headers.get('Location'):
+                await response.aclose()
+                location = urljoin(location, response.headers['Location'])
+                continue
+            break
+        else:
+            raise urllib.error.URLError(f"too many redirects: {url}")
+        if response.status >= 400:
+            await response.aclose()
+            raise urllib.error.HTTPError(location, response.status, response.reason, response.headers, None)
+        response.url = location
+        return response
+
+    async def fetch(self, url, max_bytes=None):
+        """GET url following redirects; raises urllib.error.HTTPError on 4xx/5xx
+
+        With max_bytes the body is cut after that many (wire) bytes and the
+        result is marked truncated.
+        """
+        key = meta = None
+        headers = self.headers
+        if self.cache is not None:
+            key, meta = self.cache.lookup(url)
+            if meta is not None:
+                if self.cache.is_fresh(meta):
+                    self.cache.hit(key, meta).close()
+                    return FetchResult(url, 200, self.cache._headers(meta['headers']), self.cache.read_body(key))
+                headers = self.cache.conditional_headers(meta, headers)
+        
+        location = url
+        for _ in range(MAX_REDIRECTS + 1):
+            status, reason, response_headers, body, truncated = await self._request(location, headers, max_bytes)
+            if status in REDIRECT_CODES and response_headers.get('Location'):
+                location = urljoin(location, response_headers['Location'])
+                continue
+            break
+        else:
+            raise urllib.error.URLError(f"too many redirects: {url}")
+        
+        if status == 304 and meta is not None:
+            self.cache.revalidated(key, meta).close()
+            return FetchResult(url, 200, self.cache._headers(meta['headers']), self.cache.read_body(key))
+        if self.cache is not None:
+            if status == 200 and not truncated:
+                self.cache.store(key, self.cache.new_meta(url, response_headers), body)
+            else:
+                # Errors and cut bodies are not kept
+                self.cache.stats['misses'] += 1
+        if status >= 400:
+            raise urllib.error.HTTPError(location, status, reason, response_headers, None)
+        return FetchResult(location, status, response_headers, body, truncated)
+
+    async def fetch_many(self, urls):
+        """Fetch urls concurrently; failed entries hold the exception"""
+        return await asyncio.gather(*(self.fetch(url) for url in urls), return_exceptions=True)
+
+    async def aclose(self):
+        for state in self._hosts.values():
+            while state.idle:
+                state.idle.pop()[1].close()
+
+_ASYNC_LOOP = None
+_ASYNC_LOOP_LOCK = threading.Lock()
+
+def _async_loop():
+    """Shared background event loop, started on first use
+
+    Keeping one loop alive lets keep-alive connections survive between the
+    synchronous wrappers.
+    """
+    global _ASYNC_LOOP
+    with _ASYNC_LOOP_LOCK:
+        if _ASYNC_LOOP is None:
+            _ASYNC_LOOP = asyncio.new_event_loop()
+            threading.Thread(target=_ASYNC_LOOP.run_forever, name='darkboss-fetch', daemon=True).start()
+    return _ASYNC_LOOP
+
+def run_async(coro):
+    """Run a coroutine on the shared background event loop and wait for it"""
+    return asyncio.run_coroutine_threadsafe(coro, _async_loop()).result()
+
+def iter_fetch_results(urls, fetcher=None, deadline=None, window=None):
+    """Fetch urls concurrently, yielding (url, result or exception) in order
+
+    urls may be any iterable; with a window, at most that many requests are
+    in flight and the next URL is only taken once a result has been handed
+    out. Closing the generator early cancels the requests still in flight.
+    Past the time.monotonic() deadline, waiting results come back as
+    TimeoutError.
+    """
+    fetcher = fetcher or HTTP_FETCHER
+    loop = _async_loop()
+    urls = iter(urls)
+    pending = []
+    
+    def submit(count):
+        for url in itertools.islice(urls, count):
+            pending.append((url, asyncio.run_coroutine_threadsafe(fetcher.fetch(url), loop)))
+    
+    submit(window)
+    try:
+        while pending:
+            url, future = pending.pop(0)
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                result = future.result(timeout)
+            except concurrent.futures.TimeoutError:
+                result = TimeoutError(f"deadline passed waiting for {url}")
+            except Exception as e:
+                result = e
+            yield url, result
+            if window:
+                submit(window - len(pending))
+    finally:
+        for _, future in pending:
+            future.cancel()
+
+HTTP_FETCHER = AsyncFetcher()
+HTTP_CACHE = None
+DEFAULT_CACHE_DIR = '.darkboss_cache'
+
+def enable_cache(directory=DEFAULT_CACHE_DIR, ttl=3600, max_bytes=512 * 1024 * 1024):
+    """Route downloads through an on-disk response cache"""
+    global HTTP_CACHE
+    HTTP_CACHE = HTTP_FETCHER.cache = ResponseCache(directory, ttl, max_bytes)
+    return HTTP_CACHE
+
+def _open_url(url, deadline=None):
+    """Open a URL for streaming through the shared fetcher"""
+    opener = BlockingOpener(HTTP_FETCHER, deadline)
+    if HTTP_CACHE is not None:
+        return HTTP_CACHE.open(url, opener, HTTP_FETCHER.headers)
+    return opener.open(url, HTTP_FETCHER.headers)
+
+def _report_fetch_error(url, e):
+    """Log a readable message for a failed download"""
+    if isinstance(e, urllib.error.HTTPError):
+        if e.code == 404:
+            fetch_log.warning("Page not found (404): %s", url)
+        else:
+            fetch_log.warning("HTTP Error %s: %s", e.code, url)
+    elif isinstance(e.reason if isinstance(e, urllib.error.URLError) else e, (TimeoutError, asyncio.TimeoutError)):
+        # Timeouts carry no message of their own
+        fetch_log.warning("Timed out: %s", url)
+    elif isinstance(e, urllib.error.URLError):
+        fetch_log.warning("URL Error: %s - %s", e.reason, url)
+    else:
+        fetch_log.warning("Error accessing %s: %s", url, e or type(e).__name__)
+
+# Charset resolution follows the browser order: a byte order mark wins,
+# then the Content-Type header, then a <meta> declaration near the top of
+# the page. Undeclared pages are tried as UTF-8 and fall back to cp1252.
+CHARSET_SNIFF_BYTES = 4096
+FALLBACK_CHARSET = 'cp1252'
+BYTE_ORDER_MARKS = (
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+# Labels browsers decode as windows-1252, since pages that say so usually are
+CHARSET_ALIASES = {'iso-8859-1': 'cp1252', 'iso8859-1': 'cp1252', 'latin1': 'cp1252',
+                   'latin-1': 'cp1252', 'ascii': 'cp1252', 'us-ascii': 'cp1252'}
+META_CHARSET_RE = re.compile(rb'<meta[^>]*?charset\s*=\s*["\']?\s*([A-Za-z0-9_.:-]+)', re.IGNORECASE)
+
+def known_charset(label):
+    """Python codec name for a charset label, or None if it is unknown"""
+    if not label:
+        return None
+    label = label.strip().strip('"\'').lower()
+    try:
+        return codecs.lookup(CHARSET_ALIASES.get(label, label)).name
+    except LookupError:
+        return None
+
+def sniff_charset(data, declared=None):
+    """Charset of a body (bytes or memoryview) from its BOM, the declared header charset or <meta>
+
+    Returns None when nothing usable is declared.
+    """
+    for bom, charset in BYTE_ORDER_MARKS:
+        if data[:len(bom)] == bom:
+            return charset
+    charset = known_charset(declared)
+    if charset:
+        return charset
+    match = META_CHARSET_RE.search(data[:CHARSET_SNIFF_BYTES])
+    if match:
+        charset = known_charset(match.group(1).decode('ascii'))
+        # A page whose <meta> can be read as ASCII is not UTF-16/32
+        if charset and charset.startswith(('utf-16', 'utf-32')):
+            return 'utf-8'
+        return charset
+    return None
+
+def decode_body(data, declared=None):
+    """Decode a response body (bytes or memoryview) without an intermediate copy"""
+    charset = sniff_charset(data, declared)
+    if charset is None:
+        try:
+            return str(data, 'utf-8')
+        except UnicodeDecodeError:
+            charset = FALLBACK_CHARSET
+    return str(data, charset, 'replace')
+
+def response_charset(response, first_chunk=b''):
+    """Charset for a streamed response, judged from its headers and first chunk"""
+    charset = sniff_charset(first_chunk, response.headers.get_content_charset())
+    if charset is None:
+        try:
+            codecs.getincrementaldecoder('utf-8')().decode(first_chunk)
+            charset = 'utf-8'
+        except UnicodeDecodeError:
+            charset = FALLBACK_CHARSET
+    return charset
+
+def iter_decoded(response, chunk_size=STREAM_CHUNK_SIZE, budget=None):
+    """Read an open response as decoded text chunks, stopping early if budget runs out"""
+    chunk = response.read(chunk_size)
+    # Reads can come back short; judge the charset on a full sniff window
+    while chunk and len(chunk) < CHARSET_SNIFF_BYTES:
+        more = response.read(chunk_size)
+        if not more:
+            break
+        chunk += more
+    decoder = codecs.getincrementaldecoder(response_charset(response, chunk))(errors='replace')
+    while chunk:
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+        if budget is not None and not budget.consume(len(chunk)):
+            return
+        chunk = response.read(chunk_size)
+    text = decoder.decode(b'', final=True)
+    if text:
+        yield text
+
+def iter_web_content(url, chunk_size=STREAM_CHUNK_SIZE, budget=None):
+    """Download content from URL as a stream of decoded text chunks
+
+    With a StageBudget the download stops once its bytes or time run out.
+    """
+    try:
+        with _open_url(url, budget.deadline if budget is not None else None) as response:
+            yield from iter_decoded(response, chunk_size, budget)
+    except Exception as e:
+        if budget is not None and budget.deadline is not None and isinstance(e, (TimeoutError, asyncio.TimeoutError)):
+            # The opener gave up at the budget's deadline
+            budget.exhausted = 'time'
+        else:
+            _report_fetch_error(url, e)
+    if budget is not None and budget.exhausted:
+        fetch_log.warning("Page cut at the %s budget: %s", budget.exhausted, url)
+
+def stream_users_from_website(url, chunk_size=STREAM_CHUNK_SIZE, rules=None, keep_text=None,
+                              prune=True, body_only=False, budget=None):
+    """Parse a page while it downloads, yielding users as each card closes
+
+    If keep_text is a list, downloaded chunks are appended to it until the
+    first user is found, so callers can still run the regex fallback.
+    The chunks go through a MarkupPruner unless prune is False. budget
+    bounds the download as in iter_web_content.
+    """
+    found = []
+    
+    def tee(chunks):
+        for chunk in chunks:
+            if not found:
+                keep_text.append(chunk)
+            yield chunk
+    
+    chunks = iter_web_content(url, chunk_size, budget)
+    if keep_text is not None:
+        chunks = tee(chunks)
+    pruner = MarkupPruner(body_only) if prune else None
+    if pruner is not None:
+        chunks = pruner.iter_chunks(chunks)
+    parser = AdvancedDarkBossScraper(url, rules)
+    for user in parser.feed_chunks(chunks):
+        if pruner is not None and user.offset is not None:
+            user.offset = pruner.source_offset(user.offset)
+        if not found:
+            found.append(True)
+            if keep_text is not None:
+                keep_text.clear()
+        yield user
+
+def get_web_content(url):
+    """Download content from URL with better error handling"""
+    try:
+        return run_async(HTTP_FETCHER.fetch(url)).text()
+    except Exception as e:
+        _report_fetch_error(url, e)
+        return None
+
+SOCIAL_DOMAINS = ('facebook', 'twitter', 'instagram', 'linkedin')
+
+class PatternRegistry:
+    """Ordered set of precompiled fallback regex patterns
+
+    Each pattern is registered under a kind (email, social, name, ...),
+    compiled once, and scanned with its own finditer pass in registration
+    order; the patterns are not joined into one alternation. Matches that
+    overlap a match of another pattern (an email inside a profile URL, two
+    class patterns on the same tag) are therefore all found, grouped by
+    pattern, as with one re.findall per pattern. The value taken from a match is `group`, or by default the
+    second group when the pattern has several, the first when it has one,
+    and the whole match otherwise.
+    """
+    def __init__(self, flags=re.IGNORECASE):
+        self.flags = flags
+        self._entries = []
+
+    def register(self, kind, pattern, group=None, run=None):
+        """Add a pattern; raises re.error if it does not compile
+
+        run is an optional character class for patterns whose matches
+        start with a run of those characters and that match from any
+        position inside a run if they match from its first one (an email's
+        local part). The scan then only tries the first character of each
+        run, and the position where the previous match ended.
+        """
+        compiled = re.compile(pattern, self.flags)
+        if group is None:
+            group = 2 if compiled.groups > 1 else compiled.groups
+        skip = None
+        if run is not None:
+            skip = (re.compile(f'(?<!{run}){pattern}', self.flags), re.compile(f'(?<={run}){run}', self.flags))
+        self._entries.append((kind, compiled, group, skip))
+
+    def unregister(self, kind):
+        """Remove every pattern registered under kind"""
+        self._entries = [e for e in self._entries if e[0] != kind]
+
+    def kinds(self):
+        return [e[0] for e in self._entries]
+
+    def iter_matches(self, content):
+        """Yield (kind, value) for every match, grouped by pattern"""
+        for kind, value, _ in self.iter_located(content):
+            yield kind, value
+
+    def iter_located(self, content):
+        """Yield (kind, value, start offset of the match), grouped by pattern"""
+        for kind, compiled, group, skip in self._entries:
+            if skip is None:
+                for m in compiled.finditer(content):
+                    yield kind, m.group(group), m.start()
+                continue
+            run_start, inside_run = skip
+            pos = 0
+            while True:
+                # A previous match may have ended inside a run
+                m = compiled.match(content, pos) if pos and inside_run.match(content, pos) else None
+                m = m or run_start.search(content, pos)
+                if m is None:
+                    break
+                yield kind, m.group(group), m.start()
+                pos = m.end()
+
+USER_PATTERNS = PatternRegistry()
+# Social media profiles
+USER_PATTERNS.register('social', r'https?://(?:www\.)?(facebook|twitter|instagram|linkedin)\.com/[a-zA-Z0-9_\-\.]+')
+# Email patterns
+USER_PATTERNS.register('email', r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}', run=r'[a-zA-Z0-9._%+-]')
+# Name patterns in HTML
+USER_PATTERNS.register('name', r'class="[^"]*(name|user-name|profile-name|author-name)[^"]*"[^>]*>([^<]+)<')
+# Username patterns
+USER_PATTERNS.register('username', r'class="[^"]*(username|user-login|profile-username)[^"]*"[^>]*>([^<]+)<')
+
+def _user_from_match(match):
+    """Build a user record from a matched value"""
+    if '@' in match and '.' in match:
+        return UserRecord(email=match, name=match.split('@')[0], method='regex')
+    if any(domain in match for domain in SOCIAL_DOMAINS):
+        return UserRecord(social=match, name=match.split('/')[-1].replace('-', ' ').title(), method='regex')
+    return UserRecord(name=match.strip(), method='regex')
+
+def iter_users_from_patterns(content, base_url, registry=None, offset=0):
+    """Lazily extract users from regex matches
+
+    Each record's offset is where its match starts, plus offset (the
+    position of content within a larger page).
+    """
+    for _, match, start in (registry or USER_PATTERNS).iter_located(content):
+        user = _user_from_match(match)
+        user.offset = offset + start
+        yield user
+
+def extract_users_from_patterns(content, base_url, registry=None):
+    """Extract users using regex patterns as fallback"""
+    return list(iter_users_from_patterns(content, base_url, registry))
+
+def scrape_users_from_website(url, stream=False, pipeline=None):
+    """Extract user information from website using multiple methods
+
+    The methods are the stages of an ExtractionPipeline (HTML parsing,
+    regex patterns, common endpoints). With stream=True the first stage
+    parses the page while it downloads instead of reading it first.
+    """
+    extract_log.info("Collecting data from %s...", url)
+    pipeline = pipeline or ExtractionPipeline()
+    result = pipeline.run_streamed(url) if stream else pipeline.run(url)
+    return result.records
+
+# Paginated JSON user APIs
+API_PAGE_SIZE = 100
+API_MAX_PAGES = 50
+API_PREFETCH_PAGES = 3
+# Item keys each kept field is read from, first match wins
+API_FIELD_SOURCES = (
+    ('name', ('name', 'display_name', 'full_name')),
+    ('username', ('username', 'login', 'slug', 'screen_name')),
+    ('email', ('email',)),
+    ('bio', ('bio', 'description', 'about')),
+    ('avatar', ('avatar', 'avatar_url', 'avatar_urls', 'picture')),
+    ('profile_url', ('profile_url', 'link', 'html_url', 'url')),
+)
+LINK_RE = re.compile(r'<([^>]*)>([^,<]*)')
+
+def project_api_user(item):
+    """UserRecord with only the fields we keep from one JSON API user item"""
+    record = UserRecord(method='api')
+    for field, keys in API_FIELD_SOURCES:
+        for key in keys:
+            value = item.get(key)
+            if isinstance(value, dict):
+                # Sized variants such as WordPress avatar_urls: take the largest
+                sizes = [size for size in value if str(size).isdigit()]
+                value = value[max(sizes, key=int)] if sizes else None
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                value = str(value)
+            if isinstance(value, str) and value:
+                setattr(record, field, value)
+                break
+    return record
+
+def api_page_items(result):
+    """User-like items from one JSON page, or None if the body is not a JSON list"""
+    try:
+        data = result.json()
+    except ValueError:
+        return None
+    if not isinstance(data, list):
+        return None
+    return [item for item in data if isinstance(item, dict) and ('name' in item or 'username' in item)]
+
+def _link_next(header, base_url):
+    """Target of rel="next" in a Link header"""
+    for target, params in LINK_RE.findall(header or ''):
+        if re.search(r'rel\s*=\s*"?[^"]*\bnext\b', params, re.IGNORECASE):
+            return urljoin(base_url, target)
+    return None
+
+def _with_query(url, **params):
+    parsed = urlparse(url)
+    query = [(key, value) for key, value in urllib.parse.parse_qsl(parsed.query, keep_blank_values=True)
+             if key not in params]
+    query.extend((key, str(value)) for key, value in params.items())
+    return parsed._replace(query=urllib.parse.urlencode(query)).geturl()
+
+def iter_api_users(first, items, fetcher=None, budget=None, max_pages=API_MAX_PAGES, window=API_PREFETCH_PAGES):
+    """Stream users from a JSON endpoint, starting with an already fetched page
+
+    How to continue is read from the first page: X-WP-TotalPages (or
+    X-Total-Pages) gives the page count, so up to `window` pages are
+    prefetched at a time; a Link rel="next" header is followed page by
+    page; otherwise, when the URL has a per_page parameter and the page was
+    full, page=2, 3, ... are requested until a short or empty page. Only the
+    fields in API_FIELD_SOURCES are kept, and each page is dropped once its
+    users are yielded.
+    """
+    for item in items:
+        yield project_api_user(item)
+    if not items:
+        return
+    
+    params = dict(urllib.parse.parse_qsl(urlparse(first.url).query))
+    page = int(params['page']) if params.get('page', '').isdigit() else 1
+    per_page = int(params['per_page']) if params.get('per_page', '').isdigit() else None
+    total = first.headers.get('X-WP-TotalPages') or first.headers.get('X-Total-Pages')
+    follow = {'next': _link_next(first.headers.get('Link'), first.url)}
+    last = min(page + max_pages - 1, int(total)) if total and total.strip().isdigit() else page + max_pages - 1
+    
+    if total:
+        urls = (_with_query(first.url, page=n) for n in range(page + 1, last + 1))
+    elif follow['next']:
+        def next_links():
+            for _ in range(max_pages - 1):
+                url, follow['next'] = follow['next'], None
+                if url is None:
+                    return
+                yield url
+        urls = next_links()
+        window = 1
+    elif per_page and len(items) >= per_page:
+        urls = (_with_query(first.url, page=n) for n in range(page + 1, last + 1))
+    else:
+        return
+    
+    results = iter_fetch_results(urls, fetcher, deadline=budget.deadline if budget else None, window=window)
+    try:
+        for url, result in results:
+            if isinstance(result, Exception):
+                if isinstance(result, TimeoutError) and budget is not None:
+                    budget.exhausted = 'time'
+                    extract_log.warning("Endpoint time budget exhausted")
+                elif not isinstance(result, urllib.error.HTTPError) or result.code not in (400, 404):
+                    # Past the last page, APIs answer 400 or 404
+                    _report_fetch_error(url, result)
+                return
+            if budget is not None and not budget.consume(len(result.body)):
+                extract_log.warning("Endpoint byte budget exhausted")
+                return
+            items = api_page_items(result)
+            if not items:
+                return
+            METRICS.incr('endpoints.api_pages')
+            for item in items:
+                yield project_api_user(item)
+            follow['next'] = _link_next(result.headers.get('Link'), result.url)
+            if not total and per_page and len(items) < per_page:
+                return
+    finally:
+        results.close()
+
+COMMON_ENDPOINTS = (
+    '/users', '/profiles', '/members', '/community', '/authors',
+    f'/wp-json/wp/v2/users?per_page={API_PAGE_SIZE}', '/api/users', '/user/list', '/users/list',
+    '/profiles/list', '/members/list', '/community/users',
+)
+
+def iter_endpoint_users(base_url, budget=None, endpoints=COMMON_ENDPOINTS, document=None):
+    """Try common user profile endpoints, yielding users from the first that has any
+
+    An optional StageBudget bounds the total wait and the bytes downloaded;
+    probing stops (keeping what was found) once either runs out. JSON
+    endpoints are read page by page through iter_api_users. The endpoint
+    that produced users is noted on document, if one is given.
+    """
+    common_endpoints = list(endpoints)
+    
+    parsed_url = urlparse(base_url)
+    base_domain = f"{parsed_url.scheme}://{parsed_url.netloc}"
+    
+    # Requests overlap (within the per-host limits) but are handled in order
+    urls = [urljoin(base_domain, endpoint) for endpoint in common_endpoints]
+    results = iter_fetch_results(urls, deadline=budget.deadline if budget else None)
+    try:
+        for endpoint, (user_url, result) in zip(common_endpoints, results):
+            try:
+                extract_log.info("Trying endpoint: %s", user_url)
+                
+                if isinstance(result, Exception):
+                    if isinstance(result, TimeoutError) and budget is not None:
+                        budget.exhausted = 'time'
+                        extract_log.warning("Endpoint time budget exhausted")
+                        break
+                    _report_fetch_error(user_url, result)
+                    continue
+                if budget is not None and not budget.consume(len(result.body)):
+                    extract_log.warning("Endpoint byte budget exhausted")
+                    break
+                if not result.body:
+                    continue
+                
+                # Try to parse as JSON first, straight from the bytes
+                if any(api in endpoint for api in ['wp-json', '/api/']):
+                    items = api_page_items(result)
+                    if items:
+                        count = 0
+                        for user in iter_api_users(result, items, budget=budget):
+                            count += 1
+                            yield user
+                        extract_log.info("Found %d users in API endpoint", count)
+                        if document is not None:
+                            document.endpoint = endpoint
+                        break
                 
-                self.users.append(self.current_data)
-            self.in_user_card = False
-            self.current_data = {}
+                # Try HTML parsing
+                parser = AdvancedDarkBossScraper(user_url)
+                content, pruner = prune_markup(result.text())
+                parser.feed(content)
+                parser.close()
+                for user in parser.users:
+                    if user.offset is not None:
+                        user.offset = pruner.source_offset(user.offset)
+                if parser.users:
+                    extract_log.info("Found %d users in %s", len(parser.users), endpoint)
+                    if document is not None:
+                        document.endpoint = endpoint
+                    yield from parser.users
+                    break
+            except Exception as e:
+                extract_log.warning("Error accessing %s: %s", endpoint, e)
+                continue
+    finally:
+        results.close()
+
+def try_common_endpoints(base_url, budget=None, endpoints=COMMON_ENDPOINTS, document=None):
+    """Try to access common user profile endpoints with better error handling"""
+    return list(iter_endpoint_users(base_url, budget, endpoints, document))
+
+class StageBudget:
+    """Time and byte allowance for one pipeline stage
+
+    seconds and max_bytes may be None for "unlimited". The deadline is
+    fixed when the stage starts.
+    """
+    def __init__(self, seconds=None, max_bytes=None):
+        self.seconds = seconds
+        self.max_bytes = max_bytes
+        self.deadline = None if seconds is None else time.monotonic() + seconds
+        self.bytes_used = 0
+        self.exhausted = None
+
+    def expired(self):
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            self.exhausted = 'time'
+            return True
+        return False
+
+    def consume(self, nbytes):
+        """Account for nbytes; False once the byte allowance is used up"""
+        self.bytes_used += nbytes
+        if self.max_bytes is not None and self.bytes_used > self.max_bytes:
+            self.exhausted = 'bytes'
+            return False
+        return not self.expired()
+
+    def limit(self, text):
+        """Cut text to the byte allowance (counted as characters)"""
+        if self.max_bytes is not None and len(text) > self.max_bytes:
+            self.exhausted = 'bytes'
+            text = text[:self.max_bytes]
+        self.bytes_used += len(text)
+        return text
+
+class Document:
+    """One fetched page, shared by every stage of a pipeline run
+
+    The content is decoded once, and pruned once for all the stages that
+    want it. Stages leave what they learned on the document (e.g. the HTML
+    stage keeps its parser) for later stages.
+    """
+    def __init__(self, url, content, bytes_downloaded=0, truncated=False):
+        self.url = url
+        self.content = content
+        self.bytes_downloaded = bytes_downloaded
+        self.truncated = truncated
+        self.parser = None
+        self.endpoint = None
+        self._pruned = {}
+
+    def pruned(self, body_only=False):
+        """Return (pruned content, MarkupPruner), computed on first use"""
+        pruned = self._pruned.get(body_only)
+        if pruned is None:
+            with METRICS.timer('stage.prune'):
+                pruned = self._pruned[body_only] = prune_markup(self.content, body_only)
+        return pruned
+
+# Windows for budgeted scans end just after a '<': fallback patterns never
+# span one (a class pattern ends on it, emails and links cannot hold it)
+SCAN_WINDOW = 256 * 1024
+
+def _iter_windows(content, size=SCAN_WINDOW):
+    start = 0
+    while start < len(content):
+        end = content.find('<', start + size)
+        end = len(content) if end < 0 else end + 1
+        yield content[start:end]
+        start = end
+
+class ExtractorStage:
+    """One step of the extraction pipeline
+
+    Subclasses implement extract(document, budget) and return the records
+    found, stopping early (with what they have) when the budget runs out.
+    confidence says how much a non-empty result can be trusted; the
+    pipeline stops once it reaches min_confidence.
+    """
+    name = 'stage'
+    description = ''
+    confidence = 1.0
+    needs_network = False
+
+    def __init__(self, seconds=None, max_bytes=None, confidence=None):
+        self.seconds = seconds
+        self.max_bytes = max_bytes
+        if confidence is not None:
+            self.confidence = confidence
+
+    def budget(self):
+        return StageBudget(self.seconds, self.max_bytes)
+
+    def extract(self, document, budget):
+        raise NotImplementedError
+
+class HTMLStage(ExtractorStage):
+    """Parse the HTML structure with AdvancedDarkBossScraper"""
+    name = 'html'
+    description = 'Parsing HTML structure'
+
+    def __init__(self, seconds=10, max_bytes=32 * 1024 * 1024, confidence=None, rules=None,
+                 prune=True, body_only=False):
+        super().__init__(seconds, max_bytes, confidence)
+        self.rules = rules
+        self.prune = prune
+        self.body_only = body_only
+
+    def extract(self, document, budget):
+        parser = AdvancedDarkBossScraper(document.url, self.rules)
+        document.parser = parser
+        content, pruner = document.pruned(self.body_only) if self.prune else (document.content, None)
+        users = []
+        for window in _iter_windows(budget.limit(content)):
+            parser.feed(window)
+            users.extend(parser.drain_users())
+            if budget.expired():
+                break
+        parser.close()
+        users.extend(parser.drain_users())
+        if pruner is not None:
+            for user in users:
+                if user.offset is not None:
+                    user.offset = pruner.source_offset(user.offset)
+        return users
+
+class RegexStage(ExtractorStage):
+    """Fallback regex patterns over the raw markup"""
+    name = 'regex'
+    description = 'Trying regex patterns'
+    confidence = 0.5
+
+    def __init__(self, seconds=5, max_bytes=32 * 1024 * 1024, confidence=None, registry=None,
+                 prune=True, body_only=False):
+        super().__init__(seconds, max_bytes, confidence)
+        self.registry = registry
+        self.prune = prune
+        self.body_only = body_only
+
+    def extract(self, document, budget):
+        content, pruner = document.pruned(self.body_only) if self.prune else (document.content, None)
+        users = []
+        start = 0
+        for window in _iter_windows(budget.limit(content)):
+            users.extend(iter_users_from_patterns(window, document.url, self.registry, start))
+            start += len(window)
+            if budget.expired():
+                break
+        if pruner is not None:
+            for user in users:
+                user.offset = pruner.source_offset(user.offset)
+        return users
+
+class EndpointStage(ExtractorStage):
+    """Probe common user listing endpoints on the same site"""
+    name = 'endpoints'
+    description = 'Trying common user endpoints'
+    needs_network = True
+
+    def __init__(self, seconds=30, max_bytes=8 * 1024 * 1024, confidence=None):
+        super().__init__(seconds, max_bytes, confidence)
+
+    def extract(self, document, budget, endpoints=COMMON_ENDPOINTS):
+        return try_common_endpoints(document.url, budget, endpoints, document)
+
+class PipelineResult:
+    """Records from a pipeline run plus a report line per stage"""
+    def __init__(self, document, records, stages, duplicates=0):
+        self.document = document
+        self.records = records
+        self.stages = stages
+        self.duplicates = duplicates
+
+    def summary(self):
+        return {'url': self.document.url if self.document else None, 'records': len(self.records),
+                'duplicates': self.duplicates, 'stages': self.stages}
+
+class ExtractionPipeline:
+    """Ordered chain of extractor stages with budgets and short-circuiting
+
+    The page is fetched once (within fetch_seconds / fetch_bytes) and
+    handed to each stage in turn. Records are tagged with the name of the
+    stage that produced them. The run stops after the first stage whose
+    non-empty result has confidence >= min_confidence, so with the default
+    of 0 it behaves like the classic "method 1, else 2, else 3" chain;
+    raise it to keep collecting after low-confidence stages. Worst-case
+    latency is bounded by the fetch budget plus the stage budgets.
+
+    With a SiteProfileStore (profiles, or the global one from
+    enable_site_profiles) a domain seen before goes straight to the stage
+    and endpoint that worked last time; if that finds nothing the profile
+    is forgotten and the full chain runs and relearns it.
+    """
+    def __init__(self, stages=None, min_confidence=0.0, fetch_seconds=20, fetch_bytes=32 * 1024 * 1024,
+                 dedupe=True, profiles=None):
+        self.stages = stages if stages is not None else [HTMLStage(), RegexStage(), EndpointStage()]
+        self.min_confidence = min_confidence
+        self.dedupe = dedupe
+        self.profiles = profiles
+        self.fetch_seconds = fetch_seconds
+        self.fetch_bytes = fetch_bytes
+
+    def fetch(self, url):
+        """Download url into a Document, or None if it could not be loaded"""
+        coro = HTTP_FETCHER.fetch(url, max_bytes=self.fetch_bytes)
+        if self.fetch_seconds is not None:
+            coro = asyncio.wait_for(coro, self.fetch_seconds)
+        try:
+            with METRICS.timer('stage.fetch'):
+                result = run_async(coro)
+        except Exception as e:
+            _report_fetch_error(url, e)
+            return None
+        if result.truncated:
+            extract_log.warning("Page cut at the %d byte fetch budget", self.fetch_bytes)
+        return Document(url, result.text(), len(result.body), result.truncated)
+
+    def run(self, url, document=None, records=None, start=0, reports=None):
+        """Run the stages over url (or an already loaded document)
+
+        records/start/reports let a caller that already ran the first stages
+        itself (e.g. streaming HTML parsing) continue the chain.
+        """
+        profiles = self._profiles()
+        domain = site_key(url)
+        if profiles is not None and document is None and not records and start == 0:
+            profile = profiles.get(domain)
+            if profile is not None:
+                result = self._run_known(profiles, url, profile)
+                if result is not None and result.records:
+                    return result
+                if result is not None and result.document.content:
+                    # The rest of the chain works on the page already downloaded
+                    document = result.document
+        
+        result = self._run_stages(url, document, records, start, reports=reports)
+        if profiles is not None:
+            self._learn(profiles, domain, result)
+        return result
+
+    def run_streamed(self, url):
+        """Like run(), with the first (HTML) stage parsing the page as it downloads
+
+        Downloading and parsing share one budget: fetch_bytes, and
+        fetch_seconds plus the stage's own seconds. A site profile is looked
+        up first: a learned endpoint or regex path is followed without
+        streaming, and a site learned on the HTML stage streams only that.
+        """
+        if not self.stages or not isinstance(self.stages[0], HTMLStage):
+            return self.run(url)
+        stage = self.stages[0]
+        profiles = self._profiles()
+        profile = profiles.get(site_key(url)) if profiles is not None else None
+        if profile is not None and profile.stage != stage.name:
+            # The learned path does not need the page streamed
+            result = self._run_known(profiles, url, profile)
+            if result is not None and result.records:
+                return result
+            if result is not None and result.document.content:
+                return self.run(url, result.document)
+            profile = None
+        extract_log.info("Method 1: %s while downloading...", stage.description)
+        seconds = None if self.fetch_seconds is None or stage.seconds is None else self.fetch_seconds + stage.seconds
+        budget = StageBudget(seconds, self.fetch_bytes)
+        kept = []
+        started = time.perf_counter()
+        with METRICS.timer('stage.' + stage.name):
+            users = list(stream_users_from_website(url, keep_text=kept, rules=stage.rules, prune=stage.prune,
+                                                   body_only=stage.body_only, budget=budget))
+        content = ''.join(kept)
+        if not users and not content:
+            extract_log.warning("Failed to load website")
+            return PipelineResult(Document(url, ''), [], [])
+        for user in users:
+            user.method = stage.name
+        METRICS.incr(f'stage.{stage.name}.records', len(users))
+        report = {
+            'stage': stage.name,
+            'status': 'ok' if budget.exhausted is None else budget.exhausted + '_budget',
+            'records': len(users),
+            'seconds': round(time.perf_counter() - started, 6),
+            'bytes': budget.bytes_used,
+            'confidence': stage.confidence if users else 0.0,
+        }
+        document = Document(url, content, budget.bytes_used, budget.exhausted is not None)
+        if profile is not None:
+            # A site known to have its users on the page needs no other stage
+            result = self._run_stages(url, document, users, plan=[], reports=[report])
+            if result.records:
+                profiles.used(profile.domain, len(result.records))
+                return result
+            extract_log.info("Learned path for %s found nothing, relearning", profile.domain)
+            profiles.forget(profile.domain)
+        return self.run(url, document, users, start=1, reports=[report])
+
+    def _profiles(self):
+        return self.profiles if self.profiles is not None else SITE_PROFILES
+
+    def _run_known(self, profiles, url, profile):
+        """Follow a learned profile, forgetting it if it finds nothing"""
+        result = self._run_profile(url, profile)
+        if result is not None and result.records:
+            profiles.used(profile.domain, len(result.records))
+            return result
+        extract_log.info("Learned path for %s found nothing, relearning", profile.domain)
+        profiles.forget(profile.domain)
+        return result
+
+    def _run_profile(self, url, profile):
+        """Run only the stage a SiteProfile points at; None if it no longer exists"""
+        stage = next((s for s in self.stages if s.name == profile.stage), None)
+        if stage is None:
+            return None
+        extract_log.info("Known site, going straight to %s", profile.endpoint or stage.name)
+        if isinstance(stage, EndpointStage) and profile.endpoint:
+            # The page itself is not needed to probe one known endpoint
+            document = Document(url, '')
+            return self._run_stages(url, document, None, 0, [(stage, {'endpoints': [profile.endpoint]})])
+        return self._run_stages(url, None, None, 0, [(stage, {})])
+
+    def _learn(self, profiles, domain, result):
+        for report in result.stages:
+            if report.get('records'):
+                document = result.document
+                selectors = []
+                if report['stage'] == 'html' and document.parser is not None:
+                    counts = document.parser.card_selectors
+                    selectors = sorted(counts, key=counts.get, reverse=True)[:5]
+                endpoint = document.endpoint if report['stage'] == 'endpoints' else None
+                profiles.learn(SiteProfile(domain, report['stage'], endpoint, selectors, report['records']))
+                return
+
+    def _run_stages(self, url, document=None, records=None, start=0, plan=None, reports=None):
+        reports = list(reports or [])
+        records = list(records or [])
+        if document is None:
+            document = self.fetch(url)
+            if document is None:
+                extract_log.warning("Failed to load website")
+                return PipelineResult(Document(url, ''), [], reports)
+
+        if plan is None:
+            plan = [(stage, {}) for stage in self.stages[start:]]
+        for number, (stage, options) in enumerate(plan, start + 1):
+            if records and self._confident(reports):
+                reports.append({'stage': stage.name, 'status': 'skipped'})
+                continue
+            extract_log.info("Method %d: %s...", number, stage.description)
+            budget = stage.budget()
+            started = time.perf_counter()
+            try:
+                with METRICS.timer('stage.' + stage.name):
+                    found = stage.extract(document, budget, **options)
+                status = 'ok' if budget.exhausted is None else budget.exhausted + '_budget'
+            except Exception as e:
+                extract_log.warning("Stage %s failed: %s", stage.name, e)
+                found, status = [], 'error'
+            for user in found:
+                user.method = stage.name
+            records.extend(found)
+            METRICS.incr(f'stage.{stage.name}.records', len(found))
+            reports.append({
+                'stage': stage.name,
+                'status': status,
+                'records': len(found),
+                'seconds': round(time.perf_counter() - started, 6),
+                'bytes': budget.bytes_used,
+                'confidence': stage.confidence if found else 0.0,
+            })
+        
+        duplicates = 0
+        if self.dedupe and records:
+            deduplicator = UserDeduplicator()
+            records = list(deduplicator.filter(records))
+            duplicates = deduplicator.duplicates
+            if duplicates:
+                extract_log.info("Removed %d duplicate users", duplicates)
+                METRICS.incr('records.duplicates', duplicates)
+        METRICS.incr('records.emitted', len(records))
+        return PipelineResult(document, records, reports, duplicates)
+
+    def _confident(self, reports):
+        return any(r.get('confidence', 0.0) >= self.min_confidence and r.get('records') for r in reports)
+
+# Per-domain memory of the extraction path that worked last time
+DEFAULT_PROFILE_DB = '.darkboss_profiles.sqlite'
+PROFILE_TTL = 7 * 24 * 3600
+
+def site_key(url):
+    return urlparse(url).netloc.lower()
+
+class SiteProfile:
+    """What produced users for a domain: stage name, endpoint and card selectors"""
+    __slots__ = ('domain', 'stage', 'endpoint', 'selectors', 'records', 'learned')
+
+    def __init__(self, domain, stage, endpoint=None, selectors=None, records=0, learned=None):
+        self.domain = domain
+        self.stage = stage
+        self.endpoint = endpoint
+        self.selectors = selectors or []
+        self.records = records
+        self.learned = learned if learned is not None else time.time()
+
+class SiteProfileStore:
+    """SQLite store of SiteProfiles, one row per domain
+
+    A profile older than ttl seconds is dropped on lookup so the full
+    pipeline runs (and relearns) now and then; the pipeline also forgets a
+    profile whose path stops producing users.
+    """
+    def __init__(self, path=DEFAULT_PROFILE_DB, ttl=PROFILE_TTL):
+        import sqlite3
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS site_profiles ("
+            "domain TEXT PRIMARY KEY, stage TEXT NOT NULL, endpoint TEXT, selectors TEXT,"
+            "records INTEGER NOT NULL DEFAULT 0, learned REAL NOT NULL, used REAL, uses INTEGER NOT NULL DEFAULT 0)"
+        )
+        self.stats = {'hits': 0, 'misses': 0, 'expired': 0, 'learned': 0, 'forgotten': 0}
+
+    def get(self, domain):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT stage, endpoint, selectors, records, learned FROM site_profiles WHERE domain = ?",
+                (domain,)).fetchone()
+            if row is not None and time.time() - row[4] > self.ttl:
+                self._db.execute("DELETE FROM site_profiles WHERE domain = ?", (domain,))
+                self.stats['expired'] += 1
+                row = None
+            self.stats['hits' if row else 'misses'] += 1
+        if row is None:
+            return None
+        stage, endpoint, selectors, records, learned = row
+        return SiteProfile(domain, stage, endpoint, json.loads(selectors or '[]'), records, learned)
+
+    def learn(self, profile):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO site_profiles (domain, stage, endpoint, selectors, records, learned) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (profile.domain, profile.stage, profile.endpoint, json.dumps(profile.selectors),
+                 profile.records, profile.learned))
+            self.stats['learned'] += 1
+
+    def used(self, domain, records):
+        """Note a run that went straight down the learned path"""
+        with self._lock:
+            self._db.execute("UPDATE site_profiles SET used = ?, uses = uses + 1, records = ? WHERE domain = ?",
+                             (time.time(), records, domain))
+
+    def forget(self, domain):
+        with self._lock:
+            self._db.execute("DELETE FROM site_profiles WHERE domain = ?", (domain,))
+            self.stats['forgotten'] += 1
+
+    def close(self):
+        self._db.close()
+
+    def summary(self):
+        s = self.stats
+        return (f"{s['hits']} known sites, {s['misses']} new, {s['expired']} expired, "
+                f"{s['forgotten']} relearned")
+
+SITE_PROFILES = None
+
+def enable_site_profiles(path=DEFAULT_PROFILE_DB, ttl=PROFILE_TTL):
+    """Remember per domain which extraction path worked"""
+    global SITE_PROFILES
+    SITE_PROFILES = SiteProfileStore(path, ttl)
+    return SITE_PROFILES
 
-def get_web_content(url):
-    """Download content from URL with better error handling"""
-    try:
-        # Bypass SSL verification (for educational purposes)
-        context = ssl._create_unverified_context()
-        
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.5',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-        }
-        
-        req = urllib.request.Request(url, headers=headers)
-        with urllib.request.urlopen(req, context=context, timeout=15) as response:
-            return response.read().decode('utf-8', errors='ignore')
-    except urllib.error.HTTPError as e:
-        if e.code == 404:
-            print(f"[!] Page not found (404): {url}")
-        else:
-            print(f"[!] HTTP Error {e.code}: {url}")
-        return None
-    except urllib.error.URLError as e:
-        print(f"[!] URL Error: {e.reason} - {url}")
-        return None
-    except Exception as e:
-        print(f"[!] Error accessing {url}: {e}")
-        return None
+# Machine-readable output sinks. Each one accepts records as they are
+# produced and writes them in batches; a '.gz' suffix (or compress=True)
+# compresses the stream on the fly.
+SINK_BATCH_SIZE = 256
+BINARY_MAGIC = b'DBU\x01'
+BINARY_FIELDS = UserRecord.FIELDS + ('extra',)
 
-def extract_users_from_patterns(content, base_url):
-    """Extract users using regex patterns as fallback"""
-    users = []
-    
-    # Try to find user profiles using various patterns
-    patterns = [
-        # Social media profiles
-        r'https?://(?:www\.)?(facebook|twitter|instagram|linkedin)\.com/[a-zA-Z0-9_\-\.]+',
-        
-        # Email patterns
-        r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}',
-        
-        # Name patterns in HTML
-        r'class="[^"]*(name|user-name|profile-name|author-name)[^"]*"[^>]*>([^<]+)<',
-        
-        # Username patterns
-        r'class="[^"]*(username|user-login|profile-username)[^"]*"[^>]*>([^<]+)<',
-    ]
-    
-    for pattern in patterns:
-        try:
-            matches = re.findall(pattern, content, re.IGNORECASE)
-            for match in matches:
-                if isinstance(match, tuple):
-                    match = match[1] if len(match) > 1 else match[0]
-                
-                user_data = {}
-                if '@' in match and '.' in match:
-                    user_data['email'] = match
-                    user_data['name'] = match.split('@')[0]
-                elif any(domain in match for domain in ['facebook', 'twitter', 'instagram', 'linkedin']):
-                    user_data['social'] = match
-                    user_data['name'] = match.split('/')[-1].replace('-', ' ').title()
-                else:
-                    user_data['name'] = match.strip()
-                
-                if user_data:
-                    users.append(user_data)
-        except Exception as e:
-            print(f"[!] Error with pattern {pattern}: {e}")
-            continue
-    
-    return users
+def _write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
 
-def scrape_users_from_website(url):
-    """Extract user information from website using multiple methods"""
-    print(f"[*] Collecting data from {url}...")
-    
-    content = get_web_content(url)
-    if not content:
-        print("[!] Failed to load website")
-        return []
-    
-    # Method 1: HTML parsing
-    print("[*] Method 1: Parsing HTML structure...")
-    parser = AdvancedDarkBossScraper(url)
-    parser.feed(content)
-    users = parser.users
-    
-    # Method 2: Regex patterns (fallback)
-    if not users:
-        print("[*] Method 2: Trying regex patterns...")
-        users = extract_users_from_patterns(content, url)
+def _read_varint(data, pos):
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+class OutputSink:
+    """Base class for streaming record writers
+
+    Subclasses set binary and implement _encode(user), which returns the
+    str or bytes chunk for one record, and may write a header in
+    _begin(fresh), fresh being False when appending to a non-empty file.
+    Accepts a path ('-' for stdout) or an open file object. With
+    append=True records are added to an existing file, whose header is
+    not repeated.
+    """
+    binary = False
+    extension = ''
     
-    # Method 3: Try common endpoints (only if we have a valid base domain)
-    if not users:
-        print("[*] Method 3: Trying common user endpoints...")
-        users = try_common_endpoints(url)
+    def __init__(self, target, compress=None, batch_size=SINK_BATCH_SIZE, append=False):
+        self.count = 0
+        self.batch_size = batch_size
+        self._batch = []
+        self._raw = None
+        self._compress = False
+        self._owns_file = isinstance(target, (str, os.PathLike))
+        if not self._owns_file:
+            self._file = target
+        elif target == '-':
+            self._owns_file = False
+            self._file = sys.stdout.buffer if self.binary else sys.stdout
+        else:
+            self._compress = str(target).endswith('.gz') if compress is None else compress
+            self._raw = open(target, 'ab' if append else 'wb')
+            self._file = self._wrap()
+        self.name = str(target) if self._owns_file else getattr(self._file, 'name', '<stream>')
+        self._begin(not (append and self._raw is not None and self._raw.tell() > 0))
+
+    def _wrap(self):
+        stream = gzip.GzipFile(fileobj=self._raw, mode='wb') if self._compress else self._raw
+        if not self.binary:
+            stream = io.TextIOWrapper(stream, encoding='utf-8', newline='')
+        return stream
+
+    def _begin(self, fresh):
+        pass
+
+    def _encode(self, user):
+        raise NotImplementedError
+
+    def write(self, user):
+        self._batch.append(self._encode(user))
+        self.count += 1
+        if len(self._batch) >= self.batch_size:
+            self.flush()
+
+    def write_all(self, users):
+        for user in users:
+            self.write(user)
+
+    def flush(self):
+        if self._batch:
+            self._file.write((b'' if self.binary else '').join(self._batch))
+            self._batch = []
+        self._file.flush()
+
+    def sync(self):
+        """Make everything written so far durable and return the file size
+
+        A compressed output ends its gzip member here, so the file can later
+        be cut back to this size and still be read.
+        """
+        self.flush()
+        if self._raw is None:
+            return None
+        if self._compress:
+            # Closing the gzip layer writes the member trailer; the file stays open
+            (self._file if self.binary else self._file.detach()).close()
+        self._raw.flush()
+        os.fsync(self._raw.fileno())
+        size = self._raw.tell()
+        if self._compress:
+            self._file = self._wrap()
+        return size
+
+    def close(self):
+        if self._file is None:
+            return
+        self.flush()
+        if self._owns_file:
+            self._file.close()
+            self._raw.close()
+        self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class JSONLSink(OutputSink):
+    """One JSON object per line"""
+    extension = '.jsonl'
     
-    return users
+    def _encode(self, user):
+        return user.to_json() + '\n'
 
-def try_common_endpoints(base_url):
-    """Try to access common user profile endpoints with better error handling"""
-    users = []
-    common_endpoints = [
-        '/users', '/profiles', '/members', '/community', '/authors',
-        '/wp-json/wp/v2/users', '/api/users', '/user/list', '/users/list',
-        '/profiles/list', '/members/list', '/community/users'
-    ]
+class CSVSink(OutputSink):
+    """CSV with a fixed header; non-string values (and extra) are JSON-encoded"""
+    extension = '.csv'
     
-    parsed_url = urlparse(base_url)
-    base_domain = f"{parsed_url.scheme}://{parsed_url.netloc}"
+    def _begin(self, fresh):
+        import csv
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+        if fresh:
+            self._writer.writerow(BINARY_FIELDS)
+            self._batch.append(self._take())
+
+    def _take(self):
+        text = self._buffer.getvalue()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return text
+
+    def _encode(self, user):
+        row = []
+        for field in BINARY_FIELDS:
+            value = getattr(user, field)
+            if value is None:
+                value = ''
+            elif not isinstance(value, str):
+                value = json.dumps(value, ensure_ascii=False)
+            row.append(value)
+        self._writer.writerow(row)
+        return self._take()
+
+class BinarySink(OutputSink):
+    """Compact length-prefixed records
+
+    The file starts with BINARY_MAGIC. Each record is a varint length
+    followed by a varint presence mask, a varint mask of JSON-encoded
+    values, and one varint-prefixed UTF-8 value per present field in
+    BINARY_FIELDS order. Read it back with iter_binary_users().
+    """
+    binary = True
+    extension = '.dbu'
     
-    for endpoint in common_endpoints:
-        try:
-            user_url = urljoin(base_domain, endpoint)
-            print(f"[*] Trying endpoint: {user_url}")
-            
-            content = get_web_content(user_url)
-            if content:
-                # Try to parse as JSON first
-                if any(api in endpoint for api in ['wp-json', '/api/']):
-                    try:
-                        data = json.loads(content)
-                        if isinstance(data, list):
-                            for item in data:
-                                if 'name' in item or 'username' in item:
-                                    users.append(item)
-                            if users:
-                                print(f"[+] Found {len(users)} users in API endpoint")
-                                break
-                    except json.JSONDecodeError:
-                        # Not JSON, continue with HTML parsing
-                        pass
-                
-                # Try HTML parsing
-                parser = AdvancedDarkBossScraper(user_url)
-                parser.feed(content)
-                if parser.users:
-                    users.extend(parser.users)
-                    print(f"[+] Found {len(parser.users)} users in {endpoint}")
-                    break
-        except Exception as e:
-            print(f"[!] Error accessing {endpoint}: {e}")
+    def _begin(self, fresh):
+        if fresh:
+            self._batch.append(BINARY_MAGIC)
+
+    def _encode(self, user):
+        present = encoded = 0
+        values = bytearray()
+        for bit, field in enumerate(BINARY_FIELDS):
+            value = getattr(user, field)
+            if value is None:
+                continue
+            present |= 1 << bit
+            if not isinstance(value, str):
+                encoded |= 1 << bit
+                value = json.dumps(value, ensure_ascii=False)
+            data = value.encode('utf-8')
+            _write_varint(values, len(data))
+            values += data
+        body = bytearray()
+        _write_varint(body, present)
+        _write_varint(body, encoded)
+        body += values
+        record = bytearray()
+        _write_varint(record, len(body))
+        return bytes(record + body)
+
+def iter_binary_users(source):
+    """Yield UserRecords from a file written by BinarySink (path or binary file)"""
+    if isinstance(source, (str, os.PathLike)):
+        opener = gzip.open if str(source).endswith('.gz') else open
+        with opener(source, 'rb') as f:
+            yield from iter_binary_users(f)
+        return
+    if source.read(len(BINARY_MAGIC)) != BINARY_MAGIC:
+        raise ValueError("not a DarkBoss binary user file")
+    pending = b''
+    while True:
+        chunk = source.read(STREAM_CHUNK_SIZE)
+        data = memoryview(pending + chunk) if pending else memoryview(chunk)
+        pos = 0
+        while pos < len(data):
+            try:
+                length, start = _read_varint(data, pos)
+            except IndexError:
+                break
+            if start + length > len(data):
+                break
+            yield _decode_binary_record(data[start:start + length])
+            pos = start + length
+        pending = bytes(data[pos:])
+        if not chunk:
+            if pending:
+                raise ValueError("truncated record at end of binary user file")
+            return
+
+def _decode_binary_record(data):
+    present, pos = _read_varint(data, 0)
+    encoded, pos = _read_varint(data, pos)
+    fields = {}
+    for bit, field in enumerate(BINARY_FIELDS):
+        if not present >> bit & 1:
             continue
+        length, pos = _read_varint(data, pos)
+        value = str(data[pos:pos + length], 'utf-8')
+        pos += length
+        fields[field] = json.loads(value) if encoded >> bit & 1 else value
+    return UserRecord(**fields)
+
+SINK_FORMATS = {'jsonl': JSONLSink, 'csv': CSVSink, 'binary': BinarySink}
+
+def open_sink(target, fmt=None, compress=None, batch_size=SINK_BATCH_SIZE, append=False):
+    """Open an output sink, inferring the format from the file extension when fmt is None"""
+    if fmt is None:
+        name = str(target)
+        if name.endswith('.gz'):
+            name = name[:-3]
+        fmt = next((key for key, cls in SINK_FORMATS.items() if name.endswith(cls.extension)), 'jsonl')
+    if fmt not in SINK_FORMATS:
+        raise ValueError(f"unknown output format {fmt!r}, expected one of {', '.join(SINK_FORMATS)}")
+    return SINK_FORMATS[fmt](target, compress=compress, batch_size=batch_size, append=append)
+
+CORPUS_HTML_SUFFIXES = ('.html', '.htm', '.xhtml')
+CORPUS_WARC_SUFFIXES = ('.warc', '.warc.gz')
+
+def extract_users_from_content(content, base_url, rules=None):
+    """Run HTML parsing and the regex fallback over an already loaded page"""
+    pipeline = ExtractionPipeline([HTMLStage(rules=rules), RegexStage()])
+    return pipeline.run(base_url, Document(base_url, content)).records
+
+def iter_warc_records(path):
+    """Yield (target_uri, html) for every HTML response record in a WARC file"""
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rb') as f:
+        while True:
+            line = f.readline()
+            if not line:
+                break
+            if not line.startswith(b'WARC/'):
+                continue
+            headers = {}
+            for line in iter(f.readline, b''):
+                line = line.strip()
+                if not line:
+                    break
+                name, _, value = line.partition(b':')
+                headers[name.strip().lower()] = value.strip().decode('latin-1')
+            block = f.read(int(headers.get(b'content-length', 0)))
+            if headers.get(b'warc-type') not in ('response', 'resource'):
+                continue
+            
+            charset = None
+            body = memoryview(block)
+            if headers.get(b'content-type', '').startswith('application/http'):
+                # Slice the payload out of the record without copying it
+                end = block.find(b'\r\n\r\n')
+                http_head = block[:end] if end >= 0 else block
+                body = body[end + 4:] if end >= 0 else body[:0]
+                content_type = ''
+                for http_line in http_head.split(b'\r\n')[1:]:
+                    name, _, value = http_line.partition(b':')
+                    if name.strip().lower() == b'content-type':
+                        content_type = value.strip().decode('latin-1')
+                if content_type and 'html' not in content_type.lower():
+                    continue
+                match = re.search(r'charset=([\w\-]+)', content_type, re.IGNORECASE)
+                if match:
+                    charset = match.group(1)
+            yield headers.get(b'warc-target-uri', path), decode_body(body, charset)
+
+def iter_corpus_tasks(paths):
+    """Yield (source, base_url, file_path, content) tasks for saved pages
+
+    HTML files are read by the worker itself; WARC records are read here and
+    shipped with their content.
+    """
+    for root in paths:
+        if os.path.isdir(root):
+            files = sorted(
+                os.path.join(dirpath, name)
+                for dirpath, _, names in os.walk(root)
+                for name in names
+            )
+        else:
+            files = [root]
+        for path in files:
+            lower = path.lower()
+            if lower.endswith(CORPUS_HTML_SUFFIXES):
+                import urllib.request
+                base_url = 'file://' + urllib.request.pathname2url(os.path.abspath(path))
+                yield path, base_url, path, None
+            elif lower.endswith(CORPUS_WARC_SUFFIXES):
+                for uri, content in iter_warc_records(path):
+                    yield uri, uri, None, content
+
+def _init_corpus_worker(metrics_enabled, parser_backend=None):
+    # Per-document stage messages would drown the run summary
+    extract_log.setLevel(logging.WARNING)
+    if metrics_enabled:
+        enable_metrics()
+    enable_parser_backend(parser_backend)
+
+def process_corpus_task(task):
+    """Worker entry point: extract users from one saved page
+
+    Returns (source, users, error, metrics), metrics being the worker's
+    counters for this page when collection is on.
+    """
+    source, base_url, path, content = task
+    try:
+        if content is None:
+            with open(path, 'rb') as f:
+                content = decode_body(f.read())
+        users = extract_users_from_content(content, base_url)
+    except Exception as e:
+        users, error = [], str(e)
+    else:
+        error = None
+        for user in users:
+            user.source_url = source
+    return source, users, error, METRICS.drain() if METRICS.enabled else None
+
+def process_corpus_chunk(tasks):
+    """Worker entry point for a batch of tasks; one result per task"""
+    return [process_corpus_task(task) for task in tasks]
+
+def _iter_bounded(executor, func, items, window):
+    """Like executor.map, in order, but with at most window calls in flight
+
+    executor.map submits the whole iterable up front, which would pull
+    every WARC record into the parent before the first result.
+    """
+    pending = collections.deque()
+    for item in items:
+        if len(pending) >= window:
+            yield pending.popleft().result()
+        pending.append(executor.submit(func, item))
+    while pending:
+        yield pending.popleft().result()
+
+def _iter_batches(items, size):
+    items = iter(items)
+    while True:
+        batch = list(itertools.islice(items, size))
+        if not batch:
+            return
+        yield batch
+
+def run_corpus(paths, sink, workers=None, chunksize=1, dedupe=True, dedupe_capacity=DEDUPE_CAPACITY):
+    """Extract users from saved pages in parallel, writing them to an output sink
+
+    Tasks go to the workers in batches of chunksize, with about two batches
+    per worker in flight, so memory does not grow with the corpus. Records
+    repeated across documents are dropped using a FingerprintTable of
+    dedupe_capacity identity keys, since output is written as it is
+    produced.
+    """
+    documents = records = errors = 0
+    deduplicator = UserDeduplicator(bounded=True, capacity=dedupe_capacity) if dedupe else None
+    workers = workers or os.cpu_count() or 1
+    batches = _iter_batches(iter_corpus_tasks(paths), max(1, chunksize))
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=_init_corpus_worker,
+                                                initargs=(METRICS.enabled, PARSER_BACKEND.name)) as executor:
+        results = itertools.chain.from_iterable(_iter_bounded(executor, process_corpus_chunk, batches, workers * 2))
+        for source, users, error, metrics in results:
+            if metrics:
+                METRICS.merge(metrics)
+            documents += 1
+            if error:
+                errors += 1
+                corpus_log.warning("Failed to process %s: %s", source, error)
+                continue
+            if deduplicator is not None:
+                users = list(deduplicator.filter(users))
+            sink.write_all(users)
+            records += len(users)
+    duplicates = deduplicator.duplicates if deduplicator else 0
+    METRICS.incr('records.duplicates', duplicates)
+    return {'documents': documents, 'records': records, 'duplicates': duplicates, 'errors': errors}
+
+def add_observability_arguments(parser):
+    """Logging and metrics options shared by the command line entry points"""
+    parser.add_argument('--log-level', default='INFO', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'])
+    parser.add_argument('--metrics-json', metavar='PATH', help='write a JSON metrics summary here')
+    parser.add_argument('--metrics-prom', metavar='PATH', help='write metrics in Prometheus text format here')
+
+def add_parser_argument(parser):
+    parser.add_argument('--parser', choices=list(PARSER_BACKENDS),
+                        help=f'HTML tokenizer (default: {PARSER_BACKEND.name})')
+
+def setup_observability(args, stream=None):
+    setup_logging(getattr(logging, args.log_level), stream)
+    if args.metrics_json or args.metrics_prom:
+        enable_metrics()
+
+def write_metrics(args):
+    if args.metrics_json:
+        METRICS.write_json(args.metrics_json)
+        log.info("Metrics summary written to %s", args.metrics_json)
+    if args.metrics_prom:
+        METRICS.write_prometheus(args.metrics_prom)
+        log.info("Prometheus metrics written to %s", args.metrics_prom)
+
+def corpus_main(argv=None):
+    """Non-interactive entry point for offline corpus processing"""
+    parser = argparse.ArgumentParser(
+        prog='Website_scrape_bd.py corpus',
+        description='Extract users from saved HTML files or WARC archives',
+    )
+    parser.add_argument('paths', nargs='+', help='HTML/WARC files or directories')
+    parser.add_argument('-o', '--output', default='-', help='output file (default: stdout)')
+    parser.add_argument('--format', choices=list(SINK_FORMATS), help='output format (default: from the extension, else jsonl)')
+    parser.add_argument('--gzip', action='store_true', help='gzip the output (implied by a .gz extension)')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: CPU count)')
+    parser.add_argument('--chunksize', type=int, default=4, help='documents sent to a worker at once')
+    parser.add_argument('--no-dedupe', action='store_true', help='keep users repeated across documents')
+    parser.add_argument('--dedupe-capacity', type=int, default=DEDUPE_CAPACITY, metavar='KEYS',
+                        help=f'identity keys the de-duplication table holds (default: {DEDUPE_CAPACITY})')
+    add_parser_argument(parser)
+    add_observability_arguments(parser)
+    args = parser.parse_args(argv)
+    setup_observability(args, stream=sys.stderr)
+    if args.parser:
+        try:
+            enable_parser_backend(args.parser)
+        except ValueError as e:
+            parser.error(str(e))
     
-    return users
+    with open_sink(args.output, args.format, compress=args.gzip or None) as sink:
+        summary = run_corpus(args.paths, sink, args.workers, args.chunksize, not args.no_dedupe,
+                             args.dedupe_capacity)
+    corpus_log.info("Processed %d documents, %d users, %d duplicates removed, %d errors",
+                    summary['documents'], summary['records'], summary['duplicates'], summary['errors'])
+    write_metrics(args)
+    return 1 if summary['errors'] else 0
 
 def display_branding():
     """Display branding information"""
@@ -265,19 +3457,16 @@ def open_links():
         "https://t.me/windowspremiumkey"
     ]
     
-    print("[*] Opening branding links...")
+    import webbrowser
+    log.info("Opening branding links...")
     for link in links:
         try:
             webbrowser.open(link)
             time.sleep(1)
         except:
-            print(f"[!] Failed to open {link}")
+            log.warning("Failed to open %s", link)
 
-def generate_html_report(users, url, filename):
-    """Generate a beautiful HTML report"""
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    
-    html_content = f"""
+REPORT_HEADER = """
 <!DOCTYPE html>
 <html lang="en">
 <head>
@@ -285,59 +3474,59 @@ def generate_html_report(users, url, filename):
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>DarkBoss1BD Scraping Report</title>
     <style>
-        body {{
+        body {
             font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
             margin: 0;
             padding: 20px;
             background-color: #0d1117;
             color: #c9d1d9;
-        }}
-        .container {{
+        }
+        .container {
             max-width: 1200px;
             margin: 0 auto;
             background-color: #161b22;
             border-radius: 10px;
             padding: 20px;
             box-shadow: 0 0 20px rgba(0, 0, 0, 0.3);
-        }}
-        .header {{
+        }
+        .header {
             text-align: center;
             padding: 20px;
             background: linear-gradient(135deg, #ff6b6b 0%, #ee5a24 100%);
             border-radius: 10px;
             margin-bottom: 30px;
-        }}
-        .header h1 {{
+        }
+        .header h1 {
             margin: 0;
             color: white;
             font-size: 2.5em;
             text-shadow: 2px 2px 4px rgba(0, 0, 0, 0.5);
-        }}
-        .header p {{
+        }
+        .header p {
             margin: 5px 0 0;
             color: #f1f2f6;
             font-size: 1.2em;
-        }}
-        .info-box {{
+        }
+        .info-box {
             background-color: #21262d;
             border-radius: 8px;
             padding: 15px;
             margin-bottom: 20px;
             border-left: 4px solid #ff6b6b;
-        }}
-        .user-card {{
+        }
+        .user-card {
             background: linear-gradient(135deg, #21262d 0%, #30363d 100%);
             border-radius: 8px;
             padding: 15px;
             margin-bottom: 15px;
             box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
             transition: transform 0.3s ease;
-        }}
-        .user-card:hover {{
+        }
+        .user-card:hover {
             transform: translateY(-5px);
             box-shadow: 0 8px 15px rgba(0, 0, 0, 0.2);
-        }}
-        .user-avatar {{
+        }
+        .user-avatar {
             width: 80px;
             height: 80px;
             border-radius: 50%;
@@ -345,87 +3534,87 @@ def generate_html_report(users, url, filename):
             border: 3px solid #ff6b6b;
             margin-right: 15px;
             float: left;
-        }}
-        .user-info {{
+        }
+        .user-info {
             margin-left: 100px;
-        }}
-        .user-name {{
+        }
+        .user-name {
             font-size: 1.4em;
             margin: 0 0 10px;
             color: #ff6b6b;
-        }}
-        .user-detail {{
+        }
+        .user-detail {
             margin: 5px 0;
             font-size: 0.95em;
-        }}
-        .label {{
+        }
+        .label {
             font-weight: bold;
             color: #58a6ff;
             display: inline-block;
             width: 80px;
-        }}
-        .stats {{
+        }
+        .stats {
             display: flex;
             justify-content: space-around;
             margin: 20px 0;
             text-align: center;
-        }}
-        .stat-box {{
+        }
+        .stat-box {
             background: linear-gradient(135deg, #21262d 0%, #30363d 100%);
             border-radius: 8px;
             padding: 15px;
             flex: 1;
             margin: 0 10px;
             box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
-        }}
-        .stat-number {{
+        }
+        .stat-number {
             font-size: 2em;
             font-weight: bold;
             color: #ff6b6b;
             margin: 0;
-        }}
-        .stat-label {{
+        }
+        .stat-label {
             font-size: 0.9em;
             color: #8b949e;
             margin: 5px 0 0;
-        }}
-        .footer {{
+        }
+        .footer {
             text-align: center;
             margin-top: 30px;
             padding: 15px;
             border-top: 1px solid #30363d;
             color: #8b949e;
             font-size: 0.9em;
-        }}
-        .branding {{
+        }
+        .branding {
             background-color: #21262d;
             border-radius: 8px;
             padding: 10px;
             text-align: center;
             margin-top: 20px;
-        }}
-        .branding a {{
+        }
+        .branding a {
             color: #58a6ff;
             text-decoration: none;
             margin: 0 10px;
-        }}
-        .branding a:hover {{
+        }
+        .branding a:hover {
             text-decoration: underline;
-        }}
-        .no-data {{
+        }
+        .no-data {
             text-align: center;
             padding: 40px;
             color: #8b949e;
             font-style: italic;
-        }}
-        .tips {{
+        }
+        .tips {
             background-color: #21262d;
             border-radius: 8px;
             padding: 15px;
             margin-top: 20px;
             border-left: 4px solid #58a6ff;
-        }}
-        .error-log {{
+        }
+        .error-log {
             background-color: #2d1e1e;
             border-radius: 8px;
             padding: 15px;
@@ -435,7 +3624,32 @@ def generate_html_report(users, url, filename):
             font-family: monospace;
             font-size: 0.9em;
             white-space: pre-wrap;
-        }}
+        }
+        .pager {
+            text-align: center;
+            margin: 15px 0;
+        }
+        .pager a {
+            color: #58a6ff;
+            text-decoration: none;
+            margin: 0 10px;
+        }
+        .virtual-view {
+            height: 75vh;
+            overflow-y: auto;
+            position: relative;
+        }
+        .virtual-view .user-card {
+            position: absolute;
+            left: 0;
+            right: 0;
+            box-sizing: border-box;
+            overflow: hidden;
+            transition: none;
+        }
+        .virtual-view .user-card:hover {
+            transform: none;
+        }
     </style>
 </head>
 <body>
@@ -444,73 +3658,73 @@ def generate_html_report(users, url, filename):
             <h1>DarkBoss1BD Web Scraper Report</h1>
             <p>Advanced User Information Extraction Tool</p>
         </div>
+"""
+
+REPORT_NO_DATA = """
+        <div class="no-data">
+            <h2>No User Data Found</h2>
+            <p>The scraper couldn't automatically detect user profiles on this website.</p>
+        </div>
         
+        <div class="tips">
+            <h3>Tips for Better Results:</h3>
+            <ul>
+                <li>Try social media sites (Facebook, Twitter, Instagram) which have standardized profile structures</li>
+                <li>Try forums or community websites with user profiles</li>
+                <li>Try websites with author pages or member directories</li>
+                <li>For custom websites, manual HTML analysis might be needed</li>
+                <li>Some websites require authentication to access user data</li>
+            </ul>
+        </div>
+"""
+
+def _report_card(user):
+    """HTML for one user card, with every field escaped"""
+    esc = html.escape
+    avatar_html = f'<img src="{esc(user.avatar)}" class="user-avatar" alt="Avatar">' if user.avatar else ''
+    profile_url = esc(user.profile_url or '#')
+    return f"""
+            <div class="user-card">
+                {avatar_html}
+                <div class="user-info">
+                    <h3 class="user-name">{esc(str(user.name or 'Unknown'))}</h3>
+                    <p class="user-detail"><span class="label">Email:</span> {esc(str(user.email or 'Not available'))}</p>
+                    <p class="user-detail"><span class="label">Username:</span> {esc(str(user.username or 'Not available'))}</p>
+                    <p class="user-detail"><span class="label">Bio:</span> {esc(str(user.bio or 'No bio available'))}</p>
+                    <p class="user-detail"><span class="label">Profile:</span> <a href="{profile_url}" target="_blank">{profile_url}</a></p>
+                </div>
+                <div style="clear: both;"></div>
+            </div>
+            """
+
+def _report_summary(url, timestamp, total, emails, avatars):
+    """Scraping details and stats, shown above the cards"""
+    return f"""
         <div class="info-box">
             <h2>Scraping Details</h2>
-            <p><strong>Target URL:</strong> {url}</p>
+            <p><strong>Target URL:</strong> {html.escape(url)}</p>
             <p><strong>Scraping Date:</strong> {timestamp}</p>
-            <p><strong>Total Users Found:</strong> {len(users)}</p>
+            <p><strong>Total Users Found:</strong> {total}</p>
         </div>
         
         <div class="stats">
             <div class="stat-box">
-                <p class="stat-number">{len(users)}</p>
+                <p class="stat-number">{total}</p>
                 <p class="stat-label">Users Found</p>
             </div>
             <div class="stat-box">
-                <p class="stat-number">{sum(1 for user in users if 'email' in user)}</p>
+                <p class="stat-number">{emails}</p>
                 <p class="stat-label">Emails Collected</p>
             </div>
             <div class="stat-box">
-                <p class="stat-number">{sum(1 for user in users if 'avatar' in user)}</p>
+                <p class="stat-number">{avatars}</p>
                 <p class="stat-label">Avatars Found</p>
             </div>
         </div>
 """
 
-    if users:
-        html_content += "<h2>User Information</h2>"
-        for i, user in enumerate(users, 1):
-            avatar_html = f'<img src="{user["avatar"]}" class="user-avatar" alt="Avatar">' if 'avatar' in user else ''
-            name = user.get('name', 'Unknown')
-            email = user.get('email', 'Not available')
-            username = user.get('username', 'Not available')
-            bio = user.get('bio', 'No bio available')
-            profile_url = user.get('profile_url', '#')
-            
-            html_content += f"""
-            <div class="user-card">
-                {avatar_html}
-                <div class="user-info">
-                    <h3 class="user-name">{name}</h3>
-                    <p class="user-detail"><span class="label">Email:</span> {email}</p>
-                    <p class="user-detail"><span class="label">Username:</span> {username}</p>
-                    <p class="user-detail"><span class="label">Bio:</span> {bio}</p>
-                    <p class="user-detail"><span class="label">Profile:</span> <a href="{profile_url}" target="_blank">{profile_url}</a></p>
-                </div>
-                <div style="clear: both;"></div>
-            </div>
-            """
-    else:
-        html_content += """
-        <div class="no-data">
-            <h2>No User Data Found</h2>
-            <p>The scraper couldn't automatically detect user profiles on this website.</p>
-        </div>
-        
-        <div class="tips">
-            <h3>Tips for Better Results:</h3>
-            <ul>
-                <li>Try social media sites (Facebook, Twitter, Instagram) which have standardized profile structures</li>
-                <li>Try forums or community websites with user profiles</li>
-                <li>Try websites with author pages or member directories</li>
-                <li>For custom websites, manual HTML analysis might be needed</li>
-                <li>Some websites require authentication to access user data</li>
-            </ul>
-        </div>
-        """
-
-    html_content += f"""
+def _report_footer():
+    return f"""
         <div class="branding">
             <p>Report generated by <strong>DarkBoss1BD Tools</strong></p>
             <p>
@@ -526,14 +3740,230 @@ def generate_html_report(users, url, filename):
 </body>
 </html>
 """
+
+def _count_user(counts, user):
+    counts[0] += 1
+    if user.email:
+        counts[1] += 1
+    if user.avatar:
+        counts[2] += 1
+
+def _spool_file():
+    """Anonymous temporary text file for report parts written before their summary"""
+    import tempfile
+    return tempfile.TemporaryFile('w+', encoding='utf-8')
+
+def write_html_report(f, users, url):
+    """Stream a report to an open text file in one pass over users
+
+    Cards are spooled to a temporary file as they come, so users may be any
+    iterable and memory stays flat; the summary they add up to is written
+    first and the cards are copied in after it.
+    """
+    import shutil
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    counts = [0, 0, 0]
+    with _spool_file() as cards:
+        for user in users:
+            _count_user(counts, user)
+            cards.write(_report_card(user))
+        f.write(REPORT_HEADER)
+        f.write(_report_summary(url, timestamp, *counts))
+        if counts[0]:
+            f.write("<h2>User Information</h2>")
+            cards.seek(0)
+            shutil.copyfileobj(cards, f)
+        else:
+            f.write(REPORT_NO_DATA)
+    f.write(_report_footer())
+    return counts[0]
+
+REPORT_PAGE_SIZE = 500
+REPORT_MODES = ('single', 'paged', 'virtual')
+
+def _page_filename(filename, page):
+    root, ext = os.path.splitext(filename)
+    return f"{root}_p{page}{ext or '.html'}"
+
+def _report_pager(filename, page, has_next):
+    links = [f'<a href="{html.escape(os.path.basename(filename))}">Summary</a>']
+    if page > 1:
+        links.append(f'<a href="{html.escape(os.path.basename(_page_filename(filename, page - 1)))}">&laquo; Previous</a>')
+    links.append(f'<span>Page {page}</span>')
+    if has_next:
+        links.append(f'<a href="{html.escape(os.path.basename(_page_filename(filename, page + 1)))}">Next &raquo;</a>')
+    return f"""
+        <div class="pager">{' '.join(links)}</div>
+"""
+
+def write_paged_report(users, url, filename, page_size=REPORT_PAGE_SIZE):
+    """Write page_size cards per file plus a summary page at filename
+
+    Pages are named <name>_p1.html, <name>_p2.html, ...; at most two pages
+    of users are held in memory (the current one and the lookahead that
+    decides whether it gets a "Next" link).
+    """
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    counts = [0, 0, 0]
+    users = iter(users)
+    batch = list(itertools.islice(users, page_size))
+    page = 0
+    while batch:
+        following = list(itertools.islice(users, page_size))
+        page += 1
+        pager = _report_pager(filename, page, bool(following))
+        with open(_page_filename(filename, page), 'w', encoding='utf-8') as f:
+            f.write(REPORT_HEADER)
+            f.write(pager)
+            for user in batch:
+                _count_user(counts, user)
+                f.write(_report_card(user))
+            f.write(pager)
+            f.write(_report_footer())
+        batch = following
     
+    with open(filename, 'w', encoding='utf-8') as f:
+        f.write(REPORT_HEADER)
+        f.write(_report_summary(url, timestamp, *counts))
+        if page:
+            f.write("<h2>User Information</h2>")
+            f.write('\n        <div class="pager">')
+            for number in range(1, page + 1):
+                name = html.escape(os.path.basename(_page_filename(filename, number)))
+                f.write(f'<a href="{name}">Page {number}</a> ')
+            f.write('</div>\n')
+        else:
+            f.write(REPORT_NO_DATA)
+        f.write(_report_footer())
+    return page
+
+REPORT_VIRTUAL_SCRIPT = """
+        <script>
+        (function () {
+            var records = JSON.parse(document.getElementById('records').textContent);
+            var view = document.getElementById('virtual-view');
+            var spacer = document.getElementById('virtual-spacer');
+            var ROW = 170, OVERSCAN = 5, pending = false;
+            spacer.style.height = (records.length * ROW) + 'px';
+            function detail(label, value) {
+                var p = document.createElement('p');
+                p.className = 'user-detail';
+                var span = document.createElement('span');
+                span.className = 'label';
+                span.textContent = label + ':';
+                p.appendChild(span);
+                p.appendChild(document.createTextNode(' ' + value));
+                return p;
+            }
+            function card(r, i) {
+                var div = document.createElement('div');
+                div.className = 'user-card';
+                div.style.top = (i * ROW) + 'px';
+                div.style.height = (ROW - 15) + 'px';
+                if (r[4]) {
+                    var img = document.createElement('img');
+                    img.className = 'user-avatar';
+                    img.alt = 'Avatar';
+                    img.src = r[4];
+                    div.appendChild(img);
+                }
+                var info = document.createElement('div');
+                info.className = 'user-info';
+                var h3 = document.createElement('h3');
+                h3.className = 'user-name';
+                h3.textContent = r[0] || 'Unknown';
+                info.appendChild(h3);
+                info.appendChild(detail('Email', r[1] || 'Not available'));
+                info.appendChild(detail('Username', r[2] || 'Not available'));
+                info.appendChild(detail('Bio', r[3] || 'No bio available'));
+                var profile = detail('Profile', '');
+                var a = document.createElement('a');
+                a.href = r[5] || '#';
+                a.target = '_blank';
+                a.textContent = r[5] || '#';
+                profile.appendChild(a);
+                info.appendChild(profile);
+                div.appendChild(info);
+                return div;
+            }
+            function render() {
+                pending = false;
+                var first = Math.max(0, Math.floor(view.scrollTop / ROW) - OVERSCAN);
+                var last = Math.min(records.length, Math.ceil((view.scrollTop + view.clientHeight) / ROW) + OVERSCAN);
+                spacer.textContent = '';
+                for (var i = first; i < last; i++) {
+                    spacer.appendChild(card(records[i], i));
+                }
+            }
+            view.addEventListener('scroll', function () {
+                if (!pending) {
+                    pending = true;
+                    requestAnimationFrame(render);
+                }
+            });
+            render();
+        })();
+        </script>
+"""
+
+def _compact_record(user):
+    """One user as a JSON array that is safe inside a <script> element"""
+    row = [user.name, user.email, user.username, user.bio, user.avatar, user.profile_url]
+    return json.dumps(row, ensure_ascii=False, separators=(',', ':')).replace('<', '\\u003c')
+
+def write_virtual_report(f, users, url):
+    """Stream a single-page report that only renders the visible cards
+
+    Records are embedded as compact JSON and drawn by a small inline script
+    as the list scrolls, so the page opens quickly whatever the user count.
+    They are spooled like the cards of write_html_report.
+    """
+    import shutil
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    counts = [0, 0, 0]
+    with _spool_file() as records:
+        for user in users:
+            if counts[0]:
+                records.write(',')
+            _count_user(counts, user)
+            records.write(_compact_record(user))
+        f.write(REPORT_HEADER)
+        f.write(_report_summary(url, timestamp, *counts))
+        f.write('\n        <script type="application/json" id="records">[')
+        records.seek(0)
+        shutil.copyfileobj(records, f)
+        f.write(']</script>\n')
+    if counts[0]:
+        f.write("<h2>User Information</h2>")
+        f.write('\n        <div class="virtual-view" id="virtual-view"><div id="virtual-spacer" style="position: relative;"></div></div>\n')
+        f.write(REPORT_VIRTUAL_SCRIPT)
+    else:
+        f.write(REPORT_NO_DATA)
+    f.write(_report_footer())
+    return counts[0]
+
+def generate_html_report(users, url, filename, mode='single', page_size=REPORT_PAGE_SIZE):
+    """Generate a beautiful HTML report
+
+    mode is 'single' (every card in one file), 'paged' (page_size cards per
+    file behind a summary page) or 'virtual' (one file that renders only
+    the visible window of cards).
+    """
+    if mode not in REPORT_MODES:
+        raise ValueError(f"unknown report mode {mode!r}; expected one of {REPORT_MODES}")
     try:
-        with open(filename, 'w', encoding='utf-8') as f:
-            f.write(html_content)
-        print(f"[+] HTML report generated: {filename}")
+        if mode == 'paged':
+            write_paged_report(users, url, filename, page_size)
+        else:
+            with open(filename, 'w', encoding='utf-8') as f:
+                if mode == 'virtual':
+                    write_virtual_report(f, users, url)
+                else:
+                    write_html_report(f, users, url)
+        report_log.info("HTML report generated: %s", filename)
         return filename
     except Exception as e:
-        print(f"[!] Failed to generate HTML report: {e}")
+        report_log.error("Failed to generate HTML report: %s", e)
         return None
 
 def save_results(users, filename):
@@ -559,30 +3989,32 @@ def save_results(users, filename):
                 f.write("- For custom sites, manual HTML analysis might be needed\n")
                 f.write("- Some websites require authentication to access user data\n")
         
-        print(f"[+] Results saved to {filename}")
+        report_log.info("Results saved to %s", filename)
     except Exception as e:
-        print(f"[!] Failed to save results: {e}")
+        report_log.error("Failed to save results: %s", e)
 
 def main():
-    """Main program"""
+    """Interactive program: prompts for a URL and opens the report when done"""
+    setup_logging()
     display_branding()
-    time.sleep(2)
     open_links()
-    time.sleep(3)
     
-    print("\n[*] Starting advanced web scraping tool...")
-    time.sleep(1)
+    log.info("Starting advanced web scraping tool...")
     
     # Target URL
     target_url = input("\n[?] Enter target website URL: ").strip()
     
     if not target_url:
-        print("[!] URL required")
+        log.warning("URL required")
         return
     
     # URL validation
-    if not target_url.startswith(('http://', 'https://')):
-        target_url = 'https://' + target_url
+    target_url = normalize_target_url(target_url)
+    
+    # Repeated runs against the same site are served from the disk cache
+    # and go straight to the extraction path that worked last time
+    enable_cache()
+    enable_site_profiles()
     
     # Scrape website using multiple methods
     users = scrape_users_from_website(target_url)
@@ -591,6 +4023,15 @@ def main():
     text_filename = f"darkboss_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
     save_results(users, text_filename)
     
+    # Machine-readable copy for downstream tooling
+    jsonl_filename = f"darkboss_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl"
+    try:
+        with open_sink(jsonl_filename) as sink:
+            sink.write_all(users)
+        report_log.info("JSONL results saved to %s", jsonl_filename)
+    except OSError as e:
+        report_log.error("Failed to save JSONL results: %s", e)
+    
     # Generate HTML report
     html_filename = f"darkboss_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.html"
     html_file = generate_html_report(users, target_url, html_filename)
@@ -598,18 +4039,276 @@ def main():
     # Open HTML report in browser
     if html_file:
         try:
+            import webbrowser
             webbrowser.open('file://' + os.path.abspath(html_file))
-            print("[+] HTML report opened in browser")
+            log.info("HTML report opened in browser")
         except:
-            print("[!] Could not open HTML report automatically")
+            log.warning("Could not open HTML report automatically")
+    
+    if HTTP_CACHE is not None:
+        fetch_log.info("Cache: %s", HTTP_CACHE.summary())
+    if SITE_PROFILES is not None:
+        extract_log.info("Site profiles: %s", SITE_PROFILES.summary())
     
     if users:
-        print(f"[+] Found information for {len(users)} users")
-        print("\n[+] Process completed successfully!")
+        log.info("Found information for %d users", len(users))
+        log.info("Process completed successfully!")
+    else:
+        log.warning("No user information found with automated methods")
+        log.info("Try social media sites or community websites for better results")
+        log.info("Some websites require authentication or have anti-scraping measures")
+
+JOURNAL_NAME = 'darkboss_journal.jsonl'
+CHECKPOINT_EVERY = 10
+CHECKPOINT_SECONDS = 5.0
+
+class RunJournal:
+    """Append-only checkpoint log of a batch run
+
+    The first line describes the run (the timestamp used in output names,
+    the formats and the output files). Each checkpoint line lists the URLs
+    finished since the previous one and the size of every output file, and
+    is fsynced after the outputs themselves. A resumed run skips finished
+    URLs and cuts the outputs back to the last checkpoint, so records
+    written after it are not duplicated when their URLs run again.
+    Checkpoints are taken every `every` URLs or `seconds` seconds.
+    """
+    def __init__(self, path, every=CHECKPOINT_EVERY, seconds=CHECKPOINT_SECONDS):
+        self.path = path
+        self.every = max(1, every)
+        self.seconds = seconds
+        self.run = None
+        self.done = set()
+        self.sizes = {}
+        self.records = 0
+        self._pending = []
+        self._pending_records = 0
+        self._last = time.monotonic()
+        self._file = None
+
+    def load(self):
+        """Read an existing journal to resume it; False if there is none"""
+        try:
+            f = open(self.path, 'rb')
+        except FileNotFoundError:
+            return False
+        valid = 0
+        with f:
+            for line in f:
+                try:
+                    if not line.endswith(b'\n'):
+                        raise ValueError('torn line')
+                    entry = json.loads(line)
+                except ValueError:
+                    # The run died while writing this line
+                    break
+                if 'run' in entry:
+                    self.run = entry['run']
+                else:
+                    self.done.update(entry['done'])
+                    self.sizes = entry['sizes']
+                    self.records = entry['records']
+                valid += len(line)
+        if self.run is None:
+            return False
+        os.truncate(self.path, valid)
+        self._file = open(self.path, 'a', encoding='utf-8')
+        return True
+
+    def start(self, run):
+        """Begin a new journal, replacing any previous one"""
+        self.run = run
+        self._file = open(self.path, 'w', encoding='utf-8')
+        self._write({'run': run})
+
+    def restore_outputs(self):
+        """Cut the outputs back to their size at the last checkpoint"""
+        for path in self.run['outputs']:
+            size = self.sizes.get(path) or 0
+            if os.path.exists(path) and os.path.getsize(path) > size:
+                os.truncate(path, size)
+
+    def _write(self, entry):
+        self._file.write(json.dumps(entry) + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def finished(self, url, records):
+        """Note a URL whose records have been handed to the outputs"""
+        self._pending.append(url)
+        self._pending_records += records
+
+    def due(self):
+        return len(self._pending) >= self.every or (
+            bool(self._pending) and time.monotonic() - self._last >= self.seconds)
+
+    def checkpoint(self, sinks):
+        """Make the outputs durable, then record the finished URLs and output sizes"""
+        sizes = {sink.name: sink.sync() for sink in sinks}
+        self.done.update(self._pending)
+        self.records += self._pending_records
+        self._write({'done': self._pending, 'sizes': sizes, 'records': self.records})
+        self._pending = []
+        self._pending_records = 0
+        self._last = time.monotonic()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+CLI_FORMATS = ('text', 'html') + tuple(SINK_FORMATS)
+
+def read_url_list(path):
+    """URLs from a file (or '-' for stdin), one per line; blank lines and # comments are skipped"""
+    f = sys.stdin if path == '-' else open(path, encoding='utf-8')
+    try:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith('#')]
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+def normalize_target_url(url):
+    if not url.startswith(('http://', 'https://')):
+        url = 'https://' + url
+    return url
+
+def _output_path(directory, prefix, stamp, ext, url=None, index=None):
+    parts = [prefix]
+    if index is not None:
+        parts.append(f"{index:03d}")
+    if url is not None:
+        parts.append(re.sub(r'[^A-Za-z0-9.-]+', '_', urlparse(url).netloc) or 'site')
+    parts.append(stamp)
+    return os.path.join(directory, '_'.join(parts) + ext)
+
+def cli_main(argv=None):
+    """Non-interactive entry point: scrape one or more URLs and write the chosen outputs"""
+    parser = argparse.ArgumentParser(
+        prog='Website_scrape_bd.py',
+        description='Extract public user information from websites',
+        epilog='Run without arguments for the interactive mode (URLs piped to stdin are scraped in batch), '
+               'or use "corpus" for saved pages.',
+    )
+    parser.add_argument('urls', nargs='*', metavar='URL', help='websites to scrape')
+    parser.add_argument('-i', '--input', metavar='FILE', help="file with one URL per line ('-' for stdin)")
+    parser.add_argument('-d', '--output-dir', default='.', help='directory for the output files')
+    parser.add_argument('-f', '--format', action='append', choices=CLI_FORMATS,
+                        help='output format, may be repeated (default: jsonl)')
+    parser.add_argument('--report-mode', choices=REPORT_MODES, default='single', help='HTML report layout')
+    parser.add_argument('-c', '--concurrency', type=int, default=4, help='sites scraped at once')
+    parser.add_argument('--per-host', type=int, default=2, help='concurrent requests per host')
+    parser.add_argument('--stream', action='store_true', help='parse pages while they download')
+    parser.add_argument('--body-only', action='store_true', help='ignore everything outside <body>')
+    parser.add_argument('--no-prune', action='store_true',
+                        help='also scan script, style and SVG content and data: URIs')
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help='response cache directory')
+    parser.add_argument('--no-cache', action='store_true', help='do not use the response cache')
+    parser.add_argument('--profiles', default=DEFAULT_PROFILE_DB, metavar='PATH',
+                        help='per-site extraction profile database')
+    parser.add_argument('--no-profiles', action='store_true', help='always run the full extraction chain')
+    parser.add_argument('--open', action='store_true', help='open the HTML reports in a browser')
+    parser.add_argument('--resume', action='store_true', help='continue an interrupted run from its journal')
+    parser.add_argument('--journal', metavar='PATH', help=f'checkpoint journal (default: OUTPUT_DIR/{JOURNAL_NAME})')
+    parser.add_argument('--checkpoint-every', type=int, default=CHECKPOINT_EVERY, metavar='N',
+                        help='sites finished between checkpoints')
+    add_parser_argument(parser)
+    add_observability_arguments(parser)
+    args = parser.parse_args(argv)
+    setup_observability(args, stream=sys.stderr)
+    if args.parser:
+        try:
+            enable_parser_backend(args.parser)
+        except ValueError as e:
+            parser.error(str(e))
+    
+    urls = list(args.urls)
+    if args.input:
+        urls.extend(read_url_list(args.input))
+    if not urls:
+        parser.error('no URLs given (pass them as arguments or with --input)')
+    urls = [normalize_target_url(url) for url in urls]
+    formats = args.format or ['jsonl']
+    
+    HTTP_FETCHER.max_per_host = max(1, args.per_host)
+    if not args.no_cache:
+        enable_cache(args.cache_dir)
+    if not args.no_profiles:
+        enable_site_profiles(args.profiles)
+    os.makedirs(args.output_dir, exist_ok=True)
+    multiple = len(urls) > 1
+    
+    # Finished sites and output sizes are checkpointed so a run can resume
+    journal = RunJournal(args.journal or os.path.join(args.output_dir, JOURNAL_NAME), args.checkpoint_every)
+    resuming = args.resume and journal.load()
+    if resuming:
+        stamp, formats = journal.run['stamp'], journal.run['formats']
+        journal.restore_outputs()
+        log.info("Resuming run %s: %d of %d sites already done", stamp, len(journal.done.intersection(urls)),
+                 len(urls))
     else:
-        print("[!] No user information found with automated methods")
-        print("[*] Try social media sites or community websites for better results")
-        print("[*] Some websites require authentication or have anti-scraping measures")
+        if args.resume:
+            log.warning("No journal at %s, starting a new run", journal.path)
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    
+    # Machine-readable formats collect every site into one file
+    sink_paths = [(fmt, _output_path(args.output_dir, 'darkboss_results', stamp, SINK_FORMATS[fmt].extension))
+                  for fmt in dict.fromkeys(formats) if fmt in SINK_FORMATS]
+    if not resuming:
+        journal.start({'stamp': stamp, 'formats': formats, 'outputs': [path for _, path in sink_paths]})
+    sinks = [open_sink(path, fmt, append=resuming) for fmt, path in sink_paths]
+    todo = [(index, url) for index, url in enumerate(urls, 1) if url not in journal.done]
+    prune = not args.no_prune
+    pipeline = ExtractionPipeline([HTMLStage(prune=prune, body_only=args.body_only),
+                                   RegexStage(prune=prune, body_only=args.body_only), EndpointStage()])
+    reports = []
+    log.debug("Ready to fetch %.1f ms after startup", (time.perf_counter() - IMPORTED_AT) * 1000)
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as executor:
+            scrape = lambda url: scrape_users_from_website(url, stream=args.stream, pipeline=pipeline)
+            for (index, url), users in zip(todo, executor.map(scrape, [url for _, url in todo])):
+                for sink in sinks:
+                    sink.write_all(users)
+                position = index if multiple else None
+                if 'text' in formats:
+                    save_results(users, _output_path(args.output_dir, 'darkboss_results', stamp, '.txt',
+                                                     url, position))
+                if 'html' in formats:
+                    report = generate_html_report(users, url, _output_path(args.output_dir, 'darkboss_report',
+                                                                           stamp, '.html', url, position),
+                                                  mode=args.report_mode)
+                    if report:
+                        reports.append(report)
+                journal.finished(url, len(users))
+                if journal.due():
+                    journal.checkpoint(sinks)
+        # Only a clean finish checkpoints here: an interrupted site may have
+        # written part of its records, and the resumed run redoes it
+        journal.checkpoint(sinks)
+    finally:
+        journal.close()
+        for sink in sinks:
+            sink.close()
+            report_log.info("%d users written to %s", sink.count, sink.name)
+    
+    if args.open:
+        import webbrowser
+        for report in reports:
+            webbrowser.open('file://' + os.path.abspath(report))
+    if HTTP_CACHE is not None:
+        fetch_log.info("Cache: %s", HTTP_CACHE.summary())
+    if SITE_PROFILES is not None:
+        extract_log.info("Site profiles: %s", SITE_PROFILES.summary())
+    log.info("Found information for %d users across %d sites", journal.records, len(urls))
+    write_metrics(args)
+    return 0
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == 'corpus':
+        sys.exit(corpus_main(sys.argv[2:]))
+    if len(sys.argv) > 1:
+        sys.exit(cli_main(sys.argv[1:]))
+    if sys.stdin is not None and not sys.stdin.isatty():
+        # URLs piped in: echo https://example.com | python Website_scrape_bd.py
+        sys.exit(cli_main(['--input', '-']))
     main()
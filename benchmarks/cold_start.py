@@ -0,0 +1,77 @@
+"""Measure CLI cold start: process launch to the first HTTP request
+
+    python benchmarks/cold_start.py --repeat 10
+
+Serves a tiny page from a local server, runs the batch CLI against it from
+a temporary directory with the response cache and site profiles off, and
+records when the first request arrives. Also reports the module import
+time on its own.
+"""
+import argparse
+import http.server
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT = os.path.join(ROOT, 'Website_scrape_bd.py')
+PAGE = b'<html><body><div class="user-card"><h3>Jane Roe</h3></div></body></html>'
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    first_request = None
+
+    def do_GET(self):
+        if _Handler.first_request is None:
+            _Handler.first_request = time.perf_counter()
+        body = PAGE if self.path == '/' else b''
+        self.send_response(200 if body else 404)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def _run_cli(url, work_dir):
+    # No cache or learned profile may turn a run into a replay, and none is
+    # left in the working directory: the profile and cache paths are relative
+    _Handler.first_request = None
+    started = time.perf_counter()
+    subprocess.run([sys.executable, SCRIPT, url, '-d', work_dir, '--no-cache', '--no-profiles',
+                    '--log-level', 'ERROR'], check=True, stdin=subprocess.DEVNULL, cwd=work_dir)
+    finished = time.perf_counter()
+    return _Handler.first_request - started, finished - started
+
+def _import_time():
+    started = time.perf_counter()
+    subprocess.run([sys.executable, '-c', 'import Website_scrape_bd'], check=True, cwd=ROOT)
+    return time.perf_counter() - started
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+    
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{server.server_address[1]}/'
+    first, total, imports = [], [], []
+    with tempfile.TemporaryDirectory() as work_dir:
+        for _ in range(args.repeat):
+            to_first, to_exit = _run_cli(url, work_dir)
+            first.append(to_first)
+            total.append(to_exit)
+            imports.append(_import_time())
+    server.shutdown()
+    
+    for label, values in (('python -c import', imports), ('first request', first), ('process exit', total)):
+        print(f"{label:>16}: median {statistics.median(values) * 1000:7.1f} ms, "
+              f"min {min(values) * 1000:7.1f} ms")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""Check that every installed parser backend finds the same records
+
+    python benchmarks/parity.py --sizes 256K 1M
+
+Parses each synthetic page kind plus a few malformed snippets with every
+available backend, compares the records with html.parser's and reports
+each backend's parse time and speedup. Exits with status 1 on a mismatch.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Website_scrape_bd as scraper
+from run_benchmarks import BASE_URL, parse_size
+from synthetic import PAGE_KINDS, generate_page
+
+# Markup the two tokenizers repair differently
+SNIPPETS = {
+    'unclosed': '<div class="user-card"><p>Ann Smith<p>ann@example.com<p>ann_smith</div>',
+    'stray_end': '<div class="member"></span><b>Omar Haddad</b></i><i>omar@example.com</i></div></div>',
+    'entities': '<div class="profile"><h3>Jos&eacute; N&uacute;&ntilde;ez</h3><span>jose&#64;example.com</span></div>',
+    'no_body': '<li class="author"><a href="/user/lena">Lena Fischer</a> lena@example.com',
+    'implied_li': '<ul><li class="member">Ivan Ivanov<span>ivan@example.com</span>'
+                  '<li class="member">Olga Petrova<span>olga@example.com</span></ul>',
+    'empty': '',
+}
+
+def parse(text, backend, repeat=1):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parser = scraper.AdvancedDarkBossScraper(BASE_URL, backend=backend)
+        parser.feed(text)
+        parser.close()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return [user.to_dict() for user in parser.users], best
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--kinds', nargs='+', default=list(PAGE_KINDS), choices=PAGE_KINDS)
+    parser.add_argument('--sizes', nargs='+', default=list(map(parse_size, ['256K', '1M'])), type=parse_size)
+    parser.add_argument('--repeat', type=int, default=3, help='timing runs per case (best is kept)')
+    args = parser.parse_args(argv)
+    
+    reference = scraper.HTMLParserBackend
+    backends = [scraper.get_parser_backend(name) for name in scraper.available_parser_backends()]
+    others = [backend for backend in backends if backend is not reference]
+    if not others:
+        print("[!] Only html.parser is installed; nothing to compare (pip install lxml)")
+    
+    # Pay any lazy imports before the timed runs
+    for backend in backends:
+        parse('', backend)
+    
+    cases = [(name, text) for name, text in SNIPPETS.items()]
+    for kind in args.kinds:
+        for size in args.sizes:
+            data, charset = generate_page(kind, size)
+            cases.append((f"{kind}/{len(data)}", data.decode(charset)))
+    
+    mismatches = 0
+    header = ''.join(f" {backend.name + ' ms':>15} {'speedup':>8}" for backend in others)
+    print(f"{'case':<25} {'records':>8} {'html.parser ms':>15}{header}")
+    for name, text in cases:
+        expected, baseline = parse(text, reference, args.repeat)
+        line = f"{name:<25} {len(expected):>8} {baseline * 1000:>15.1f}"
+        for backend in others:
+            records, seconds = parse(text, backend, args.repeat)
+            line += f" {seconds * 1000:>15.1f} {baseline / seconds if seconds else 0:>7.1f}x"
+            if records != expected:
+                mismatches += 1
+                missing = [r for r in expected if r not in records]
+                extra = [r for r in records if r not in expected]
+                line += f"  MISMATCH ({len(missing)} missing, {len(extra)} extra)"
+        print(line)
+    if mismatches:
+        print(f"[!] {mismatches} case(s) differ between backends")
+        return 1
+    print("[+] All backends agree")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,63 @@
+"""Measure first-pass recall of the HTML parser on synthetic pages
+
+    python benchmarks/recall.py --sizes 256K 1M
+
+Every synthetic card carries exactly one @example.com address, so recall
+is the share of those addresses found in the parsed records. Complete
+records have a name, an email and an avatar.
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Website_scrape_bd as scraper
+from run_benchmarks import BASE_URL, parse_size
+from synthetic import generate_page
+
+EMAIL_RE = re.compile(r'[\w.]+@example\.com')
+KINDS = ('cards', 'nested', 'layouts', 'mixed_encoding')
+
+def measure(kind, size, repeat):
+    data, charset = generate_page(kind, size)
+    text = data.decode(charset)
+    expected = set(EMAIL_RE.findall(text))
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parser = scraper.AdvancedDarkBossScraper(BASE_URL)
+        parser.feed(text)
+        parser.close()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    found = {user.email for user in parser.users if user.email} & expected
+    complete = sum(1 for user in parser.users if user.name and user.email and user.avatar)
+    return {
+        'kind': kind,
+        'size': len(data),
+        'cards': len(expected),
+        'records': len(parser.users),
+        'recall': len(found) / len(expected) if expected else 1.0,
+        'complete': complete / len(expected) if expected else 1.0,
+        'seconds': best,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--kinds', nargs='+', default=list(KINDS), choices=KINDS)
+    parser.add_argument('--sizes', nargs='+', default=list(map(parse_size, ['256K', '1M'])), type=parse_size)
+    parser.add_argument('--repeat', type=int, default=3, help='timing runs per case (best is kept)')
+    args = parser.parse_args(argv)
+    
+    print(f"{'kind':<15} {'size':>9} {'cards':>6} {'records':>8} {'recall':>7} {'complete':>9} {'ms':>8}")
+    for kind in args.kinds:
+        for size in args.sizes:
+            row = measure(kind, size, args.repeat)
+            print(f"{row['kind']:<15} {row['size']:>9} {row['cards']:>6} {row['records']:>8} "
+                  f"{row['recall']:>7.1%} {row['complete']:>9.1%} {row['seconds'] * 1000:>8.1f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""Compare the memory of UserRecord with the plain dict form of a user
+
+    python benchmarks/record_memory.py --count 200000
+
+Parses a synthetic card page to get realistic records, then builds --count
+users of each form from the same field values and reports the
+`tracemalloc` bytes per user, for the containers alone (values shared) and
+with fresh value strings per user.
+"""
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Website_scrape_bd as scraper
+from run_benchmarks import BASE_URL
+from synthetic import generate_page
+
+def sample_users(size=256 * 1024):
+    data, charset = generate_page('cards', size)
+    parser = scraper.AdvancedDarkBossScraper(BASE_URL)
+    parser.feed(data.decode(charset))
+    parser.close()
+    return [user.to_dict() for user in parser.users]
+
+def as_dict(fields, method):
+    user = dict(fields)
+    user['method'] = method
+    return user
+
+def as_record(fields, method):
+    return scraper.UserRecord.from_dict(fields, method)
+
+def measure(build, samples, count, fresh):
+    """Bytes per user held by count users made with build"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    users = []
+    for i in range(count):
+        fields = samples[i % len(samples)]
+        if fresh:
+            fields = {key: f"{value}#{i}" for key, value in fields.items()}
+        users.append(build(fields, 'html'))
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del users
+    return used / count
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--count', type=int, default=200000)
+    args = parser.parse_args(argv)
+
+    samples = [{key: value for key, value in user.items() if key != 'method'} for user in sample_users()]
+    fields = sum(len(user) for user in samples) / len(samples)
+    print(f"{args.count} users, {fields:.1f} fields each on average")
+    print(f"{'values':<10} {'dict B/user':>12} {'record B/user':>14} {'saved':>7}")
+    for fresh in (False, True):
+        dicts = measure(as_dict, samples, args.count, fresh)
+        records = measure(as_record, samples, args.count, fresh)
+        print(f"{'fresh' if fresh else 'shared':<10} {dicts:>12.0f} {records:>14.0f} {1 - records / dicts:>6.0%}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
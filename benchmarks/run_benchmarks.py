@@ -0,0 +1,265 @@
+"""Benchmark the extraction pipeline on synthetic pages
+
+    python benchmarks/run_benchmarks.py --sizes 256K 1M 4M -o results.json
+    python benchmarks/run_benchmarks.py --compare results.json
+
+Reports throughput (MB/s, records/s), per-stage timings and peak traced
+memory for each page kind and size, and saves them as JSON. With
+--compare, stages that got slower than the baseline by more than
+--threshold are listed and the exit status is 1.
+"""
+import argparse
+import http.server
+import io
+import json
+import os
+import platform
+import sys
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Website_scrape_bd as scraper
+from synthetic import PAGE_KINDS, generate_page
+
+BASE_URL = 'https://example.com/members'
+
+def _parse(text):
+    parser = scraper.AdvancedDarkBossScraper(BASE_URL)
+    parser.feed(text)
+    parser.close()
+    return parser.users
+
+def _stream_parse(text):
+    chunk = scraper.STREAM_CHUNK_SIZE
+    parser = scraper.AdvancedDarkBossScraper(BASE_URL)
+    return list(parser.feed_chunks(text[i:i + chunk] for i in range(0, len(text), chunk)))
+
+def _regex(text):
+    return scraper.extract_users_from_patterns(text, BASE_URL)
+
+def _prune(text):
+    return scraper.prune_markup(text)[0]
+
+def _pruned_parse(text):
+    return _parse(_prune(text))
+
+def _pruned_regex(text):
+    return _regex(_prune(text))
+
+def _stream_http(url):
+    """Parse while downloading; returns (users, seconds to the first user)"""
+    start = time.perf_counter()
+    first = None
+    users = []
+    for user in scraper.stream_users_from_website(url, prune=False):
+        if first is None:
+            first = time.perf_counter() - start
+        users.append(user)
+    return users, first
+
+def _fetch_http(url):
+    """Download the whole page, then parse it; the first user comes with the last"""
+    start = time.perf_counter()
+    parser = scraper.AdvancedDarkBossScraper(url)
+    parser.feed(scraper.get_web_content(url) or '')
+    parser.close()
+    return parser.users, (time.perf_counter() - start) if parser.users else None
+
+class PageServer:
+    """Serve one page from a local HTTP server, throttled to rate bytes/s"""
+    BLOCK = 64 * 1024
+
+    def __init__(self, data, charset, rate=None):
+        page = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != '/page':
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', f'text/html; charset={charset}')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                view = memoryview(data)
+                for i in range(0, len(data), page.BLOCK):
+                    self.wfile.write(view[i:i + page.BLOCK])
+                    if rate:
+                        time.sleep(page.BLOCK / rate)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/page"
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+def _report(users):
+    out = io.StringIO()
+    scraper.write_html_report(out, users, BASE_URL)
+    return users
+
+# name -> (function, input): 'text' stages take the decoded page,
+# 'users' stages take the records produced by the parse stage and
+# 'url' stages fetch the page from a local server, returning (users, first)
+STAGES = {
+    # Charset sniffed from the page itself, as for a server that sends none
+    'decode': (lambda data, charset: scraper.decode_body(data), 'bytes'),
+    'parse': (_parse, 'text'),
+    'stream_parse': (_stream_parse, 'text'),
+    'regex': (_regex, 'text'),
+    # Same work after the pruning pre-pass, whose time is included
+    'prune': (_prune, 'text'),
+    'pruned_parse': (_pruned_parse, 'text'),
+    'pruned_regex': (_pruned_regex, 'text'),
+    'report': (_report, 'users'),
+    # Time to the first user and peak memory: incremental vs read-then-parse
+    'stream_http': (_stream_http, 'url'),
+    'fetch_http': (_fetch_http, 'url'),
+}
+
+def parse_size(value):
+    units = {'K': 1024, 'M': 1024 * 1024}
+    value = value.strip().upper()
+    if value[-1] in units:
+        return int(float(value[:-1]) * units[value[-1]])
+    return int(value)
+
+def _call(stage, data, charset, text, users, url=None):
+    func, kind = STAGES[stage]
+    if kind == 'bytes':
+        return func(data, charset)
+    if kind == 'users':
+        return func(users)
+    if kind == 'url':
+        return func(url)
+    return func(text)
+
+def run_case(kind, size, stages, repeat, rate=None):
+    data, charset = generate_page(kind, size)
+    text = data.decode(charset, errors='ignore')
+    users = _parse(text)
+    if any(STAGES[stage][1] == 'url' for stage in stages):
+        with PageServer(data, charset, rate) as server:
+            return _run_stages(kind, data, charset, text, users, stages, repeat, server.url)
+    return _run_stages(kind, data, charset, text, users, stages, repeat)
+
+def _run_stages(kind, data, charset, text, users, stages, repeat, url=None):
+    results = []
+    for stage in stages:
+        best = first = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            output = _call(stage, data, charset, text, users, url)
+            elapsed = time.perf_counter() - start
+            if STAGES[stage][1] == 'url':
+                output, first_seconds = output
+                if first_seconds is not None:
+                    first = first_seconds if first is None else min(first, first_seconds)
+            best = elapsed if best is None else min(best, elapsed)
+        records = len(output) if isinstance(output, list) else 0
+        if stage == 'decode' and output != text:
+            print(f"warning: {kind} page ({charset}) decoded differently from its declared charset",
+                  file=sys.stderr)
+        if stage.startswith('pruned_') and output != _call(stage[len('pruned_'):], data, charset, text, users):
+            print(f"warning: {kind} page gives different {stage[len('pruned_'):]} records once pruned",
+                  file=sys.stderr)
+        
+        tracemalloc.start()
+        _call(stage, data, charset, text, users, url)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        
+        results.append({
+            'kind': kind,
+            'size': len(data),
+            'stage': stage,
+            'seconds': round(best, 6),
+            'mb_per_s': round(len(data) / 1048576 / best, 3) if best else None,
+            'records': records,
+            'records_per_s': round(records / best, 1) if best and records else 0,
+            'peak_kb': peak // 1024,
+            'first_ms': round(first * 1000, 1) if first is not None else None,
+        })
+    return results
+
+def compare(results, baseline, threshold):
+    """Return the result rows that are slower than baseline by > threshold"""
+    previous = {(r['kind'], r['size'], r['stage']): r for r in baseline['results']}
+    regressions = []
+    for row in results:
+        old = previous.get((row['kind'], row['size'], row['stage']))
+        if old and old['seconds'] and row['seconds'] > old['seconds'] * (1 + threshold):
+            regressions.append((row, old))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--kinds', nargs='+', default=list(PAGE_KINDS), choices=PAGE_KINDS)
+    parser.add_argument('--sizes', nargs='+', default=list(map(parse_size, ['256K', '1M', '4M'])), type=parse_size)
+    parser.add_argument('--stages', nargs='+', default=list(STAGES), choices=list(STAGES))
+    parser.add_argument('--repeat', type=int, default=3, help='timing runs per case (best is kept)')
+    parser.add_argument('--rate', type=parse_size, default=parse_size('8M'),
+                        help='bytes per second the local server sends for the http stages (0: unthrottled)')
+    parser.add_argument('--parser', choices=scraper.available_parser_backends(),
+                        help='tokenizer for the parse stages (default: html.parser)')
+    parser.add_argument('-o', '--output', help='write results to this JSON file')
+    parser.add_argument('--compare', help='baseline JSON file from an earlier run')
+    parser.add_argument('--threshold', type=float, default=0.2, help='allowed slowdown before a regression is reported')
+    args = parser.parse_args(argv)
+    backend = scraper.enable_parser_backend(args.parser)
+    # The http stages hit one local host over and over
+    scraper.HTTP_FETCHER.min_delay = 0
+    
+    results = []
+    print(f"{'kind':<15} {'size':>9} {'stage':<13} {'ms':>9} {'MB/s':>8} {'rec/s':>10} {'peak KB':>8} {'first ms':>9}")
+    for kind in args.kinds:
+        for size in args.sizes:
+            for row in run_case(kind, size, args.stages, args.repeat, args.rate or None):
+                results.append(row)
+                print(f"{row['kind']:<15} {row['size']:>9} {row['stage']:<13} {row['seconds'] * 1000:>9.1f} "
+                      f"{row['mb_per_s'] or 0:>8.1f} {row['records_per_s']:>10.0f} {row['peak_kb']:>8} "
+                      f"{row['first_ms'] if row['first_ms'] is not None else '-':>9}")
+    
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'parser': backend.name,
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"[+] Results saved to {args.output}")
+    
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline['meta'].get('parser', 'html.parser') != backend.name:
+            print(f"[!] Baseline was parsed with {baseline['meta'].get('parser', 'html.parser')}, "
+                  f"this run with {backend.name}")
+        regressions = compare(results, baseline, args.threshold)
+        for row, old in regressions:
+            print(f"[!] {row['kind']} {row['size']} {row['stage']}: "
+                  f"{old['seconds'] * 1000:.1f} ms -> {row['seconds'] * 1000:.1f} ms")
+        if regressions:
+            return 1
+        print("[+] No regressions against baseline")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
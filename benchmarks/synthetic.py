@@ -0,0 +1,148 @@
+"""Deterministic synthetic pages for benchmarking the extraction pipeline"""
+import random
+
+FIRST_NAMES = ['John', 'Ann', 'Rahim', 'Maria', 'Kenji', 'Olga', 'Lena', 'Omar', 'Sofia', 'Ivan']
+LAST_NAMES = ['Doe', 'Smith', 'Karim', 'Garcia', 'Tanaka', 'Petrova', 'Fischer', 'Haddad', 'Rossi', 'Ivanov']
+WORDS = ['lorem', 'ipsum', 'dolor', 'sit', 'amet', 'consectetur', 'adipiscing', 'elit',
+         'sed', 'do', 'eiusmod', 'tempor', 'incididunt', 'labore', 'magna', 'aliqua']
+
+# Non-ASCII names per charset, so decoding mistakes change the output
+ENCODED_NAMES = {
+    'latin-1': ['José Núñez', 'Françoise Gérard', 'Jürgen Müller'],
+    'cp1251': ['Иван Петров', 'Ольга Смирнова', 'Дмитрий Козлов'],
+    'shift_jis': ['田中 太郎', '山田 花子', '佐藤 健'],
+    'utf-8': ['Zoë Ångström', 'Łukasz Żak', 'Çağrı Öztürk'],
+}
+
+PAGE_KINDS = ('cards', 'nested', 'layouts', 'nomatch', 'scripts', 'modern', 'mixed_encoding')
+
+def _sentence(rng, n):
+    return ' '.join(rng.choice(WORDS) for _ in range(n))
+
+def _card(rng, i, name=None):
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    name = name or f"{first} {last}"
+    handle = f"{first.lower()}_{last.lower()}{i}"
+    return (
+        f'<div class="user-card" data-user-id="{i}">'
+        f'<img src="/static/avatars/{i % 50}.png" alt="User avatar">'
+        f'<a href="/user/{handle}">{name}</a>'
+        f'<span class="user-name">{name}</span>'
+        f'<p>{handle}@example.com</p>'
+        f'<p>{handle}</p>'
+        f'<p>{_sentence(rng, 8)}</p>'
+        f'</div>\n'
+    )
+
+def _layout_card(rng, i):
+    """A card in one of several real-world layouts, each with one @example.com email"""
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    name = f"{first} {last}"
+    handle = f"{first.lower()}_{last.lower()}{i}"
+    avatar = f'<img src="/static/avatars/{i % 50}.png" alt="User avatar">'
+    layout = i % 4
+    if layout == 0:
+        # Header and body blocks inside the card
+        return (
+            f'<article class="user-card"><div class="card-header">{avatar}<h3>{name}</h3></div>'
+            f'<div class="card-body"><p>{handle}@example.com</p><p>{handle}</p>'
+            f'<div class="stats"><span>{_sentence(rng, 6)}</span></div></div></article>\n'
+        )
+    if layout == 1:
+        # Table row, one field per cell
+        return (
+            f'<table><tr class="member"><td>{avatar}</td><td><a href="/user/{handle}">{name}</a></td>'
+            f'<td>{handle}@example.com</td></tr></table>\n'
+        )
+    if layout == 2:
+        # List items without end tags
+        return (
+            f'<ul><li class="member"><div class="meta">{avatar}<b>{name}</b></div>'
+            f'<span>{handle}@example.com</span></ul>\n'
+        )
+    # A card nested in a member list item
+    return (
+        f'<ul class="members"><li class="member"><div class="user-card"><div>{avatar}</div>'
+        f'<a href="/user/{handle}">{name}</a><p>{handle}@example.com</p></div></li></ul>\n'
+    )
+
+def _base64(rng, n):
+    alphabet = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/'
+    return ''.join(rng.choice(alphabet) for _ in range(n))
+
+def _icon(rng):
+    points = ' '.join(f'L{rng.randint(0, 24)} {rng.randint(0, 24)}' for _ in range(60))
+    return f'<svg class="icon" viewBox="0 0 24 24" aria-hidden="true"><path d="M0 0 {points}Z"/></svg>'
+
+def _modern_head(rng):
+    """Head of a framework-built page: inline CSS with an embedded font, bundles and state"""
+    rules = ''.join(f'.c-{i}{{margin:{i % 9}px;color:#{i % 999:03d};display:flex}}' for i in range(1500))
+    font = f'@font-face{{font-family:Inter;src:url(data:font/woff2;base64,{_base64(rng, 30000)}) format("woff2")}}'
+    bundle = ';'.join(f'function f{i}(a,b){{return a<b?"{rng.choice(WORDS)}":b&&a}}' for i in range(1500))
+    state = ','.join(f'"{rng.choice(WORDS)}{n}":{n}' for n in range(300))
+    return (
+        f'<style>{font}{rules}</style><script>{bundle}</script>'
+        f'<script type="application/json" id="__STATE__">{{{state}}}</script>'
+    )
+
+def _page(body, charset='utf-8', head=''):
+    return (
+        f'<!DOCTYPE html><html><head><meta charset="{charset}"><title>Members</title>{head}</head>'
+        f'<body>{body}</body></html>'
+    )
+
+def _fill(size, make_chunk):
+    parts = []
+    total = i = 0
+    while total < size:
+        chunk = make_chunk(i)
+        parts.append(chunk)
+        total += len(chunk)
+        i += 1
+    return ''.join(parts)
+
+def generate_page(kind, size, seed=0):
+    """Return (bytes, charset) for a page of roughly size bytes"""
+    rng = random.Random(f"{kind}:{size}:{seed}")
+    charset = 'utf-8'
+    if kind == 'cards':
+        # Member directory: one card per row, a little chrome in between
+        body = _fill(size, lambda i: _card(rng, i) + (f'<hr><p>{_sentence(rng, 12)}</p>' if i % 20 == 0 else ''))
+    elif kind == 'nested':
+        # Cards buried under deep wrapper markup
+        def chunk(i):
+            depth = rng.randint(10, 40)
+            return '<div class="wrap"><section>' * depth + _card(rng, i) + '</section></div>' * depth
+        body = _fill(size, chunk)
+    elif kind == 'layouts':
+        # Cards whose fields sit in nested blocks, cells and unclosed list items
+        body = _fill(size, lambda i: _layout_card(rng, i))
+    elif kind == 'nomatch':
+        # Article text with no user markup at all
+        body = _fill(size, lambda i: f'<article><h2>{_sentence(rng, 4)}</h2><p>{_sentence(rng, 60)}</p></article>\n')
+    elif kind == 'scripts':
+        # A few cards drowned in large inline scripts and styles
+        def chunk(i):
+            if i % 10 == 0:
+                return _card(rng, i)
+            payload = ','.join(f'"{rng.choice(WORDS)}{n}":{n}' for n in range(400))
+            return f'<script>window.__STATE_{i} = {{{payload}}};</script><style>.c{i}{{color:#{i % 999:03d}}}</style>\n'
+        body = _fill(size, chunk)
+    elif kind == 'modern':
+        # Framework output: big inline CSS and bundles, an SVG icon per card, inline handlers
+        head = _modern_head(rng)
+        def chunk(i):
+            if i % 25 == 24:
+                hydrate = ';'.join(f'h({n},"{rng.choice(WORDS)}",x<{n})' for n in range(400))
+                return f'<script>{hydrate}</script>\n'
+            return _card(rng, i).replace('</div>', f'{_icon(rng)}{_icon(rng)}</div>', 1)
+        body = _fill(max(size - len(head), 0), chunk)
+        return _page(body, charset, head).encode(charset), charset
+    elif kind == 'mixed_encoding':
+        # Cards with non-ASCII names, in a rotating legacy charset
+        charset = ['latin-1', 'cp1251', 'shift_jis', 'utf-8'][seed % 4]
+        names = ENCODED_NAMES[charset]
+        body = _fill(size, lambda i: _card(rng, i, name=names[i % len(names)]))
+    else:
+        raise ValueError(f"unknown page kind {kind!r}; expected one of {PAGE_KINDS}")
+    return _page(body, charset).encode(charset, errors='replace'), charset
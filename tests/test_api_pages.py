@@ -0,0 +1,120 @@
+"""Paginated JSON user endpoints against a local mock API"""
+import http.server
+import json
+import os
+import sys
+import threading
+import time
+import unittest
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Website_scrape_bd as scraper
+
+WP_PATH = '/wp-json/wp/v2/users'
+WP_PAGES = 4
+
+class _API(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Seconds each JSON page is held back, so prefetched pages overlap
+    latency = 0.1
+    pages = []
+    in_flight = 0
+    max_in_flight = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        query = parse_qs(parsed.query)
+        page = int(query.get('page', ['1'])[0])
+        if parsed.path == WP_PATH:
+            per_page = int(query['per_page'][0])
+            self.pages_of('wp', page, per_page, [('X-WP-TotalPages', str(WP_PAGES))] if page <= WP_PAGES else [],
+                          per_page if page <= WP_PAGES else 0)
+        elif parsed.path == '/api/people':
+            # Link header pagination over three pages of ten
+            link = [('Link', f'</api/people?page={page + 1}>; rel="next", </api/people?page=1>; rel="first"')]
+            self.pages_of('link', page, 10, link if page < 3 else [], 10)
+        elif parsed.path == '/api/list':
+            # Neither header: full pages of ten until a short one, 25 users in all
+            self.pages_of('list', page, 10, [], max(0, min(10, 25 - (page - 1) * 10)))
+        else:
+            self.reply(404, b'{}')
+
+    def pages_of(self, api, page, per_page, headers, count):
+        with _API.lock:
+            _API.pages.append((api, page))
+            _API.in_flight += 1
+            _API.max_in_flight = max(_API.max_in_flight, _API.in_flight)
+        time.sleep(_API.latency)
+        with _API.lock:
+            _API.in_flight -= 1
+        first = (page - 1) * per_page
+        users = [{'id': n, 'name': f'User {n}', 'slug': f'user-{n}', 'link': f'https://example.com/author/user-{n}'}
+                 for n in range(first, first + count)]
+        self.reply(200, json.dumps(users).encode(), headers)
+
+    def reply(self, status, body, headers=()):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+class PaginatedAPITest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), _API)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base = f'http://127.0.0.1:{cls.server.server_address[1]}'
+        cls.min_delay = scraper.HTTP_FETCHER.min_delay
+        scraper.HTTP_FETCHER.min_delay = 0
+
+    @classmethod
+    def tearDownClass(cls):
+        scraper.HTTP_FETCHER.min_delay = cls.min_delay
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        _API.pages = []
+        _API.max_in_flight = 0
+
+    def pages(self, api):
+        return sorted(page for name, page in _API.pages if name == api)
+
+    def users_from(self, path):
+        first = scraper.run_async(scraper.HTTP_FETCHER.fetch(self.base + path))
+        return list(scraper.iter_api_users(first, scraper.api_page_items(first)))
+
+    def test_total_pages_header_through_common_endpoints(self):
+        users = scraper.try_common_endpoints(self.base + '/')
+        self.assertEqual(len(users), WP_PAGES * scraper.API_PAGE_SIZE)
+        self.assertEqual(len({user.username for user in users}), len(users))
+        self.assertEqual(users[-1].profile_url, f'https://example.com/author/user-{len(users) - 1}')
+        self.assertTrue(all(user.method == 'api' for user in users))
+        self.assertEqual(self.pages('wp'), list(range(1, WP_PAGES + 1)))
+        # Pages after the first were fetched side by side, within the per-host limit
+        self.assertEqual(_API.max_in_flight, scraper.HTTP_FETCHER.max_per_host)
+
+    def test_link_header(self):
+        users = self.users_from('/api/people')
+        self.assertEqual([user.name for user in users], [f'User {n}' for n in range(30)])
+        self.assertEqual([page for name, page in _API.pages if name == 'link'], [1, 2, 3])
+
+    def test_full_pages_until_a_short_one(self):
+        users = self.users_from('/api/list?per_page=10')
+        self.assertEqual(len(users), 25)
+        pages = self.pages('list')
+        self.assertEqual(pages[:3], [1, 2, 3])
+        # Prefetched pages past the short one are dropped unread
+        self.assertLessEqual(len(pages), 3 + scraper.API_PREFETCH_PAGES - 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,152 @@
+"""ResponseCache freshness, revalidation and eviction against a local server"""
+import asyncio
+import http.server
+import os
+import sys
+import tempfile
+import threading
+import unittest
+import urllib.error
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Website_scrape_bd as scraper
+
+ETAG = '"v1"'
+LAST_MODIFIED = 'Mon, 05 Oct 2026 10:00:00 GMT'
+
+def body_for(path):
+    return (f'<html><body>{path}</body></html>'.encode() + b' ' * 1000)[:1000]
+
+class _Site(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    requests = []
+
+    def do_GET(self):
+        _Site.requests.append((self.path, self.headers.get('If-None-Match'), self.headers.get('If-Modified-Since')))
+        headers = []
+        if self.path == '/etag':
+            if self.headers.get('If-None-Match') == ETAG:
+                return self.reply(304, b'')
+            headers.append(('ETag', ETAG))
+        elif self.path == '/modified':
+            if self.headers.get('If-Modified-Since') == LAST_MODIFIED:
+                return self.reply(304, b'')
+            headers.append(('Last-Modified', LAST_MODIFIED))
+        elif self.path == '/missing':
+            return self.reply(404, b'not here')
+        self.reply(200, body_for(self.path), headers)
+
+    def reply(self, status, body, headers=()):
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+class ResponseCacheTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), _Site)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base = f'http://127.0.0.1:{cls.server.server_address[1]}'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        _Site.requests = []
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def new_cache(self, **options):
+        return scraper.ResponseCache(os.path.join(self.tmp.name, 'cache'), **options)
+
+    def fetch(self, cache, path, **options):
+        # A fetcher per call: its host state belongs to the event loop it ran on
+        fetcher = scraper.AsyncFetcher(min_delay=0, respect_robots=False, timeout=5, proxies={}, cache=cache)
+
+        async def run():
+            try:
+                return await fetcher.fetch(self.base + path, **options)
+            finally:
+                await fetcher.aclose()
+        return asyncio.run(run())
+
+    def paths(self):
+        return [path for path, _, _ in _Site.requests]
+
+    def test_fresh_hit_within_ttl(self):
+        cache = self.new_cache(ttl=3600)
+        first = self.fetch(cache, '/page')
+        second = self.fetch(cache, '/page')
+        self.assertEqual(first.body, body_for('/page'))
+        self.assertEqual(second.body, first.body)
+        self.assertEqual(second.headers['Content-Type'], 'text/html')
+        self.assertEqual(self.paths(), ['/page'])
+        self.assertEqual(cache.stats, {'hits': 1, 'revalidated': 0, 'misses': 1, 'stored': 1, 'evicted': 0})
+
+    def test_revalidation(self):
+        for path, sent in (('/etag', (ETAG, None)), ('/modified', (None, LAST_MODIFIED))):
+            with self.subTest(path=path):
+                _Site.requests = []
+                cache = self.new_cache(ttl=0)
+                self.fetch(cache, path)
+                result = self.fetch(cache, path)
+                self.assertEqual(result.status, 200)
+                self.assertEqual(result.body, body_for(path))
+                self.assertEqual(_Site.requests, [(path, None, None), (path,) + sent])
+                self.assertEqual(cache.stats['revalidated'], 1)
+                self.assertEqual(cache.stats['stored'], 1)
+
+    def test_truncated_and_error_bodies_are_not_kept(self):
+        cache = self.new_cache()
+        self.assertTrue(self.fetch(cache, '/page', max_bytes=100).truncated)
+        self.assertFalse(self.fetch(cache, '/page', max_bytes=100 * 1024).truncated)
+        for _ in range(2):
+            with self.assertRaises(urllib.error.HTTPError):
+                self.fetch(cache, '/missing')
+        self.assertEqual(self.paths(), ['/page', '/page', '/missing', '/missing'])
+        self.assertIsNone(cache.lookup(self.base + '/missing')[1])
+        self.assertEqual(cache.stats['stored'], 1)
+        self.assertEqual(cache.stats['misses'], 4)
+
+    def test_partly_read_stream_is_not_kept(self):
+        cache = self.new_cache()
+        opener = scraper.BlockingOpener(scraper.AsyncFetcher(min_delay=0, respect_robots=False, proxies={}))
+        with cache.open(self.base + '/stream', opener) as response:
+            response.read(10)
+        self.assertIsNone(cache.lookup(self.base + '/stream')[1])
+        with cache.open(self.base + '/stream', opener) as response:
+            self.assertEqual(response.read(), body_for('/stream'))
+        with cache.open(self.base + '/stream', opener) as response:
+            self.assertEqual(response.read(), body_for('/stream'))
+        self.assertEqual(self.paths(), ['/stream', '/stream'])
+        self.assertEqual(cache.stats['hits'], 1)
+
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = self.new_cache(max_bytes=2500)
+        self.fetch(cache, '/a')
+        self.fetch(cache, '/b')
+        # Using /a makes /b the oldest entry
+        self.fetch(cache, '/a')
+        self.fetch(cache, '/c')
+        self.assertIsNone(cache.lookup(self.base + '/b')[1])
+        self.assertIsNotNone(cache.lookup(self.base + '/a')[1])
+        self.assertIsNotNone(cache.lookup(self.base + '/c')[1])
+        self.assertEqual(cache.stats['evicted'], 1)
+        self.assertEqual(cache._total, 2000)
+        self.assertEqual(len([name for _, _, names in os.walk(cache.directory) for name in names]), 4)
+        self.assertEqual(cache.summary(), '1 hits, 0 revalidated (304), 3 misses, 3 stored, 1 evicted, 0.0 MB on disk')
+
+if __name__ == '__main__':
+    unittest.main()
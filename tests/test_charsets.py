@@ -0,0 +1,72 @@
+"""Charset sniffing and decoding of pages in legacy encodings"""
+import codecs
+import http.client
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Website_scrape_bd as scraper
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'charsets')
+
+# fixture: (Content-Type charset, expected charset, name on the card)
+CASES = {
+    # Browsers read ISO-8859-1 as windows-1252: 0x93/0x94 are curly quotes, 0x96 a dash
+    'latin1.html': ('ISO-8859-1', 'cp1252', '“Renée” Müller – café'),
+    'cp1251.html': ('windows-1251', 'cp1251', 'Ольга Петрова'),
+    'shift_jis.html': ('Shift_JIS', 'shift_jis', '山田 太郎 (やまだ)'),
+    # The byte order mark wins over a wrong header
+    'utf8_bom.html': ('iso-8859-1', 'utf-8-sig', 'José Núñez ✓'),
+    'utf16.html': (None, 'utf-16', 'Zoë Łukasiewicz'),
+    'meta_only.html': (None, 'koi8_r', 'Иван Иванов'),
+}
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES, name), 'rb') as f:
+        return f.read()
+
+class _Response:
+    """Response that hands its body out a few bytes per read"""
+    def __init__(self, data, declared, size=7):
+        self.headers = http.client.HTTPMessage()
+        self.headers['Content-Type'] = f'text/html; charset={declared}' if declared else 'text/html'
+        self._chunks = [data[i:i + size] for i in range(0, len(data), size)]
+
+    def read(self, amt=None):
+        return self._chunks.pop(0) if self._chunks else b''
+
+class CharsetTest(unittest.TestCase):
+    def test_sniff_charset(self):
+        for name, (declared, expected, _) in CASES.items():
+            with self.subTest(name=name):
+                self.assertEqual(codecs.lookup(scraper.sniff_charset(read_fixture(name), declared)).name,
+                                 codecs.lookup(expected).name)
+
+    def test_decode_body(self):
+        for name, (declared, _, text) in CASES.items():
+            with self.subTest(name=name):
+                page = scraper.decode_body(memoryview(read_fixture(name)), declared)
+                self.assertIn(f'<h3>{text}</h3>', page)
+                self.assertFalse(page.startswith('﻿'))
+
+    def test_streamed_decoding_matches(self):
+        # Short reads split multi-byte characters and the <meta> declaration
+        for name, (declared, _, _) in CASES.items():
+            with self.subTest(name=name):
+                data = read_fixture(name)
+                text = ''.join(scraper.iter_decoded(_Response(data, declared)))
+                self.assertEqual(text, scraper.decode_body(data, declared))
+
+    def test_undeclared_pages(self):
+        self.assertEqual(scraper.decode_body('Zoë'.encode('utf-8')), 'Zoë')
+        # Not valid UTF-8: falls back to windows-1252
+        self.assertEqual(scraper.decode_body('Zoë “x”'.encode('cp1252')), 'Zoë “x”')
+        self.assertIsNone(scraper.sniff_charset(b'<html><body>plain</body></html>'))
+        # An ASCII-readable <meta> claiming UTF-16 is wrong about it
+        self.assertEqual(scraper.sniff_charset(b'<meta charset="utf-16">'), 'utf-8')
+        self.assertIsNone(scraper.sniff_charset(b'<meta charset="no-such-charset">', 'bogus'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+"""TagClassifier must make the same decisions as the original inline checks"""
+import os
+import sys
+import unittest
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Website_scrape_bd as scraper
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+BASE_URL = 'https://example.com/members/'
+
+class BaselineClassifier(scraper.TagClassifier):
+    """The checks handle_starttag made before TagClassifier, kept verbatim"""
+    def is_user_element(self, attrs):
+        attrs_dict = dict(attrs)
+        classes = attrs_dict.get('class', '').split() if 'class' in attrs_dict else []
+        user_indicators = [
+            any(cls in ['user', 'profile', 'member', 'user-card', 'user_info',
+                        'profile-card', 'user-profile', 'user-item', 'user-block',
+                        'user-details', 'author', 'user-name', 'user-avatar'] for cls in classes),
+            'id' in attrs_dict and any(x in attrs_dict['id'] for x in ['user', 'profile', 'member']),
+            any(attr[0].startswith('data-user') for attr in attrs if isinstance(attr, tuple)),
+        ]
+        return any(user_indicators)
+
+    def is_profile_link(self, href):
+        return any(x in href for x in ['/user/', '/profile/', '/member/', '/users/', '/author/'])
+
+    def is_avatar(self, src, alt):
+        if any(x in src for x in ['avatar', 'profile', 'user', 'gravatar']):
+            return True
+        return alt is not None and any(x in alt.lower() for x in ['user', 'profile', 'avatar'])
+
+class _StartTags(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.tags = []
+
+    def handle_starttag(self, tag, attrs):
+        self.tags.append((tag, attrs))
+
+def _read_fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding='utf-8') as f:
+        return f.read()
+
+def _parse(html, classifier):
+    parser = scraper.AdvancedDarkBossScraper(BASE_URL, backend=scraper.HTMLParserBackend)
+    parser.classifier = classifier
+    parser.feed(html)
+    parser.close()
+    return [user.to_dict() for user in parser.users]
+
+class TagClassifierParityTest(unittest.TestCase):
+    def setUp(self):
+        self.html = _read_fixture('directory.html')
+        collector = _StartTags()
+        collector.feed(self.html)
+        self.tags = collector.tags
+
+    def test_same_decision_for_every_start_tag(self):
+        baseline, classifier = BaselineClassifier(), scraper.TagClassifier()
+        for tag, attrs in self.tags:
+            with self.subTest(tag=tag, attrs=attrs):
+                self.assertEqual(classifier.is_user_element(attrs), baseline.is_user_element(attrs))
+                attrs_dict = dict(attrs)
+                if tag == 'a' and attrs_dict.get('href') is not None:
+                    href = attrs_dict['href']
+                    self.assertEqual(classifier.is_profile_link(href), baseline.is_profile_link(href))
+                if tag == 'img' and attrs_dict.get('src') is not None:
+                    src, alt = attrs_dict['src'], attrs_dict.get('alt')
+                    self.assertEqual(classifier.is_avatar(src, alt), baseline.is_avatar(src, alt))
+
+    def test_same_users_from_fixture_page(self):
+        expected = _parse(self.html, BaselineClassifier())
+        self.assertGreaterEqual(len(expected), 10)
+        self.assertEqual(_parse(self.html, scraper.TagClassifier()), expected)
+
+    def test_profile_links_resolve_like_urljoin(self):
+        users = _parse(self.html, scraper.TagClassifier())
+        hrefs = [attrs_dict['href'] for tag, attrs_dict in ((t, dict(a)) for t, a in self.tags)
+                 if tag == 'a' and BaselineClassifier().is_profile_link(attrs_dict.get('href', ''))]
+        expected = {scraper.normalize_url(urljoin(BASE_URL, href)) for href in hrefs}
+        self.assertTrue({user['profile_url'] for user in users if 'profile_url' in user} <= expected)
+
+    def test_custom_rules_are_used(self):
+        rules = scraper.DetectionRules(card_classes=['vcard'], id_keywords=['person'])
+        classifier = scraper.TagClassifier(rules)
+        self.assertTrue(classifier.is_user_element([('class', 'h-card vcard')]))
+        self.assertTrue(classifier.is_user_element([('id', 'person-3')]))
+        self.assertFalse(classifier.is_user_element([('class', 'user-card')]))
+        self.assertFalse(classifier.is_user_element([]))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+"""Command line entry points, run as a separate process against a local server"""
+import glob
+import http.server
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT = os.path.join(ROOT, 'Website_scrape_bd.py')
+PAGE = (b'<html><body><div class="user-card"><h3>Jane Roe</h3><p>jane@example.com</p></div>'
+        b'<div class="user-card"><h3>John Doe</h3><p>john@example.com</p></div></body></html>')
+
+class _Site(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = PAGE if self.path == '/' else b''
+        self.send_response(200 if body else 404)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+class PipedStdinTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), _Site)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.url = f'http://127.0.0.1:{cls.server.server_address[1]}/'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def test_urls_piped_without_arguments(self):
+        with tempfile.TemporaryDirectory() as cwd:
+            done = subprocess.run([sys.executable, SCRIPT], input=self.url + '\n', cwd=cwd, text=True,
+                                  capture_output=True, timeout=60)
+            self.assertEqual(done.returncode, 0, done.stderr)
+            outputs = glob.glob(os.path.join(cwd, 'darkboss_results_*.jsonl'))
+            self.assertEqual(len(outputs), 1, os.listdir(cwd))
+            with open(outputs[0], encoding='utf-8') as f:
+                emails = sorted(json.loads(line)['email'] for line in f)
+        self.assertEqual(emails, ['jane@example.com', 'john@example.com'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+"""Offline corpus processing"""
+import concurrent.futures
+import io
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Website_scrape_bd as scraper
+
+CARD = ('<div class="user-card"><span>User {0}</span><p>user{0}@example.com</p>'
+        '<a href="/user/user-{0}">user_{0}</a></div>')
+
+class BoundedMapTest(unittest.TestCase):
+    def test_results_in_order_with_limited_read_ahead(self):
+        pulled = []
+
+        def items():
+            for i in range(50):
+                pulled.append(i)
+                yield i
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+            results = scraper._iter_bounded(executor, lambda x: x * x, items(), 4)
+            self.assertEqual(next(results), 0)
+            self.assertLessEqual(len(pulled), 5)
+            self.assertEqual([0] + list(results), [i * i for i in range(50)])
+
+class RunCorpusTest(unittest.TestCase):
+    def test_every_page_is_processed(self):
+        with tempfile.TemporaryDirectory() as root:
+            for i in range(12):
+                with open(os.path.join(root, f'page{i:02d}.html'), 'w', encoding='utf-8') as f:
+                    f.write(f'<html><body>{CARD.format(i)}</body></html>')
+            out = io.StringIO()
+            with scraper.JSONLSink(out) as sink:
+                summary = scraper.run_corpus([root], sink, workers=2, chunksize=3)
+        emails = sorted(json.loads(line)['email'] for line in out.getvalue().splitlines())
+        self.assertEqual(summary['documents'], 12)
+        self.assertEqual(summary['errors'], 0)
+        self.assertEqual(emails, sorted(f'user{i}@example.com' for i in range(12)))
+
+if __name__ == '__main__':
+    unittest.main()
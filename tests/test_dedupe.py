@@ -0,0 +1,71 @@
+"""UserDeduplicator in both modes"""
+import os
+import sys
+import tracemalloc
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Website_scrape_bd as scraper
+
+def user(i, **fields):
+    return scraper.UserRecord(name=f'User {i}', email=f'user{i}@example.com', **fields)
+
+class FingerprintTableTest(unittest.TestCase):
+    def test_membership(self):
+        table = scraper.FingerprintTable(1000)
+        self.assertFalse(any(table.add(f'key{i}') for i in range(1000)))
+        self.assertTrue(all(table.add(f'key{i}') for i in range(1000)))
+        self.assertTrue(all(f'key{i}' in table for i in range(1000)))
+        self.assertFalse(any(f'other{i}' in table for i in range(10000)))
+        self.assertEqual(table.count, 1000)
+
+    def test_size_is_fixed(self):
+        table = scraper.FingerprintTable(100)
+        slots = len(table._slots)
+        self.assertGreaterEqual(slots * 3, 100 * 4)
+        for i in range(1000):
+            table.add(f'key{i}')
+        self.assertEqual(len(table._slots), slots)
+        self.assertTrue(table.full())
+        # Past capacity new keys are not remembered, old ones still are
+        self.assertFalse(table.add('key999'))
+        self.assertTrue(table.add('key0'))
+
+    def test_table_is_allocated_once(self):
+        tracemalloc.start()
+        try:
+            table = scraper.FingerprintTable(1000000)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        size = len(table._slots) * table._slots.itemsize
+        self.assertEqual(size, 16 * 1024 * 1024)
+        self.assertLess(peak, size * 1.1)
+
+class UserDeduplicatorTest(unittest.TestCase):
+    def test_bounded_drops_repeats_by_any_key(self):
+        deduplicator = scraper.UserDeduplicator(bounded=True, capacity=100)
+        users = [user(1), user(2), user(1), scraper.UserRecord(email='user2@example.com'),
+                 scraper.UserRecord(profile_url='https://example.com/u/3'),
+                 scraper.UserRecord(name='Three', profile_url='https://example.com/u/3')]
+        kept = list(deduplicator.filter(users))
+        self.assertEqual(kept, [users[0], users[1], users[4]])
+        self.assertEqual(deduplicator.stats()['duplicates'], 3)
+
+    def test_full_table_keeps_users(self):
+        deduplicator = scraper.UserDeduplicator(bounded=True, capacity=4)
+        with self.assertLogs('darkboss', 'WARNING'):
+            kept = list(deduplicator.filter([user(i) for i in range(10)] + [user(i) for i in range(10)]))
+        self.assertEqual(len(kept), 20 - deduplicator.duplicates)
+        self.assertGreaterEqual(len(kept), 10)
+
+    def test_merging_mode_fills_fields(self):
+        deduplicator = scraper.UserDeduplicator()
+        first = user(1)
+        kept = list(deduplicator.filter([first, user(1, username='user_1')]))
+        self.assertEqual(kept, [first])
+        self.assertEqual(first.username, 'user_1')
+
+if __name__ == '__main__':
+    unittest.main()
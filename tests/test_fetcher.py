@@ -0,0 +1,191 @@
+"""AsyncFetcher politeness rules and streamed responses against a local server"""
+import asyncio
+import gzip
+import http.server
+import os
+import sys
+import threading
+import time
+import unittest
+import urllib.error
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Website_scrape_bd as scraper
+
+PAGE = b'<html><body>' + b'<div class="user-card"><h3>Jane Roe</h3></div>' * 2000 + b'</body></html>'
+
+class _Site(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    robots_delay = 0
+    # Seconds every /slow response is held back
+    latency = 0.2
+    requests = []
+    started = []
+    connections = 0
+    in_flight = 0
+    max_in_flight = 0
+    lock = threading.Lock()
+
+    def setup(self):
+        super().setup()
+        with _Site.lock:
+            _Site.connections += 1
+        self.drop_next = False
+
+    def do_GET(self):
+        _Site.requests.append(self.path)
+        _Site.started.append(time.monotonic())
+        if self.drop_next:
+            # Closed as the next request arrives, like a server ending an idle keep-alive
+            self.close_connection = True
+            return
+        if self.path == '/robots.txt':
+            time.sleep(_Site.robots_delay)
+            self.reply(b'User-agent: *\nDisallow: /private\n')
+        elif self.path == '/gzip':
+            self.reply(gzip.compress(PAGE), [('Content-Encoding', 'gzip')])
+        elif self.path == '/then-drop':
+            self.reply(PAGE)
+            self.drop_next = True
+        elif self.path.startswith('/slow'):
+            with _Site.lock:
+                _Site.in_flight += 1
+                _Site.max_in_flight = max(_Site.max_in_flight, _Site.in_flight)
+            time.sleep(_Site.latency)
+            with _Site.lock:
+                _Site.in_flight -= 1
+            self.reply(PAGE)
+        elif self.path == '/chunked':
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            for start in range(0, len(PAGE), 7000):
+                part = PAGE[start:start + 7000]
+                self.wfile.write(b'%x\r\n%s\r\n' % (len(part), part))
+            self.wfile.write(b'0\r\n\r\n')
+        else:
+            self.reply(PAGE)
+
+    def reply(self, body, headers=()):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+class FetcherTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), _Site)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base = f'http://127.0.0.1:{cls.server.server_address[1]}'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        _Site.robots_delay = 0
+        _Site.requests = []
+        _Site.started = []
+        _Site.connections = 0
+        _Site.max_in_flight = 0
+
+    def new_fetcher(self, **options):
+        options = dict({'min_delay': 0, 'timeout': 5, 'proxies': {}}, **options)
+        return scraper.AsyncFetcher(**options)
+
+    def fetch_all(self, fetcher, paths, concurrent=False):
+        async def run():
+            try:
+                if concurrent:
+                    return await fetcher.fetch_many([self.base + path for path in paths])
+                return [await fetcher.fetch(self.base + path) for path in paths]
+            finally:
+                await fetcher.aclose()
+        return asyncio.run(run())
+
+    def test_connections_are_reused(self):
+        results = self.fetch_all(self.new_fetcher(respect_robots=False), ['/a', '/b', '/c', '/d'])
+        self.assertEqual([result.body for result in results], [PAGE] * 4)
+        self.assertEqual(_Site.connections, 1)
+
+    def test_idle_connections_expire(self):
+        self.fetch_all(self.new_fetcher(respect_robots=False, idle_timeout=0), ['/a', '/b', '/c'])
+        self.assertEqual(_Site.connections, 3)
+
+    def test_dead_reused_connection_is_retried(self):
+        results = self.fetch_all(self.new_fetcher(respect_robots=False), ['/then-drop', '/a', '/b'])
+        self.assertEqual([result.body for result in results], [PAGE] * 3)
+        # The request that hit the dropped socket went out again on a new one
+        self.assertEqual(_Site.requests, ['/then-drop', '/a', '/a', '/b'])
+        self.assertEqual(_Site.connections, 2)
+
+    def test_per_host_cap_with_latency(self):
+        started = time.monotonic()
+        results = self.fetch_all(self.new_fetcher(respect_robots=False, max_per_host=2),
+                                 [f'/slow/{i}' for i in range(6)], concurrent=True)
+        elapsed = time.monotonic() - started
+        self.assertEqual([result.body for result in results], [PAGE] * 6)
+        self.assertEqual(_Site.max_in_flight, 2)
+        # Three rounds of two requests, each held back by the server
+        self.assertGreaterEqual(elapsed, 3 * _Site.latency)
+        self.assertLess(elapsed, 6 * _Site.latency)
+
+    def test_min_delay_spaces_requests(self):
+        self.fetch_all(self.new_fetcher(respect_robots=False, max_per_host=4, min_delay=0.1),
+                       [f'/a{i}' for i in range(4)], concurrent=True)
+        gaps = [b - a for a, b in zip(_Site.started, _Site.started[1:])]
+        self.assertEqual(len(gaps), 3)
+        self.assertGreaterEqual(min(gaps), 0.09)
+
+    def test_latency_past_the_timeout(self):
+        with self.assertRaises(urllib.error.URLError):
+            self.fetch_all(self.new_fetcher(respect_robots=False, timeout=_Site.latency / 4), ['/slow'])
+
+    def test_cancelled_robots_request_does_not_block_the_host(self):
+        _Site.robots_delay = 0.5
+
+        async def run():
+            fetcher = self.new_fetcher()
+            with self.assertRaises(asyncio.TimeoutError):
+                await asyncio.wait_for(fetcher.fetch(self.base + '/a'), 0.1)
+            result = await asyncio.wait_for(fetcher.fetch(self.base + '/b'), 3)
+            await fetcher.aclose()
+            return result
+
+        self.assertEqual(asyncio.run(run()).body, PAGE)
+        self.assertEqual(_Site.requests.count('/robots.txt'), 1)
+
+    def test_streaming_obeys_robots(self):
+        opener = scraper.BlockingOpener(self.new_fetcher())
+        with self.assertRaises(urllib.error.URLError):
+            opener.open(self.base + '/private/members')
+        self.assertEqual(_Site.requests, ['/robots.txt'])
+
+    def test_streamed_bodies(self):
+        opener = scraper.BlockingOpener(self.new_fetcher())
+        for path in ('/plain', '/gzip', '/chunked'):
+            with self.subTest(path=path):
+                with opener.open(self.base + path) as response:
+                    parts = []
+                    while True:
+                        data = response.read(4096)
+                        if not data:
+                            break
+                        parts.append(data)
+                self.assertEqual(b''.join(parts), PAGE)
+        # Fully read bodies leave the connection open for the next request
+        self.assertEqual(len(opener.fetcher._hosts), 1)
+        self.assertEqual(len(next(iter(opener.fetcher._hosts.values())).idle), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+"""Metrics counters, histograms and the Prometheus exposition format"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Website_scrape_bd as scraper
+
+PAGE = '<div class="user-card"><h3>Jane Roe</h3><a href="/user/jane">jane</a><p>jane@example.com</p></div>'
+
+def parse_page(page=PAGE):
+    parser = scraper.AdvancedDarkBossScraper('https://example.com/')
+    parser.feed(page)
+    parser.close()
+    return parser.users
+
+class MetricsTest(unittest.TestCase):
+    def test_counters(self):
+        metrics = scraper.Metrics()
+        metrics.incr('fetch.requests')
+        metrics.incr('fetch.requests', 2)
+        metrics.incr('fetch.bytes_downloaded', 1500)
+        metrics.incr('urls.hits', 3)
+        metrics.incr('urls.misses')
+        summary = metrics.summary()
+        self.assertEqual(summary['counters'], {'fetch.bytes_downloaded': 1500, 'fetch.requests': 3,
+                                               'urls.hits': 3, 'urls.misses': 1})
+        self.assertEqual(summary['hit_rates'], {'urls': 0.75})
+        self.assertEqual(summary['timers'], {})
+
+    def test_histogram_buckets(self):
+        metrics = scraper.Metrics(buckets=(0.1, 1))
+        for value in (0.05, 0.1, 0.5, 2):
+            metrics.observe('stage.html', value)
+        hist = metrics.histograms['stage.html']
+        # A value equal to a bound falls in that bound's bucket (le is inclusive)
+        self.assertEqual(hist['buckets'], [2, 1, 1])
+        self.assertEqual(metrics.summary()['timers']['stage.html'], {
+            'count': 4, 'total_seconds': 2.65, 'mean_seconds': 0.6625, 'min_seconds': 0.05, 'max_seconds': 2})
+
+    def test_timer(self):
+        metrics = scraper.Metrics()
+        with metrics.timer('stage.regex'):
+            pass
+        hist = metrics.histograms['stage.regex']
+        self.assertEqual(hist['count'], 1)
+        self.assertEqual(hist['buckets'][0], 1)
+
+    def test_prometheus_format(self):
+        metrics = scraper.Metrics(buckets=(0.1, 1))
+        metrics.incr('fetch.requests', 3)
+        metrics.observe('stage.html', 0.05)
+        metrics.observe('stage.html', 0.5)
+        self.assertEqual(metrics.to_prometheus(), '\n'.join([
+            '# TYPE darkboss_fetch_requests_total counter',
+            'darkboss_fetch_requests_total 3',
+            '# TYPE darkboss_stage_html_seconds histogram',
+            'darkboss_stage_html_seconds_bucket{le="0.1"} 1',
+            'darkboss_stage_html_seconds_bucket{le="1"} 2',
+            'darkboss_stage_html_seconds_bucket{le="+Inf"} 2',
+            'darkboss_stage_html_seconds_sum 0.55',
+            'darkboss_stage_html_seconds_count 2',
+        ]) + '\n')
+
+    def test_instrumented_parse(self):
+        metrics = scraper.Metrics()
+        default, scraper.METRICS = scraper.METRICS, metrics
+        try:
+            self.assertEqual(len(parse_page()), 1)
+        finally:
+            scraper.METRICS = default
+        self.assertEqual(metrics.counters['parse.documents'], 1)
+        self.assertEqual(metrics.counters['parse.records_kept'], 1)
+        # Every exported line is a comment or "name{labels} value"
+        for line in metrics.to_prometheus().splitlines():
+            self.assertRegex(line, r'^(# TYPE \w+ (counter|histogram)|\w+(\{le="[^"]+"\})? [0-9.e+-]+)$')
+
+    def test_drain_and_merge(self):
+        worker = scraper.Metrics(buckets=(0.1, 1))
+        worker.incr('corpus.files', 2)
+        worker.observe('stage.html', 0.5)
+        main = scraper.Metrics(buckets=(0.1, 1))
+        main.incr('corpus.files')
+        main.observe('stage.html', 0.05)
+        main.merge(worker.drain())
+        self.assertEqual(worker.summary()['counters'], {})
+        self.assertEqual(main.counters, {'corpus.files': 3})
+        self.assertEqual(main.histograms['stage.html']['buckets'], [1, 1, 0])
+
+class NullMetricsTest(unittest.TestCase):
+    def test_records_nothing(self):
+        metrics = scraper.NullMetrics()
+        self.assertFalse(metrics.enabled)
+        metrics.incr('fetch.requests', 5)
+        metrics.observe('stage.html', 0.5)
+        with metrics.timer('stage.html') as timer:
+            pass
+        self.assertIs(timer, metrics.timer('other'))
+        self.assertEqual(vars(metrics), {})
+
+    def test_instrumented_code_with_metrics_off(self):
+        metrics = scraper.NullMetrics()
+        default, scraper.METRICS = scraper.METRICS, metrics
+        try:
+            self.assertEqual(len(parse_page()), 1)
+        finally:
+            scraper.METRICS = default
+        self.assertEqual(vars(metrics), {})
+        self.assertFalse(hasattr(metrics, 'counters'))
+
+if __name__ == '__main__':
+    unittest.main()
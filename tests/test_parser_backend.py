@@ -0,0 +1,73 @@
+"""Source offsets reported by HTMLParserBackend and the memory they cost"""
+import os
+import random
+import re
+import sys
+import tracemalloc
+import unittest
+from html.parser import HTMLParser
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Website_scrape_bd as scraper
+
+PIECES = ['<div class="user-card">', '<h3>Jane\nRoe</h3>', '<p\n  class="bio"\r\n>text</p>', '\n', '\r\n',
+          '<!-- a\ncomment -->', '<br/>', 'plain words ', '<a href="/u/1"\n>link</a>', '&amp;\n', '</div>',
+          '<script>var x = 1;\n</script>', '<img\nsrc="a.png">']
+
+class _Recorder(HTMLParser):
+    """Records the backend's position() at every start tag"""
+    def __init__(self):
+        super().__init__()
+        self.backend = scraper.HTMLParserBackend(self)
+        self.positions = []
+
+    def handle_starttag(self, tag, attrs):
+        self.positions.append(self.backend.position())
+
+def parse(chunks):
+    recorder = _Recorder()
+    for chunk in chunks:
+        recorder.backend.feed(chunk)
+    recorder.backend.close()
+    return recorder.positions
+
+def split(text, rng):
+    cuts = sorted(rng.sample(range(1, len(text)), min(len(text) - 1, rng.randint(0, 30))))
+    return [text[a:b] for a, b in zip([0] + cuts, cuts + [len(text)])]
+
+class PositionTest(unittest.TestCase):
+    def test_positions_point_at_tags(self):
+        rng = random.Random(24)
+        for _ in range(500):
+            text = ''.join(rng.choice(PIECES) for _ in range(rng.randint(1, 60)))
+            expected = [m.start() for m in re.finditer(r'<[a-z]', text)]
+            self.assertEqual(parse([text]), expected)
+            self.assertEqual(parse(split(text, rng)), expected, text)
+
+    def test_card_offsets(self):
+        page = 'intro\n\n' + ''.join(f'<div class="user-card">\n<h3>User {i}</h3>\n<p>user{i}@example.com</p></div>\n' for i in range(3))
+        users = scraper.AdvancedDarkBossScraper('https://example.com', backend=scraper.HTMLParserBackend)
+        for i in range(0, len(page), 5):
+            users.feed(page[i:i + 5])
+        users.close()
+        self.assertEqual([user.offset for user in users.users],
+                         [m.start() for m in re.finditer('<div', page)])
+
+    def test_memory_does_not_grow_with_lines(self):
+        line = '<p class="x">lorem ipsum dolor sit amet</p>\n'
+        # A table of line starts peaked at about 2 MB on this page
+        page = line * (2 * 1024 * 1024 // len(line))
+        recorder = _Recorder()
+        tracemalloc.start()
+        try:
+            for i in range(0, len(page), 64 * 1024):
+                recorder.backend.feed(page[i:i + 64 * 1024])
+                recorder.positions.clear()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertLess(peak, 512 * 1024)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+"""lxml and html.parser must find the same records, except where documented"""
+import importlib.util
+import os
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+import Website_scrape_bd as scraper
+from synthetic import PAGE_KINDS, generate_page
+
+HAVE_LXML = importlib.util.find_spec('lxml') is not None
+
+# Broken markup both backends repair into the same records
+MALFORMED = {
+    'unclosed': '<div class="user-card"><p>Ann Smith<p>ann@example.com<p>ann_smith</div>',
+    'unclosed_card': '<div class="user-card"><h3>Ann Lee</h3><p>ann@example.com',
+    'stray_end': '<div class="member"></span><b>Omar Haddad</b></i><i>omar@example.com</i></div></div>',
+    'entities': '<div class="profile"><h3>Jos&eacute; N&uacute;&ntilde;ez</h3><span>jose&#64;example.com</span></div>',
+    'no_body': '<li class="author"><a href="/user/lena">Lena Fischer</a> lena@example.com',
+    'implied_li': '<ul><li class="member">Ivan Ivanov<span>ivan@example.com</span>'
+                  '<li class="member">Olga Petrova<span>olga@example.com</span></ul>',
+    'implied_li_p': '<ul><li class=member><p>Ann Lee<p>ann@example.com<li class=member><p>Bob Ray<p>bob@example.com</ul>',
+    'implied_tr': '<table><tr class=member><td>Ann Lee<td>ann@example.com'
+                  '<tr class=member><td>Bob Ray<td>bob@example.com</table>',
+    'rows_without_table': '<tr class=member><td>Ann Lee<td>ann@example.com<tr class=member><td>Bob Ray<td>bob@example.com',
+    'implied_dd': '<dl><dt>Member<dd class=member><b>Ann Lee</b> ann@example.com'
+                  '<dt>Member<dd class=member><b>Bob Ray</b> bob@example.com</dl>',
+    'nested_table': '<table><tr class=member><td>Ann Lee<table><tr><td>x</table><td>ann@example.com</table>',
+    'unquoted_attributes': "<div class='member' data-user-id=7><h3>Ann Lee</h3><a href=/user/ann>ann</a></div>",
+    'comment': '<div class="member"><!-- <p>x</p> --><h3>Ann Lee</h3><p>ann@example.com</p></div>',
+    'uppercase': '<DIV CLASS="member"><H3>Ann Lee</H3><P>ann@example.com</P></DIV>',
+    'card_in_card': '<div class=member><h3>Ann Lee</h3><div class=member><h3>Bob Ray</h3>bob@example.com</div>'
+                    'ann@example.com</div>',
+    'empty': '',
+}
+
+# Markup libxml2 repairs differently: the records html.parser finds
+KNOWN_DIFFERENCES = {
+    # A block element ends an open <p> in libxml2, leaving the card empty
+    'block_in_p': ('<p class=author>Ann Lee<div>ann@example.com</div></p>',
+                   [{'name': 'Ann Lee', 'email': 'ann@example.com'}]),
+    'list_in_p': ('<p class=author>Ann Lee<li class=member>Bob Ray bob@example.com</li>ann@example.com</p>',
+                  [{'name': 'Ann Lee', 'email': 'ann@example.com'}]),
+    # libxml2 drops the stray </i> and joins the text around it
+    'stray_end_in_text': ('<div class="member"><h3>Ann</i>Lee</h3><p>ann@example.com</p></div>',
+                          [{'name': 'Ann', 'username': 'Lee', 'email': 'ann@example.com'}]),
+}
+
+def parse(text, backend):
+    parser = scraper.AdvancedDarkBossScraper('https://example.com/', backend=backend)
+    parser.feed(text)
+    parser.close()
+    return [user.to_dict() for user in parser.users]
+
+@unittest.skipUnless(HAVE_LXML, 'lxml is not installed')
+class ParserParityTest(unittest.TestCase):
+    def assertSameRecords(self, text):
+        expected = parse(text, scraper.HTMLParserBackend)
+        self.assertEqual(parse(text, scraper.LxmlBackend), expected)
+        return expected
+
+    def test_synthetic_pages(self):
+        for kind in PAGE_KINDS:
+            for seed in range(2):
+                with self.subTest(kind=kind, seed=seed):
+                    data, charset = generate_page(kind, 256 * 1024, seed)
+                    records = self.assertSameRecords(data.decode(charset))
+                    if kind != 'nomatch':
+                        self.assertTrue(records)
+
+    def test_malformed_markup(self):
+        for name, text in MALFORMED.items():
+            with self.subTest(name=name):
+                self.assertSameRecords(text)
+
+    def test_known_differences(self):
+        for name, (text, expected) in KNOWN_DIFFERENCES.items():
+            with self.subTest(name=name):
+                expected = [dict(record, method='html') for record in expected]
+                self.assertEqual(parse(text, scraper.HTMLParserBackend), expected)
+                # Once lxml agrees, move the case to MALFORMED and update the README
+                self.assertNotEqual(parse(text, scraper.LxmlBackend), expected)
+
+class DefaultBackendTest(unittest.TestCase):
+    def test_lxml_is_opt_in(self):
+        self.assertIs(scraper.get_parser_backend(), scraper.HTMLParserBackend)
+        if HAVE_LXML:
+            self.assertIs(scraper.get_parser_backend('lxml'), scraper.LxmlBackend)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+"""The regex fallback must return what the original per-pattern findall loop did"""
+import os
+import random
+import re
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Website_scrape_bd as scraper
+
+def baseline_extract(content, base_url):
+    """extract_users_from_patterns before PatternRegistry, kept verbatim"""
+    users = []
+
+    # Try to find user profiles using various patterns
+    patterns = [
+        # Social media profiles
+        r'https?://(?:www\.)?(facebook|twitter|instagram|linkedin)\.com/[a-zA-Z0-9_\-\.]+',
+
+        # Email patterns
+        r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}',
+
+        # Name patterns in HTML
+        r'class="[^"]*(name|user-name|profile-name|author-name)[^"]*"[^>]*>([^<]+)<',
+
+        # Username patterns
+        r'class="[^"]*(username|user-login|profile-username)[^"]*"[^>]*>([^<]+)<',
+    ]
+
+    for pattern in patterns:
+        try:
+            matches = re.findall(pattern, content, re.IGNORECASE)
+            for match in matches:
+                if isinstance(match, tuple):
+                    match = match[1] if len(match) > 1 else match[0]
+
+                user_data = {}
+                if '@' in match and '.' in match:
+                    user_data['email'] = match
+                    user_data['name'] = match.split('@')[0]
+                elif any(domain in match for domain in ['facebook', 'twitter', 'instagram', 'linkedin']):
+                    user_data['social'] = match
+                    user_data['name'] = match.split('/')[-1].replace('-', ' ').title()
+                else:
+                    user_data['name'] = match.strip()
+
+                if user_data:
+                    users.append(user_data)
+        except Exception as e:
+            print(f"[!] Error with pattern {pattern}: {e}")
+            continue
+
+    return users
+
+# Pieces that make the patterns overlap, abut and nest
+FRAGMENTS = [
+    'jane.doe@site.com', 'a@b.com', 'ann@x.io', 'BOB@Example.ORG', '@', '.', '+', '-', '_', '%',
+    'https://facebook.com/jane.doe', 'http://www.twitter.com/', 'https://linkedin.com/in', 'instagram',
+    'class="name">', 'class="user-name profile-username">', 'class="username"', ' data-x="1">',
+    'class="author-name"><b>', '<', '>', '"', ' ', '\n', 'Jane Doe', 'j_smith', 'x', '9', '.com', '.io',
+]
+
+def random_page(rng):
+    return ''.join(rng.choice(FRAGMENTS) for _ in range(rng.randint(1, 24)))
+
+class PatternParityTest(unittest.TestCase):
+    def assert_same(self, content):
+        expected = baseline_extract(content, 'https://example.com')
+        got = [{k: v for k, v in user.to_dict().items() if k != 'method'}
+               for user in scraper.extract_users_from_patterns(content, 'https://example.com')]
+        self.assertEqual(got, expected, msg=repr(content))
+
+    def test_overlapping_matches(self):
+        for content in ('https://facebook.com/jane.doe@site.com', 'a@b.com+c@d.com', 'ann@x.io-bob@y.io',
+                        '<span class="user-name profile-username">jdoe</span>',
+                        '<a class="name" href="mailto:ann@x.io">Ann</a> https://twitter.com/ann'):
+            with self.subTest(content=content):
+                self.assert_same(content)
+
+    def test_random_pages(self):
+        rng = random.Random(2000)
+        for _ in range(20000):
+            self.assert_same(random_page(rng))
+
+    def test_offsets_point_at_matches(self):
+        content = 'x <p class="name">Ann</p> ann@x.io'
+        users = list(scraper.iter_users_from_patterns(content, 'https://example.com', offset=100))
+        self.assertEqual([u.offset - 100 for u in users], [content.index('ann@'), content.index('class=')])
+
+if __name__ == '__main__':
+    unittest.main()
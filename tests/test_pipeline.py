@@ -0,0 +1,147 @@
+"""ExtractionPipeline with the streamed HTML stage, against a local server"""
+import http.server
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Website_scrape_bd as scraper
+
+CARD = '<div class="user-card"><h3>User {0}</h3><p>user{0}@example.com</p></div>'
+CARDS = ('<html><body>' + ''.join(CARD.format(i) for i in range(20)) + '</body></html>').encode()
+FILLER = b'<p>' + b'lorem ipsum ' * 80 + b'</p>\n'
+
+class _Site(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    requests = []
+
+    def do_GET(self):
+        _Site.requests.append(self.path)
+        if self.path in ('/cards', '/members'):
+            self.reply(CARDS)
+        elif self.path == '/plain':
+            self.reply(b'<html><body><p>Nothing to see</p></body></html>')
+        elif self.path in ('/big', '/slow'):
+            size = 2 * 1024 * 1024
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html')
+            self.send_header('Content-Length', str(size))
+            self.end_headers()
+            try:
+                for _ in range(size // len(FILLER)):
+                    self.wfile.write(FILLER)
+                    if self.path == '/slow':
+                        time.sleep(0.05)
+                self.wfile.write(b' ' * (size % len(FILLER)))
+            except OSError:
+                pass
+        else:
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+    def handle(self):
+        try:
+            super().handle()
+        except ConnectionError:
+            # Budgeted downloads drop the connection mid-body
+            pass
+
+    def reply(self, body):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+class StreamedPipelineTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), _Site)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base = f'http://127.0.0.1:{cls.server.server_address[1]}'
+        cls.min_delay = scraper.HTTP_FETCHER.min_delay
+        scraper.HTTP_FETCHER.min_delay = 0
+
+    @classmethod
+    def tearDownClass(cls):
+        scraper.HTTP_FETCHER.min_delay = cls.min_delay
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        _Site.requests = []
+        self.tmp = tempfile.TemporaryDirectory()
+        self.profiles = scraper.SiteProfileStore(os.path.join(self.tmp.name, 'profiles.sqlite'))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_confident_html_stage_skips_the_rest(self):
+        pipeline = scraper.ExtractionPipeline(profiles=self.profiles)
+        result = pipeline.run_streamed(self.base + '/cards')
+        self.assertEqual(len(result.records), 20)
+        self.assertEqual([(r['stage'], r['status']) for r in result.stages],
+                         [('html', 'ok'), ('regex', 'skipped'), ('endpoints', 'skipped')])
+        self.assertEqual(result.stages[0]['records'], 20)
+        self.assertEqual(set(_Site.requests) - {'/robots.txt'}, {'/cards'})
+        self.assertEqual(self.profiles.get(scraper.site_key(self.base)).stage, 'html')
+
+    def test_second_streamed_run_follows_the_profile(self):
+        pipeline = scraper.ExtractionPipeline(profiles=self.profiles)
+        for path, learned in (('/cards', ['/cards']), ('/plain', ['/members'])):
+            with self.subTest(path=path):
+                self.profiles.forget(scraper.site_key(self.base))
+                first = pipeline.run_streamed(self.base + path)
+                self.assertEqual(len(first.records), 20)
+                _Site.requests = []
+                second = pipeline.run_streamed(self.base + path)
+                self.assertEqual(len(second.records), 20)
+                self.assertEqual([r['stage'] for r in second.stages], [first.records[0].method])
+                self.assertEqual([p for p in _Site.requests if p != '/robots.txt'], learned)
+
+    def test_failed_profile_reuses_the_page(self):
+        domain = scraper.site_key(self.base)
+        pipeline = scraper.ExtractionPipeline(profiles=self.profiles)
+        for stage, run in (('html', pipeline.run), ('regex', pipeline.run), ('regex', pipeline.run_streamed)):
+            with self.subTest(stage=stage, run=run.__name__):
+                self.profiles.learn(scraper.SiteProfile(domain, stage))
+                _Site.requests = []
+                result = run(self.base + '/plain')
+                self.assertEqual(len(result.records), 20)
+                self.assertEqual(_Site.requests.count('/plain'), 1)
+                self.assertEqual(self.profiles.get(domain).endpoint, '/members')
+
+    def test_byte_budget(self):
+        pipeline = scraper.ExtractionPipeline([scraper.HTMLStage()], fetch_bytes=256 * 1024, profiles=self.profiles)
+        result = pipeline.run_streamed(self.base + '/big')
+        report = result.stages[0]
+        self.assertEqual(report['status'], 'bytes_budget')
+        self.assertLess(report['bytes'], 512 * 1024)
+        self.assertTrue(result.document.truncated)
+
+    def test_time_budget(self):
+        pipeline = scraper.ExtractionPipeline([scraper.HTMLStage(seconds=0.2)], fetch_seconds=0.3,
+                                              profiles=self.profiles)
+        started = time.monotonic()
+        with self.assertLogs('darkboss.fetch', 'WARNING') as logs:
+            result = pipeline.run_streamed(self.base + '/slow')
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertEqual(result.stages[0]['status'], 'time_budget')
+        self.assertIn('time budget', logs.output[-1])
+
+    def test_timeout_message(self):
+        with self.assertLogs('darkboss.fetch', 'WARNING') as logs:
+            scraper._report_fetch_error('https://example.com', TimeoutError())
+            scraper._report_fetch_error('https://example.com', scraper.urllib.error.URLError(TimeoutError()))
+        self.assertEqual(logs.output, ['WARNING:darkboss.fetch:Timed out: https://example.com'] * 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+"""HTML reports in every mode"""
+import html
+import json
+import os
+import re
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Website_scrape_bd as scraper
+
+URL = 'https://example.com/members'
+
+def make_users(count):
+    for i in range(count):
+        yield scraper.UserRecord(name=f'User {i} <b>&"</script>', email=f'user{i}@example.com' if i % 2 else None,
+                                 username=f'user_{i}', profile_url=f'{URL}/user_{i}', method='html')
+
+class ReportTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.tmp.name, 'report.html')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read(self, filename=None):
+        with open(filename or self.filename, encoding='utf-8') as f:
+            return f.read()
+
+    def test_summary_comes_before_the_cards(self):
+        for mode in ('single', 'virtual'):
+            with self.subTest(mode=mode):
+                scraper.generate_html_report(make_users(30), URL, self.filename, mode)
+                page = self.read()
+                stats = page.index('class="stats"')
+                self.assertLess(page.index('class="info-box"'), stats)
+                self.assertLess(stats, page.index('<h2>User Information</h2>'))
+                self.assertIn('<p class="stat-number">30</p>', page)
+                self.assertIn('<p class="stat-number">15</p>', page)
+                self.assertNotRegex(page, r'\border:')
+
+    def test_paged_round_trip(self):
+        pages = scraper.write_paged_report(make_users(23), URL, self.filename, page_size=5)
+        self.assertEqual(pages, 5)
+        names = []
+        for page in range(1, pages + 1):
+            cards = re.findall(r'<h3 class="user-name">(.*?)</h3>', self.read(scraper._page_filename(self.filename, page)))
+            self.assertEqual(len(cards), 5 if page < pages else 3)
+            names.extend(html.unescape(name) for name in cards)
+        self.assertFalse(os.path.exists(scraper._page_filename(self.filename, pages + 1)))
+        self.assertEqual(names, [user.name for user in make_users(23)])
+        summary = self.read()
+        self.assertIn('<p class="stat-number">23</p>', summary)
+        for page in range(1, pages + 1):
+            self.assertIn(f'href="report_p{page}.html"', summary)
+
+    def test_virtual_round_trip(self):
+        scraper.generate_html_report(make_users(23), URL, self.filename, 'virtual')
+        embedded = re.search(r'<script type="application/json" id="records">(.*?)</script>', self.read(), re.S)
+        rows = json.loads(embedded.group(1))
+        self.assertEqual(rows, [[user.name, user.email, user.username, user.bio, user.avatar, user.profile_url]
+                                for user in make_users(23)])
+
+    def test_empty_report(self):
+        for mode in scraper.REPORT_MODES:
+            with self.subTest(mode=mode):
+                scraper.generate_html_report(iter(()), URL, self.filename, mode)
+                page = self.read()
+                self.assertLess(page.index('class="stats"'), page.index('No User Data Found'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+"""Killing a batch run with SIGKILL and finishing it with --resume"""
+import csv
+import http.server
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT = os.path.join(ROOT, 'Website_scrape_bd.py')
+SITES = 12
+USERS = 150
+# The first run hangs on this site; with --checkpoint-every 3 sites 7 and 8
+# are in the outputs but not in the journal when it is killed
+HANG_AT = 9
+CARD = '<div class="user-card"><h3>User {0} {1}</h3><p>user{1}@site{0}.example.com</p></div>'
+
+def page(site):
+    return ('<html><body>' + ''.join(CARD.format(site, i) for i in range(USERS)) + '</body></html>').encode()
+
+class _Site(http.server.BaseHTTPRequestHandler):
+    requests = []
+    hanging = threading.Event()
+    release = threading.Event()
+
+    def do_GET(self):
+        if not self.path.startswith('/site/'):
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        site = int(self.path.rsplit('/', 1)[1])
+        _Site.requests.append(site)
+        if site == HANG_AT and not _Site.release.is_set():
+            _Site.hanging.set()
+            _Site.release.wait(60)
+            return
+        body = page(site)
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def handle(self):
+        try:
+            super().handle()
+        except ConnectionError:
+            # The killed run leaves its request behind
+            pass
+
+    def log_message(self, *args):
+        pass
+
+class ResumeTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), _Site)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base = f'http://127.0.0.1:{cls.server.server_address[1]}'
+
+    @classmethod
+    def tearDownClass(cls):
+        _Site.release.set()
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.urls = os.path.join(self.tmp.name, 'urls.txt')
+        with open(self.urls, 'w', encoding='utf-8') as f:
+            f.writelines(f'{self.base}/site/{site}\n' for site in range(1, SITES + 1))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def command(self, *extra):
+        return [sys.executable, SCRIPT, '--input', self.urls, '-d', self.tmp.name, '-f', 'jsonl', '-f', 'csv',
+                '-c', '1', '--checkpoint-every', '3', '--no-cache', '--no-profiles', '--log-level', 'WARNING', *extra]
+
+    def outputs(self):
+        names = sorted(name for name in os.listdir(self.tmp.name) if name.startswith('darkboss_results_'))
+        self.assertEqual([os.path.splitext(name)[1] for name in names], ['.csv', '.jsonl'])
+        return [os.path.join(self.tmp.name, name) for name in names]
+
+    def test_kill_and_resume(self):
+        run = subprocess.Popen(self.command(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            self.assertTrue(_Site.hanging.wait(60), 'the run never reached the hanging site')
+            os.kill(run.pid, signal.SIGKILL)
+        finally:
+            run.wait(30)
+        self.assertEqual(run.returncode, -signal.SIGKILL)
+
+        with open(os.path.join(self.tmp.name, 'darkboss_journal.jsonl'), encoding='utf-8') as f:
+            checkpoints = [json.loads(line) for line in f][1:]
+        self.assertEqual(checkpoints[-1]['records'], 6 * USERS)
+        csv_path, jsonl_path = self.outputs()
+        # Records past the last checkpoint reached the file and must not survive
+        self.assertGreater(os.path.getsize(jsonl_path), checkpoints[-1]['sizes'][jsonl_path])
+
+        _Site.requests = []
+        _Site.release.set()
+        started = time.monotonic()
+        done = subprocess.run(self.command('--resume'), capture_output=True, text=True, timeout=120)
+        self.assertEqual(done.returncode, 0, done.stderr)
+        self.assertLess(time.monotonic() - started, 60)
+        self.assertEqual(sorted(_Site.requests), list(range(7, SITES + 1)))
+        self.assertEqual(self.outputs(), [csv_path, jsonl_path])
+
+        expected = sorted(f'user{i}@site{site}.example.com' for site in range(1, SITES + 1) for i in range(USERS))
+        with open(jsonl_path, encoding='utf-8') as f:
+            self.assertEqual(sorted(json.loads(line)['email'] for line in f), expected)
+        with open(csv_path, encoding='utf-8', newline='') as f:
+            self.assertEqual(sorted(row['email'] for row in csv.DictReader(f)), expected)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+"""AdvancedDarkBossScraper's element stack on markup with omitted end tags"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Website_scrape_bd as scraper
+
+BACKENDS = [scraper.PARSER_BACKENDS[name][0] for name in scraper.available_parser_backends()]
+
+def row(i):
+    return f'<tr class=member><td>User {i}<td>user{i}@example.com'
+
+def item(i):
+    return f'<li class=member><p>User {i}<p>user{i}@example.com'
+
+def parse(markup, backend):
+    parser = scraper.AdvancedDarkBossScraper('https://example.com', backend=backend)
+    parser.feed(markup)
+    parser.close()
+    return [user.name for user in parser.users]
+
+class ImpliedEndTest(unittest.TestCase):
+    def test_document_order(self):
+        pages = {
+            'rows': '<table>' + ''.join(row(i) for i in range(5)) + '</table>',
+            'rows in tbody': '<table><tbody>' + ''.join(row(i) for i in range(5)) + '</tbody></table>',
+            'items': '<ul>' + ''.join(item(i) for i in range(5)) + '</ul>',
+            'definitions': '<dl>' + ''.join(f'<dt>Member<dd class=member><b>User {i}</b> user{i}@example.com'
+                                            for i in range(5)) + '</dl>',
+        }
+        for backend in BACKENDS:
+            for kind, page in pages.items():
+                with self.subTest(backend=backend.name, kind=kind):
+                    self.assertEqual(parse(page, backend), [f'User {i}' for i in range(5)])
+
+    def test_cards_close_at_the_next_sibling(self):
+        parser = scraper.AdvancedDarkBossScraper('https://example.com', backend=scraper.HTMLParserBackend)
+        parser.feed('<table>' + row(0) + row(1))
+        # The first row ended when the second started, not at </table>
+        self.assertEqual([user.name for user in parser.drain_users()], ['User 0'])
+
+    def test_stack_depth_stays_flat(self):
+        for make, open_tag in ((row, '<table>'), (item, '<ul>')):
+            parser = scraper.AdvancedDarkBossScraper('https://example.com', backend=scraper.HTMLParserBackend)
+            parser.feed(open_tag)
+            depths = []
+            for i in range(1000):
+                parser.feed(make(i))
+                depths.append(len(parser._open))
+            self.assertLessEqual(max(depths), 4)
+            self.assertEqual(len(parser.drain_users()), 999)
+
+    def test_scope_keeps_nested_lists(self):
+        page = ('<ul><li class=member>Ann Lee<ul><li>first<li>second</ul><p>ann@example.com</li>'
+                '<li class=member>Bob Ray<table><tr><td>x<tr><td>y</table><p>bob@example.com</ul>')
+        for backend in BACKENDS:
+            with self.subTest(backend=backend.name):
+                parser = scraper.AdvancedDarkBossScraper('https://example.com', backend=backend)
+                parser.feed(page)
+                parser.close()
+                self.assertEqual([(user.name, user.email) for user in parser.users],
+                                 [('Ann Lee', 'ann@example.com'), ('Bob Ray', 'bob@example.com')])
+
+if __name__ == '__main__':
+    unittest.main()
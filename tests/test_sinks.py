@@ -0,0 +1,146 @@
+"""Output sinks round-trip their records in every format"""
+import csv
+import gzip
+import io
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Website_scrape_bd as scraper
+
+# Fields the CSV sink writes as JSON when they are not strings
+CSV_JSON_FIELDS = ('social', 'extra')
+
+def make_users(count, start=0):
+    users = []
+    for i in range(start, start + count):
+        user = scraper.UserRecord(name=f'Úser {i}, "quoted"', email=f'user{i}@example.com', method='html')
+        if i % 2:
+            user.bio = 'line one\nline two ' + 'x' * (i * 40)
+            user.social = ['https://twitter.com/u%d' % i]
+        if i % 3 == 0:
+            user.extra = {'id': i, 'roles': ['member']}
+        users.append(user)
+    return users
+
+def read_records(path, fmt):
+    opener = gzip.open if path.endswith('.gz') else open
+    if fmt == 'binary':
+        return list(scraper.iter_binary_users(path))
+    with opener(path, 'rt', encoding='utf-8', newline='') as f:
+        if fmt == 'jsonl':
+            return [scraper.UserRecord.from_json(line) for line in f]
+        records = []
+        for row in csv.DictReader(f):
+            fields = {key: value for key, value in row.items() if value != ''}
+            for key in CSV_JSON_FIELDS:
+                if key in fields:
+                    fields[key] = json.loads(fields[key])
+            records.append(scraper.UserRecord(**fields))
+        return records
+
+class SinkRoundTripTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def cases(self):
+        for fmt, sink in scraper.SINK_FORMATS.items():
+            for compressed in (False, True):
+                yield fmt, os.path.join(self.tmp.name, 'users' + sink.extension + ('.gz' if compressed else ''))
+
+    def test_round_trip(self):
+        users = make_users(50)
+        for fmt, path in self.cases():
+            with self.subTest(path=os.path.basename(path)):
+                with scraper.open_sink(path, batch_size=7) as sink:
+                    self.assertIsInstance(sink, scraper.SINK_FORMATS[fmt])
+                    sink.write_all(users)
+                self.assertEqual(sink.count, 50)
+                self.assertEqual(read_records(path, fmt), users)
+
+    def test_append(self):
+        for fmt, path in self.cases():
+            with self.subTest(path=os.path.basename(path)):
+                with scraper.open_sink(path) as sink:
+                    sink.write_all(make_users(3))
+                with scraper.open_sink(path, append=True) as sink:
+                    sink.write_all(make_users(2, start=3))
+                # One header or magic number, whatever the number of sessions
+                self.assertEqual(read_records(path, fmt), make_users(5))
+
+    def test_batches_are_written_when_full(self):
+        path = os.path.join(self.tmp.name, 'users.jsonl')
+        sink = scraper.open_sink(path, batch_size=4)
+        sink.write_all(make_users(3))
+        self.assertEqual(os.path.getsize(path), 0)
+        sink.write(make_users(1)[0])
+        with open(path, encoding='utf-8') as f:
+            self.assertEqual(len(f.readlines()), 4)
+        sink.write_all(make_users(2))
+        sink.close()
+        self.assertEqual(len(read_records(path, 'jsonl')), 6)
+
+    def test_sync_leaves_a_readable_gzip_file(self):
+        path = os.path.join(self.tmp.name, 'users.jsonl.gz')
+        sink = scraper.open_sink(path)
+        sink.write_all(make_users(3))
+        size = sink.sync()
+        sink.write_all(make_users(2, start=3))
+        sink.close()
+        with open(path, 'r+b') as f:
+            f.truncate(size)
+        self.assertEqual(read_records(path, 'jsonl'), make_users(3))
+
+class BinaryFormatTest(unittest.TestCase):
+    def test_varints(self):
+        for value in (0, 1, 127, 128, 300, 16383, 16384, 2 ** 21, 2 ** 63 - 1):
+            with self.subTest(value=value):
+                out = bytearray()
+                scraper._write_varint(out, value)
+                self.assertEqual(len(out), max(1, (value.bit_length() + 6) // 7))
+                self.assertEqual(scraper._read_varint(bytes(out) + b'\xff', 0), (value, len(out)))
+
+    def test_record_layout(self):
+        out = io.BytesIO()
+        with scraper.BinarySink(out) as sink:
+            sink.write(scraper.UserRecord(name='Ann', email='a@b.c', extra={'id': 7}))
+        extra_bit = scraper.BINARY_FIELDS.index('extra')
+        present = 1 | 1 << 2 | 1 << extra_bit
+        mask = bytearray()
+        scraper._write_varint(mask, present)
+        encoded = bytearray()
+        scraper._write_varint(encoded, 1 << extra_bit)
+        body = bytes(mask + encoded) + b'\x03Ann' + b'\x05a@b.c' + b'\x09{"id": 7}'
+        self.assertEqual(out.getvalue(), scraper.BINARY_MAGIC + bytes([len(body)]) + body)
+        out.seek(0)
+        self.assertEqual(list(scraper.iter_binary_users(out)),
+                         [scraper.UserRecord(name='Ann', email='a@b.c', extra={'id': 7})])
+
+    def test_records_across_read_chunks(self):
+        # Longer than a read chunk, so lengths and values straddle chunk ends
+        users = [scraper.UserRecord(name=f'User {i}', bio='b' * (scraper.STREAM_CHUNK_SIZE // 3 + i))
+                 for i in range(10)]
+        out = io.BytesIO()
+        with scraper.BinarySink(out) as sink:
+            sink.write_all(users)
+        out.seek(0)
+        self.assertEqual(list(scraper.iter_binary_users(out)), users)
+
+    def test_bad_input(self):
+        with self.assertRaises(ValueError):
+            list(scraper.iter_binary_users(io.BytesIO(b'PK\x03\x04')))
+        out = io.BytesIO()
+        with scraper.BinarySink(out) as sink:
+            sink.write(scraper.UserRecord(name='Ann'))
+        with self.assertRaises(ValueError):
+            list(scraper.iter_binary_users(io.BytesIO(out.getvalue()[:-1])))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+"""URLResolver and normalize_url"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Website_scrape_bd as scraper
+
+BASE = 'https://Example.com/team/index.html?page=1'
+
+class NormalizeURLTest(unittest.TestCase):
+    def test_normalize(self):
+        cases = {
+            'https://example.com/a/b': 'https://example.com/a/b',
+            'HTTPS://Example.COM/Users/Jane': 'https://example.com/Users/Jane',
+            'https://Example.com': 'https://example.com',
+            'https://example.com/u/jane#bio': 'https://example.com/u/jane',
+            'https://example.com/u?utm_source=x&id=3&UTM_Medium=y&fbclid=z': 'https://example.com/u?id=3',
+            'https://example.com/u?gclid=1': 'https://example.com/u',
+            'https://example.com/u?id=3#top': 'https://example.com/u?id=3',
+            '/relative/path': '/relative/path',
+            'javascript:void(0)': 'javascript:void(0)',
+        }
+        for url, expected in cases.items():
+            with self.subTest(url=url):
+                self.assertEqual(scraper.normalize_url(url), expected)
+
+class URLResolverTest(unittest.TestCase):
+    def test_resolve(self):
+        resolver = scraper.URLResolver(BASE)
+        cases = {
+            '/user/jane-doe': ('https://example.com/user/jane-doe', 'Jane Doe'),
+            '/user/jane#bio': ('https://example.com/user/jane', 'Jane'),
+            '/user/jane?utm_source=feed': ('https://example.com/user/jane', 'Jane'),
+            'members/bob_ray': ('https://example.com/team/members/bob_ray', 'Bob Ray'),
+            '../about': ('https://example.com/about', 'About'),
+            '/a/./b/../c': ('https://example.com/a/c', 'C'),
+            '//CDN.example.com/avatars/ann.png': ('https://cdn.example.com/avatars/ann.png', 'Ann.Png'),
+            'HTTP://Other.org/u/lee': ('http://other.org/u/lee', 'Lee'),
+            '#top': ('https://example.com/team/index.html?page=1', None),
+            '?page=2': ('https://example.com/team/index.html?page=2', None),
+            '': ('https://example.com/team/index.html?page=1', None),
+            'javascript:void(0)': ('javascript:void(0)', None),
+            'mailto:ann@example.com': ('mailto:ann@example.com', None),
+        }
+        for href, expected in cases.items():
+            with self.subTest(href=href):
+                self.assertEqual(resolver.resolve(href), expected)
+                # A cached answer matches a fresh one
+                self.assertEqual(resolver._resolve(href), expected)
+
+    def test_cache_hits(self):
+        resolver = scraper.URLResolver(BASE)
+        for _ in range(3):
+            resolver.resolve('/user/jane')
+        info = resolver.cache_info()
+        self.assertEqual((info.hits, info.misses, info.currsize), (2, 1, 1))
+
+    def test_cache_is_bounded(self):
+        resolver = scraper.URLResolver(BASE, maxsize=3)
+        for href in ('/a', '/b', '/c'):
+            resolver.resolve(href)
+        # Using /a makes /b the least recently used entry
+        resolver.resolve('/a')
+        resolver.resolve('/d')
+        info = resolver.cache_info()
+        self.assertEqual((info.currsize, info.maxsize), (3, 3))
+        misses = info.misses
+        resolver.resolve('/a')
+        resolver.resolve('/c')
+        resolver.resolve('/d')
+        self.assertEqual(resolver.cache_info().misses, misses)
+        resolver.resolve('/b')
+        self.assertEqual(resolver.cache_info().misses, misses + 1)
+
+    def test_long_urls_are_not_cached(self):
+        resolver = scraper.URLResolver(BASE)
+        href = 'data:image/png;base64,' + 'A' * scraper.URL_CACHE_MAX_LENGTH
+        self.assertEqual(resolver.resolve(href), (href, None))
+        long_path = '/user/' + 'x' * scraper.URL_CACHE_MAX_LENGTH
+        self.assertEqual(resolver.resolve(long_path)[0], 'https://example.com' + long_path)
+        self.assertEqual(resolver.cache_info().currsize, 0)
+
+    def test_javascript_link_gives_no_name(self):
+        parser = scraper.AdvancedDarkBossScraper(BASE)
+        parser.feed('<div class="user-card"><a href="javascript:open(\'/user/ann\')"></a>'
+                    '<p>ann@example.com</p></div>')
+        parser.close()
+        self.assertEqual([(user.name, user.profile_url) for user in parser.users],
+                         [(None, "javascript:open('/user/ann')")])
+
+if __name__ == '__main__':
+    unittest.main()